@@ -0,0 +1,70 @@
+"""add_query_indexes
+
+Revision ID: 62392d379de8
+Revises: 41f0823198cd
+Create Date: 2026-10-17 10:12:04.118356
+
+Adds secondary indexes matched to the filter and sort of each hot query in
+backend/src/db/queries.py, so they stop scanning whole tables:
+- Message_v2(chatId, createdAt): get_messages_by_chat_id
+- Message_v2(chatId, createdAt) WHERE role = 'user': get_message_count_by_user_id
+- Chat(userId, createdAt DESC): get_chats_by_user_id
+- Stream(chatId, createdAt): get_stream_ids_by_chat_id
+- Suggestion(documentId, documentCreatedAt): get_suggestions_by_document_id
+- Vote_v2(messageId): vote_message
+
+Indexes are built CONCURRENTLY so writes to live tables are not blocked,
+which cannot run inside a transaction (hence the autocommit block). If a
+concurrent build fails it leaves an INVALID index behind, which IF NOT EXISTS
+would skip: drop it and rerun.
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "62392d379de8"
+down_revision: str | None = "41f0823198cd"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+# (index name, table, columns, partial index predicate)
+INDEXES: list[tuple[str, str, list[str | sa.TextClause], str | None]] = [
+    ("Message_v2_chatId_createdAt_idx", "Message_v2", ["chatId", "createdAt"], None),
+    (
+        "Message_v2_user_chatId_createdAt_idx",
+        "Message_v2",
+        ["chatId", "createdAt"],
+        "role = 'user'",
+    ),
+    ("Chat_userId_createdAt_idx", "Chat", ["userId", sa.text('"createdAt" DESC')], None),
+    ("Stream_chatId_createdAt_idx", "Stream", ["chatId", "createdAt"], None),
+    (
+        "Suggestion_documentId_documentCreatedAt_idx",
+        "Suggestion",
+        ["documentId", "documentCreatedAt"],
+        None,
+    ),
+    ("Vote_v2_messageId_idx", "Vote_v2", ["messageId"], None),
+]
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                postgresql_concurrently=True,
+                postgresql_where=sa.text(where) if where else None,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,55 @@
+"""chat_keyset_index
+
+Revision ID: e5ad34e73abb
+Revises: 62392d379de8
+Create Date: 2026-10-17 11:02:47.530921
+
+Replaces Chat(userId, createdAt DESC) with Chat(userId, createdAt DESC, id DESC)
+so get_chats_by_user_id's keyset condition on (createdAt, id) is answered by
+an index range without sorting ties. Built CONCURRENTLY, like 62392d379de8.
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e5ad34e73abb"
+down_revision: str | None = "62392d379de8"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "Chat_userId_createdAt_id_idx",
+            "Chat",
+            ["userId", sa.text('"createdAt" DESC'), sa.text("id DESC")],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index(
+            "Chat_userId_createdAt_idx",
+            table_name="Chat",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "Chat_userId_createdAt_idx",
+            "Chat",
+            ["userId", sa.text('"createdAt" DESC')],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index(
+            "Chat_userId_createdAt_id_idx",
+            table_name="Chat",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
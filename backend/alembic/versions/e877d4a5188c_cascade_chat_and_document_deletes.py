@@ -0,0 +1,71 @@
+"""cascade_chat_and_document_deletes
+
+Revision ID: e877d4a5188c
+Revises: e5ad34e73abb
+Create Date: 2026-10-17 12:20:31.904417
+
+Recreates the foreign keys below a chat or document with ON DELETE CASCADE,
+so deleting a Chat removes its messages, votes and streams (and deleting a
+Message its votes, a Document its suggestions) in the same statement:
+- Message_v2.chatId -> Chat.id
+- Vote_v2.chatId -> Chat.id
+- Vote_v2.messageId -> Message_v2.id
+- Stream.chatId -> Chat.id
+- Suggestion(documentId, documentCreatedAt) -> Document(id, createdAt)
+
+Every referencing column is indexed (62392d379de8), so cascades do not scan.
+Each constraint is swapped NOT VALID in one short transaction (it is enforced
+for new rows straight away) and then validated separately, which scans the
+table without blocking writes.
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e877d4a5188c"
+down_revision: str | None = "e5ad34e73abb"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+# (constraint name, table, columns, referenced table, referenced columns)
+FOREIGN_KEYS: list[tuple[str, str, list[str], str, list[str]]] = [
+    ("Message_v2_chatId_fkey", "Message_v2", ["chatId"], "Chat", ["id"]),
+    ("Vote_v2_chatId_fkey", "Vote_v2", ["chatId"], "Chat", ["id"]),
+    ("Vote_v2_messageId_fkey", "Vote_v2", ["messageId"], "Message_v2", ["id"]),
+    ("Stream_chatId_fkey", "Stream", ["chatId"], "Chat", ["id"]),
+    (
+        "Suggestion_documentId_documentCreatedAt_fkey",
+        "Suggestion",
+        ["documentId", "documentCreatedAt"],
+        "Document",
+        ["id", "createdAt"],
+    ),
+]
+
+
+def _replace_foreign_keys(ondelete: str | None) -> None:
+    for name, table, columns, referent, referent_columns in FOREIGN_KEYS:
+        op.drop_constraint(name, table, type_="foreignkey")
+        op.create_foreign_key(
+            name,
+            table,
+            referent,
+            columns,
+            referent_columns,
+            ondelete=ondelete,
+            postgresql_not_valid=True,
+        )
+    # Commit the swap before validating, so validation holds no strong locks
+    with op.get_context().autocommit_block():
+        for name, table, *_ in FOREIGN_KEYS:
+            op.execute(f'ALTER TABLE "{table}" VALIDATE CONSTRAINT "{name}"')
+
+
+def upgrade() -> None:
+    _replace_foreign_keys(ondelete="CASCADE")
+
+
+def downgrade() -> None:
+    _replace_foreign_keys(ondelete=None)
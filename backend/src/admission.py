@@ -0,0 +1,310 @@
+"""Admission control for /api/chat: per-user rate limits and a global stream cap.
+
+Requests are admitted before any LLM work starts:
+1. a global cap on concurrently generating chat streams (leases with a TTL,
+   so a crashed worker or leaked permit cannot hold a slot forever)
+2. a token bucket per user, sized by user type (e.g. guest, registered)
+3. an aggregate token bucket per user type
+
+Rejections raise RateLimitError with a Retry-After hint. A token is only
+spent when every bucket admits the request.
+
+Two backends are available, selected by ADMISSION_BACKEND:
+- memory: per-process buckets and leases (default); limits reset on restart
+  and apply per replica
+- redis: shared across replicas, with atomic Lua scripts
+
+With the redis backend the per-user buckets are the durable daily
+entitlement (the registered default matches the frontend's 100 messages a
+day) and the frontend skips its 24-hour message count (BACKEND_ADMISSION).
+Memory buckets reset on restart, so with them the count stays the
+entitlement and the buckets only shed bursts.
+"""
+
+import math
+import os
+import time
+import uuid
+from collections import OrderedDict
+from collections.abc import AsyncGenerator, AsyncIterator, Callable
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Protocol
+
+from backend.src.observability import get_logger
+from backend.src.observability.exceptions import RateLimitError, ValidationError
+from backend.src.observability.metrics import ADMISSION_DECISIONS
+
+logger = get_logger(__name__)
+
+
+def _parse_rate(value: str) -> tuple[float, float]:
+    """Parse "<capacity>/<seconds>" into (capacity, refill tokens per second).
+
+    "0" (or an empty value) disables the bucket.
+    """
+    capacity, _, period = value.partition("/")
+    if not capacity or float(capacity) <= 0:
+        return 0.0, 0.0
+    return float(capacity), float(capacity) / float(period or 1)
+
+
+# Configuration from environment
+ADMISSION_BACKEND = os.getenv("ADMISSION_BACKEND", "memory")
+ADMISSION_MAX_CONCURRENT_STREAMS = int(os.getenv("ADMISSION_MAX_CONCURRENT_STREAMS", "200"))
+ADMISSION_LEASE_TTL_SECONDS = float(os.getenv("ADMISSION_LEASE_TTL_SECONDS", "300"))
+ADMISSION_MAX_BUCKETS = int(os.getenv("ADMISSION_MAX_BUCKETS", "100000"))
+# Per-user buckets by user type, as "<requests>/<seconds>"
+USER_RATE_LIMITS: dict[str, tuple[float, float]] = {
+    "guest": _parse_rate(os.getenv("RATE_LIMIT_GUEST", "20/86400")),
+    "registered": _parse_rate(os.getenv("RATE_LIMIT_REGISTERED", "100/86400")),
+}
+# Aggregate buckets shared by all users of a type ("0" disables)
+USER_TYPE_RATE_LIMITS: dict[str, tuple[float, float]] = {
+    "guest": _parse_rate(os.getenv("RATE_LIMIT_GUEST_TOTAL", "0")),
+    "registered": _parse_rate(os.getenv("RATE_LIMIT_REGISTERED_TOTAL", "0")),
+}
+REDIS_URL = os.getenv("REDIS_URL", "")
+
+
+class AdmissionStore(Protocol):
+    """Interface of an admission control backend."""
+
+    async def consume(self, key: str, capacity: float, rate: float) -> float:
+        """Take one token from a bucket.
+
+        Returns:
+            0 if a token was taken, otherwise seconds until one is available.
+        """
+        ...
+
+    async def refund(self, key: str, capacity: float) -> None:
+        """Give back a token taken by consume() (never beyond capacity)."""
+        ...
+
+    async def acquire(self, name: str, limit: int, ttl: float) -> str | None:
+        """Acquire a lease on a counting semaphore, or None if it is full."""
+        ...
+
+    async def release(self, name: str, lease_id: str) -> None:
+        """Release a lease acquired with acquire()."""
+        ...
+
+
+class InMemoryAdmissionStore:
+    """Per-process token buckets and leases."""
+
+    def __init__(
+        self,
+        max_buckets: int | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_buckets = ADMISSION_MAX_BUCKETS if max_buckets is None else max_buckets
+        self._clock = clock
+        # key -> (tokens, updated_at); evicting a bucket only resets it to full
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        # name -> {lease_id: expires_at}
+        self._leases: dict[str, dict[str, float]] = {}
+
+    async def consume(self, key: str, capacity: float, rate: float) -> float:
+        now = self._clock()
+        tokens, updated_at = self._buckets.pop(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated_at) * rate)
+
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / rate
+        self._buckets[key] = (tokens, now)
+        while len(self._buckets) > self.max_buckets:
+            self._buckets.popitem(last=False)
+        return wait
+
+    async def refund(self, key: str, capacity: float) -> None:
+        if key in self._buckets:
+            tokens, updated_at = self._buckets[key]
+            self._buckets[key] = (min(capacity, tokens + 1), updated_at)
+
+    async def acquire(self, name: str, limit: int, ttl: float) -> str | None:
+        now = self._clock()
+        leases = self._leases.setdefault(name, {})
+        for lease_id in [k for k, expires_at in leases.items() if expires_at <= now]:
+            del leases[lease_id]
+        if len(leases) >= limit:
+            return None
+        lease_id = uuid.uuid4().hex
+        leases[lease_id] = now + ttl
+        return lease_id
+
+    async def release(self, name: str, lease_id: str) -> None:
+        self._leases.get(name, {}).pop(lease_id, None)
+
+
+# Token bucket: refill from the elapsed time, then take one token if available
+_CONSUME_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= 1 then
+  tokens = tokens - 1
+else
+  wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return tostring(wait)
+"""
+
+# Give one token back to a bucket that still exists
+_REFUND_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local tokens = tonumber(redis.call('HGET', KEYS[1], 'tokens'))
+if tokens then
+  redis.call('HSET', KEYS[1], 'tokens', tostring(math.min(capacity, tokens + 1)))
+end
+return 1
+"""
+
+# Counting semaphore: a sorted set of lease ids scored by expiry time
+_ACQUIRE_SCRIPT = """
+local limit = tonumber(ARGV[1])
+local ttl = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now)
+if redis.call('ZCARD', KEYS[1]) >= limit then
+  return 0
+end
+redis.call('ZADD', KEYS[1], now + ttl, ARGV[3])
+redis.call('EXPIRE', KEYS[1], math.ceil(ttl) + 1)
+return 1
+"""
+
+
+class RedisAdmissionStore:
+    """Buckets and leases shared by every replica. Requires the optional redis package."""
+
+    def __init__(self, url: str | None = None, client: Any = None) -> None:
+        if client is None:
+            import redis.asyncio as redis  # optional dependency
+
+            client = redis.from_url(url or REDIS_URL)
+        self._redis = client
+        self._consume = client.register_script(_CONSUME_SCRIPT)
+        self._refund = client.register_script(_REFUND_SCRIPT)
+        self._acquire = client.register_script(_ACQUIRE_SCRIPT)
+
+    async def consume(self, key: str, capacity: float, rate: float) -> float:
+        wait = await self._consume(keys=[f"knowsee:bucket:{key}"], args=[capacity, rate])
+        return float(wait)
+
+    async def refund(self, key: str, capacity: float) -> None:
+        await self._refund(keys=[f"knowsee:bucket:{key}"], args=[capacity])
+
+    async def acquire(self, name: str, limit: int, ttl: float) -> str | None:
+        lease_id = uuid.uuid4().hex
+        acquired = await self._acquire(keys=[f"knowsee:leases:{name}"], args=[limit, ttl, lease_id])
+        return lease_id if int(acquired) else None
+
+    async def release(self, name: str, lease_id: str) -> None:
+        await self._redis.zrem(f"knowsee:leases:{name}", lease_id)
+
+
+@lru_cache(maxsize=1)
+def get_admission_store() -> AdmissionStore:
+    """Create the configured admission store lazily on first access."""
+    if ADMISSION_BACKEND == "redis":
+        return RedisAdmissionStore()
+    return InMemoryAdmissionStore()
+
+
+@dataclass
+class AdmissionPermit:
+    """A slot held by an admitted chat stream until release()."""
+
+    store: AdmissionStore | None = None
+    lease_id: str | None = None
+
+    async def release(self) -> None:
+        """Give the slot back (idempotent)."""
+        if self.store is not None and self.lease_id is not None:
+            lease_id, self.lease_id = self.lease_id, None
+            await self.store.release("chat-streams", lease_id)
+
+
+async def admit_chat(user_key: str, user_type: str = "registered") -> AdmissionPermit:
+    """Admit a chat request or raise RateLimitError.
+
+    Args:
+        user_key: Stable identifier of the caller (user id, or client address).
+        user_type: User type selecting the limits, one of USER_RATE_LIMITS.
+
+    Returns:
+        Permit to release once the chat stream has finished.
+
+    Raises:
+        ValidationError: If the user type is unknown.
+        RateLimitError: If a rate limit or the global stream cap is exceeded.
+    """
+    # Checked before use as a metric label or bucket key
+    if user_type not in USER_RATE_LIMITS:
+        raise ValidationError(
+            f"Unknown user type: {user_type}", details={"available": list(USER_RATE_LIMITS)}
+        )
+
+    store = get_admission_store()
+    permit = AdmissionPermit()
+
+    if ADMISSION_MAX_CONCURRENT_STREAMS > 0:
+        lease_id = await store.acquire(
+            "chat-streams", ADMISSION_MAX_CONCURRENT_STREAMS, ADMISSION_LEASE_TTL_SECONDS
+        )
+        if lease_id is None:
+            ADMISSION_DECISIONS.labels(user_type=user_type, result="concurrency_limited").inc()
+            raise RateLimitError(
+                "Too many conversations in progress. Please try again shortly.", retry_after=1
+            )
+        permit = AdmissionPermit(store=store, lease_id=lease_id)
+
+    checks = [
+        ("user_limited", f"user:{user_type}:{user_key}", USER_RATE_LIMITS[user_type]),
+        ("type_limited", f"type:{user_type}", USER_TYPE_RATE_LIMITS.get(user_type, (0.0, 0.0))),
+    ]
+    consumed: list[tuple[str, float]] = []
+    for result, key, (capacity, rate) in checks:
+        if capacity <= 0:
+            continue
+        wait = await store.consume(key, capacity, rate)
+        if wait > 0:
+            # A rejected request must not use up the buckets that admitted it
+            for consumed_key, consumed_capacity in consumed:
+                await store.refund(consumed_key, consumed_capacity)
+            await permit.release()
+            ADMISSION_DECISIONS.labels(user_type=user_type, result=result).inc()
+            raise RateLimitError(
+                "You have reached your message limit. Please try again later.",
+                retry_after=max(math.ceil(wait), 1),
+            )
+        consumed.append((key, capacity))
+
+    ADMISSION_DECISIONS.labels(user_type=user_type, result="admitted").inc()
+    return permit
+
+
+async def release_when_done(
+    frames: AsyncIterator[bytes],
+    permit: AdmissionPermit,
+) -> AsyncGenerator[bytes, None]:
+    """Relay frames, releasing the admission permit when the stream ends."""
+    try:
+        async for frame in frames:
+            yield frame
+    finally:
+        await permit.release()
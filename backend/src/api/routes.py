@@ -4,6 +4,7 @@ All endpoints are under /api/db/ prefix.
 These endpoints are called by the Next.js frontend.
 """
 
+import os
 from datetime import datetime
 from typing import Any
 from uuid import UUID
@@ -13,6 +14,13 @@ from pydantic import BaseModel, ConfigDict
 
 from backend.src.db import queries
 from backend.src.db.config import get_session
+from backend.src.graph import delete_chat_threads
+from backend.src.observability import get_logger
+
+logger = get_logger(__name__)
+
+# Chats deleted per transaction when deleting a whole account's history
+CHAT_DELETE_BATCH_SIZE = max(1, int(os.getenv("CHAT_DELETE_BATCH_SIZE", "500")))
 
 router = APIRouter(prefix="/api/db", tags=["database"])
 
@@ -41,6 +49,13 @@ class ChatCreate(BaseModel):
     visibility: str = "private"
 
 
+class ChatTitleUpdate(BaseModel):
+    """Chat title update request."""
+
+    userId: UUID
+    title: str
+
+
 class ChatResponse(BaseModel):
     """Chat response model."""
 
@@ -59,6 +74,9 @@ class ChatsResponse(BaseModel):
 
     chats: list[ChatResponse]
     hasMore: bool
+    # Opaque cursors: pass nextCursor as ending_before, prevCursor as starting_after
+    nextCursor: str | None = None
+    prevCursor: str | None = None
 
 
 class MessageCreate(BaseModel):
@@ -236,10 +254,10 @@ async def get_chat_by_id(chat_id: UUID):
 async def get_chats_by_user_id(
     userId: UUID = Query(...),
     limit: int = Query(10),
-    starting_after: UUID | None = Query(None),
-    ending_before: UUID | None = Query(None),
+    starting_after: str | None = Query(None),
+    ending_before: str | None = Query(None),
 ):
-    """Get paginated chats for a user."""
+    """Get a page of a user's chats, newest first, using keyset cursors."""
     async with get_session() as session:
         result = await queries.get_chats_by_user_id(
             session, userId, limit, starting_after, ending_before
@@ -249,16 +267,26 @@ async def get_chats_by_user_id(
 
 @router.delete("/chats/{chat_id}", response_model=ChatResponse | None)
 async def delete_chat_by_id(chat_id: UUID):
-    """Delete a chat and all related data."""
+    """Delete a chat and all related data, including its checkpointed thread."""
     async with get_session() as session:
-        return await queries.delete_chat_by_id(session, chat_id)
+        chat = await queries.delete_chat_by_id(session, chat_id)
+    if chat is not None:
+        await delete_chat_threads([str(chat_id)])
+    return chat
 
 
 @router.delete("/chats/user/{user_id}", response_model=DeletedCountResponse)
 async def delete_all_chats_by_user_id(user_id: UUID):
-    """Delete all chats for a user."""
+    """Delete all chats for a user, in batches committed one at a time."""
+    deleted = 0
     async with get_session() as session:
-        return await queries.delete_all_chats_by_user_id(session, user_id)
+        async for chat_ids in queries.delete_chats_by_user_id_in_batches(
+            session, user_id, CHAT_DELETE_BATCH_SIZE
+        ):
+            await delete_chat_threads(str(chat_id) for chat_id in chat_ids)
+            deleted += len(chat_ids)
+            logger.info("Deleting chats", user_id=str(user_id), deleted=deleted)
+    return {"deletedCount": deleted}
 
 
 @router.patch("/chats/{chat_id}/visibility", response_model=SuccessResponse)
@@ -269,6 +297,16 @@ async def update_chat_visibility(chat_id: UUID, visibility: str = Query(...)):
         return {"success": True}
 
 
+@router.patch("/chats/{chat_id}/title", response_model=SuccessResponse)
+async def update_chat_title(chat_id: UUID, update: ChatTitleUpdate):
+    """Update the title of a user's chat."""
+    async with get_session() as session:
+        updated = await queries.update_chat_title_by_id(
+            session, chat_id, update.userId, update.title
+        )
+        return {"success": updated}
+
+
 @router.patch("/chats/{chat_id}/context", response_model=SuccessResponse)
 async def update_chat_last_context(chat_id: UUID, context: dict[str, Any]):
     """Update chat's last context."""
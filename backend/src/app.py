@@ -1,23 +1,80 @@
 """FastAPI application exposing the LangGraph chatbot."""
 
+import asyncio
+import contextlib
+import time
+from collections.abc import AsyncGenerator
+from contextlib import asynccontextmanager
 from typing import Any, Optional
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse, StreamingResponse
-from langchain_core.messages import AIMessage, HumanMessage
 from pydantic import BaseModel, ConfigDict
 
+from backend.src.admission import admit_chat
 from backend.src.api import router as db_router
+from backend.src.chat_title import SPECULATIVE_TITLE_ENABLED, start_title
+from backend.src.db.checkpointer import open_checkpointer
 from backend.src.db.config import check_db_health
-from backend.src.graph import chatbot_graph, generate_title
+from backend.src.graph import (
+    configure_checkpointer,
+    generate_reply,
+    generate_title,
+    get_checkpointed_graph,
+)
+from backend.src.llm.registry import (
+    MODEL_WARMUP_ENABLED,
+    get_model_registry,
+    resolve_chat_model,
+)
+from backend.src.llm.tiers import resolve_latency_tier
+from backend.src.observability.exceptions import KnowseeError, ValidationError
+from backend.src.observability.metrics import STARTUP_PHASE_DURATION
 from backend.src.observability.middleware import setup_observability
-from backend.src.stream import create_streaming_response
+from backend.src.protocol import AISDK_V5_HEADERS
+from backend.src.resumable import get_stream_store, subscribe
+from backend.src.stream import (
+    cancel_on_disconnect,
+    create_streaming_response,
+    message_text,
+    rewind_thread,
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
+    """Open application-wide resources and warm up model clients.
+
+    The conversation checkpointer is opened before serving. Model warm-up
+    runs in the background; /health/ready reports not ready until it ends.
+    """
+    start_time = time.perf_counter()
+    async with open_checkpointer() as checkpointer:
+        configure_checkpointer(checkpointer)
+        STARTUP_PHASE_DURATION.labels(phase="checkpointer").set(time.perf_counter() - start_time)
+
+        registry = get_model_registry()
+        warmup = None
+        if MODEL_WARMUP_ENABLED:
+            warmup = asyncio.create_task(registry.warm_up())
+        else:
+            registry.skip_warm_up()
+        try:
+            yield
+        finally:
+            if warmup is not None:
+                warmup.cancel()
+                with contextlib.suppress(asyncio.CancelledError):
+                    await warmup
+            configure_checkpointer(None)
+
 
 app = FastAPI(
     title="Knowsee Chatbot API",
     description="Simple LangGraph chatbot powered by Vertex AI",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 # Set up observability (logging, metrics, exception handlers)
@@ -63,9 +120,26 @@ class StreamingChatRequest(BaseModel):
     model_config = ConfigDict(extra="allow")
 
     id: str
-    messages: list[ChatMessage]
+    # Full history (compatibility mode); omit when sending only `message`
+    messages: list[ChatMessage] = []
+    # The new user message; history is loaded from the checkpointer by chatId
+    message: Optional[ChatMessage] = None
+    # With `message`: how many messages the client's history holds before it,
+    # so a thread that kept deleted (edited or regenerated) turns is rewound
+    historyLength: Optional[int] = None
+    # Chat id, used as the checkpointer thread id
+    chatId: Optional[str] = None
     selectedChatModel: Optional[str] = None
+    # Latency tier (interactive, standard, deep); defaults to the model's tier
+    latencyTier: Optional[str] = None
     selectedVisibilityType: Optional[str] = None
+    # Stream table id; when set, the stream can be resumed via Last-Event-ID
+    streamId: Optional[str] = None
+    # Caller identity for admission control (rate limits per user and user type)
+    userId: Optional[str] = None
+    userType: str = "registered"
+    # First turn of a chat: generate the chat title alongside the answer
+    generateTitle: bool = False
 
 
 class SimpleChatRequest(BaseModel):
@@ -114,6 +188,7 @@ async def health_readiness() -> JSONResponse:
 
     Verifies:
     - Database connectivity with timeout
+    - Model warm-up has finished
 
     Returns 200 if ready, 503 if not ready.
     """
@@ -123,6 +198,9 @@ async def health_readiness() -> JSONResponse:
     db_health = await check_db_health()
     checks["database"] = db_health
 
+    # Check model warm-up (see backend.src.llm.registry)
+    checks["models"] = get_model_registry().health()
+
     # Determine overall status
     all_healthy = all(
         check.get("healthy", False) for check in checks.values() if isinstance(check, dict)
@@ -141,59 +219,157 @@ async def health_readiness() -> JSONResponse:
 
 
 @app.post("/api/chat")
-async def chat_stream(request: StreamingChatRequest) -> StreamingResponse:
+async def chat_stream(request: StreamingChatRequest, http_request: Request) -> StreamingResponse:
     """Process a chat message and stream the response.
 
     This endpoint implements the Vercel AI SDK Data Stream Protocol v5.
+    Requests pass admission control (per-user rate limits and a global
+    stream cap) before any LLM work starts. With generateTitle, the chat
+    title is generated concurrently, saved to the Chat row and sent as a
+    data-chatTitle part (see backend.src.chat_title).
 
     Args:
         request: Chat request from the frontend.
+        http_request: Raw HTTP request, used to cancel generation on disconnect.
 
     Returns:
         StreamingResponse with SSE-formatted events.
+
+    Raises:
+        ValidationError: If the selected chat model or latency tier is unknown, or
+            (409) the checkpointed history is shorter than historyLength, in
+            which case the client resends the full history.
+        RateLimitError: If the caller is over a rate limit or the server is at capacity.
     """
-    # Convert messages to the format expected by the stream handler
-    messages = [msg.model_dump() for msg in request.messages]
+    model_id = resolve_chat_model(request.selectedChatModel)
+    latency_tier = resolve_latency_tier(request.latencyTier)
+
+    # Delta mode: only the new message is sent, history lives in the checkpointer
+    if request.message is not None:
+        if get_checkpointed_graph() is None or not request.chatId:
+            raise ValidationError(
+                "Sending only the new message requires chatId and server-side chat history"
+            )
+        if request.historyLength is not None:
+            await rewind_thread(request.chatId, request.historyLength, model_id)
+        messages = [request.message.model_dump()]
+        history = "delta"
+    elif request.messages:
+        # Convert messages to the format expected by the stream handler
+        messages = [msg.model_dump() for msg in request.messages]
+        history = "full"
+    else:
+        raise ValidationError("Either message or messages is required")
+
+    user_key = request.userId or (http_request.client.host if http_request.client else "unknown")
+    permit = await admit_chat(user_key, request.userType)
+    title = None
+    if request.generateTitle and request.chatId and SPECULATIVE_TITLE_ENABLED:
+        first_message = next((m for m in messages if m.get("role") == "user"), None)
+        if first_message is not None and (text := message_text(first_message)):
+            title = start_title(
+                text, request.chatId, request.userId, request.selectedVisibilityType
+            )
+    try:
+        return await create_streaming_response(
+            messages,
+            stream_id=request.streamId,
+            request=http_request,
+            chat_id=request.chatId,
+            history=history,
+            permit=permit,
+            model_id=model_id,
+            latency_tier=latency_tier,
+            title=title,
+        )
+    except BaseException:
+        await permit.release()
+        if title is not None:
+            title.cancel()
+        raise
+
+
+@app.get("/api/chat/stream/{stream_id}", response_model=None)
+async def resume_chat_stream(
+    stream_id: str,
+    http_request: Request,
+    last_event_id: int = Header(0, alias="Last-Event-ID"),
+) -> StreamingResponse | Response:
+    """Resume an in-flight or recently finished chat stream.
+
+    Replays every frame after Last-Event-ID (or from the start when the header
+    is absent), then follows the live tail until the stream finishes.
 
-    return await create_streaming_response(messages)
+    Args:
+        stream_id: Stream table id passed to /api/chat as streamId.
+        http_request: Raw HTTP request, used to detach on disconnect.
+        last_event_id: Id of the last SSE event the client received.
+
+    Returns:
+        StreamingResponse with SSE-formatted events, or 204 if the stream
+        is unknown or has been evicted past the requested position.
+    """
+    if not await get_stream_store().replayable(stream_id, last_event_id):
+        return Response(status_code=204)
+
+    return StreamingResponse(
+        cancel_on_disconnect(http_request, subscribe(stream_id, last_event_id)),
+        media_type="text/event-stream",
+        headers=AISDK_V5_HEADERS,
+    )
+
+
+def _cache_bypassed(cache_control: str | None) -> bool:
+    """Whether a Cache-Control request header asks for a fresh response."""
+    directives = {d.strip().lower() for d in (cache_control or "").split(",")}
+    return bool(directives & {"no-cache", "no-store"})
 
 
 @app.post("/chat", response_model=SimpleChatResponse)
-async def chat_simple(request: SimpleChatRequest) -> SimpleChatResponse:
+async def chat_simple(
+    request: SimpleChatRequest,
+    cache_control: Optional[str] = Header(None),
+) -> SimpleChatResponse:
     """Process a chat message and return the response (non-streaming).
 
+    Runs on the async graph path behind the global LLM concurrency governor,
+    so a slow Gemini call never blocks the event loop. Identical messages are
+    answered from the response cache unless the request sends
+    Cache-Control: no-cache.
+
     Args:
         request: Chat request containing the user message.
+        cache_control: Optional Cache-Control request header.
 
     Returns:
         SimpleChatResponse with the AI-generated response.
     """
     try:
-        result = chatbot_graph.invoke({"messages": [HumanMessage(content=request.message)]})
-
-        ai_messages = [msg for msg in result["messages"] if isinstance(msg, AIMessage)]
-
-        if not ai_messages:
-            raise HTTPException(status_code=500, detail="No response generated")
-
-        # Handle content which can be str or list
-        content = ai_messages[-1].content
-        response_text = content if isinstance(content, str) else str(content)
+        response_text = await generate_reply(
+            request.message, use_cache=not _cache_bypassed(cache_control)
+        )
         return SimpleChatResponse(response=response_text)
 
+    except KnowseeError:
+        # Handled by the observability exception handlers (e.g. 429 + Retry-After)
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing request: {str(e)}") from e
 
 
 @app.post("/api/title", response_model=TitleResponse)
-async def generate_chat_title(request: TitleRequest) -> TitleResponse:
+async def generate_chat_title(
+    request: TitleRequest,
+    cache_control: Optional[str] = Header(None),
+) -> TitleResponse:
     """Generate a title for a chat based on the first message.
 
     Args:
         request: Title request containing the user message.
+        cache_control: Optional Cache-Control request header.
 
     Returns:
         TitleResponse with the generated title.
     """
-    title = await generate_title(request.message)
+    title = await generate_title(request.message, use_cache=not _cache_bypassed(cache_control))
     return TitleResponse(title=title)
@@ -0,0 +1,73 @@
+"""Speculative chat titles, generated alongside the first chat stream.
+
+On the first turn of a chat, /api/chat can start title generation as soon as
+the request is admitted instead of the frontend calling /api/title first and
+waiting for it. The title runs concurrently with the chat model call (on the
+interactive tier), is saved to the Chat row, and is sent to the client as a
+transient data part in the same SSE stream (see stream_langgraph_response).
+
+A title task outlives a cancelled stream: the title is still saved when the
+client disconnects mid-answer.
+"""
+
+import asyncio
+import os
+from uuid import UUID
+
+from backend.src.db import queries
+from backend.src.db.config import get_session
+from backend.src.graph import generate_title
+from backend.src.observability import get_logger
+
+logger = get_logger(__name__)
+
+# Configuration from environment
+SPECULATIVE_TITLE_ENABLED = os.getenv("SPECULATIVE_TITLE_ENABLED", "true").lower() == "true"
+# How long a finished chat stream waits for a title that is still generating
+SPECULATIVE_TITLE_WAIT_SECONDS = float(os.getenv("SPECULATIVE_TITLE_WAIT_SECONDS", "5"))
+
+# In-flight title tasks (keeps them from being garbage collected)
+_pending: set[asyncio.Task[str]] = set()
+
+
+async def save_title(chat_id: UUID, user_id: UUID, title: str, visibility: str = "private") -> None:
+    """Set the title of the user's chat, creating the Chat row if it does not exist yet."""
+    async with get_session() as session:
+        if await queries.update_chat_title_by_id(session, chat_id, user_id, title):
+            return
+        if await queries.get_chat_by_id(session, chat_id) is None:
+            await queries.save_chat(session, chat_id, user_id, title, visibility)
+
+
+async def generate_and_save_title(
+    message: str, chat_id: str, user_id: str | None, visibility: str | None = None
+) -> str:
+    """Generate a chat title and save it to the Chat row.
+
+    A failed save is logged, not raised: the title is still sent to the client.
+
+    Args:
+        message: The first user message.
+        chat_id: Chat id.
+        user_id: Owner of the chat; the title is only saved for a valid user id.
+        visibility: Visibility for a newly created Chat row.
+
+    Returns:
+        The generated title (generate_title falls back to the message itself).
+    """
+    title = await generate_title(message)
+    try:
+        await save_title(UUID(chat_id), UUID(user_id or ""), title, visibility or "private")
+    except Exception as e:
+        logger.warning("Saving speculative title failed", chat_id=chat_id, error=str(e))
+    return title
+
+
+def start_title(
+    message: str, chat_id: str, user_id: str | None, visibility: str | None = None
+) -> asyncio.Task[str]:
+    """Start generating and saving a chat title in the background."""
+    task = asyncio.create_task(generate_and_save_title(message, chat_id, user_id, visibility))
+    _pending.add(task)
+    task.add_done_callback(_pending.discard)
+    return task
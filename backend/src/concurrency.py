@@ -0,0 +1,108 @@
+"""Global LLM concurrency governor.
+
+Bounds how many LLM calls a worker runs at once. Callers beyond the limit
+wait in a bounded queue; when the queue is full (or a caller waits too long)
+the request is rejected with RateLimitError and a Retry-After hint instead of
+piling up coroutines that would all time out anyway.
+"""
+
+import asyncio
+import os
+import time
+from collections.abc import AsyncGenerator
+from contextlib import asynccontextmanager
+from functools import lru_cache
+
+from backend.src.observability.exceptions import RateLimitError
+from backend.src.observability.metrics import (
+    LLM_IN_FLIGHT,
+    LLM_QUEUE_DEPTH,
+    LLM_QUEUE_REJECTED,
+    LLM_QUEUE_WAIT,
+)
+
+# Configuration from environment
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+LLM_MAX_QUEUE_DEPTH = int(os.getenv("LLM_MAX_QUEUE_DEPTH", "64"))
+LLM_QUEUE_TIMEOUT_SECONDS = float(os.getenv("LLM_QUEUE_TIMEOUT_SECONDS", "10"))
+LLM_RETRY_AFTER_SECONDS = int(os.getenv("LLM_RETRY_AFTER_SECONDS", "2"))
+
+
+class LLMGovernor:
+    """Semaphore with a bounded wait queue.
+
+    Usage:
+        async with get_llm_governor().slot("chat"):
+            response = await llm.ainvoke(prompt)
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int | None = None,
+        max_queue_depth: int | None = None,
+        queue_timeout: float | None = None,
+    ) -> None:
+        self.max_concurrency = LLM_MAX_CONCURRENCY if max_concurrency is None else max_concurrency
+        self.max_queue_depth = LLM_MAX_QUEUE_DEPTH if max_queue_depth is None else max_queue_depth
+        self.queue_timeout = LLM_QUEUE_TIMEOUT_SECONDS if queue_timeout is None else queue_timeout
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._waiting = 0
+        self._running = 0
+
+    @property
+    def waiting(self) -> int:
+        """Number of callers queued for a slot."""
+        return self._waiting
+
+    @property
+    def running(self) -> int:
+        """Number of callers holding a slot."""
+        return self._running
+
+    @asynccontextmanager
+    async def slot(self, operation: str) -> AsyncGenerator[None, None]:
+        """Hold one LLM slot for the duration of the block.
+
+        Args:
+            operation: Label for metrics (e.g. "chat", "title").
+
+        Raises:
+            RateLimitError: If the wait queue is full or the wait timed out.
+        """
+        if self._running + self._waiting >= self.max_concurrency + self.max_queue_depth:
+            LLM_QUEUE_REJECTED.labels(operation=operation, reason="queue_full").inc()
+            raise RateLimitError(
+                "The assistant is busy. Please try again shortly.",
+                retry_after=LLM_RETRY_AFTER_SECONDS,
+            )
+
+        self._waiting += 1
+        LLM_QUEUE_DEPTH.inc()
+        start_time = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+        except TimeoutError:
+            LLM_QUEUE_REJECTED.labels(operation=operation, reason="timeout").inc()
+            raise RateLimitError(
+                "The assistant is busy. Please try again shortly.",
+                retry_after=LLM_RETRY_AFTER_SECONDS,
+            ) from None
+        finally:
+            self._waiting -= 1
+            LLM_QUEUE_DEPTH.dec()
+            LLM_QUEUE_WAIT.labels(operation=operation).observe(time.perf_counter() - start_time)
+
+        self._running += 1
+        LLM_IN_FLIGHT.inc()
+        try:
+            yield
+        finally:
+            self._running -= 1
+            LLM_IN_FLIGHT.dec()
+            self._semaphore.release()
+
+
+@lru_cache(maxsize=1)
+def get_llm_governor() -> LLMGovernor:
+    """Create the process-wide governor lazily on first access."""
+    return LLMGovernor()
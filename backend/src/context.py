@@ -0,0 +1,260 @@
+"""Token-budgeted context window for the chatbot graph.
+
+Long chats would otherwise send the whole history to Gemini on every turn, so
+prompt tokens and time-to-first-token grow without bound. When a history
+exceeds the budget, the leading system prompt and the most recent turns are
+kept verbatim and the older span is replaced by a rolling summary.
+
+Summaries are cached per chat id together with a hash of the span they cover,
+so a summary is only regenerated when the recent turns outgrow the budget
+again (or the summarised history was edited). On a cache miss (another
+replica, a restart) the summary stored in the checkpointed chat state is used.
+For chats, a new summary is generated in the background: the turn that
+outgrows the budget keeps the last summary and drops the turns not yet
+folded in, and later turns pick the new summary up. Until then the chat state
+still records where the last summary ends, so a summary lost with the cache
+is generated again instead of its span being dropped for good. Token counts are estimated
+locally from text length, avoiding a count-tokens round trip to Vertex.
+"""
+
+import asyncio
+import contextvars
+import hashlib
+import os
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+
+from backend.src.observability import get_logger
+from backend.src.observability.metrics import CONTEXT_SUMMARIES_TOTAL
+
+logger = get_logger(__name__)
+
+# Configuration from environment (a budget of 0 disables context management)
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "16000"))
+# Share of the budget kept as verbatim recent turns after summarising
+CONTEXT_RECENT_RATIO = float(os.getenv("CONTEXT_RECENT_RATIO", "0.5"))
+# Minimum number of recent messages always kept verbatim
+CONTEXT_KEEP_RECENT = int(os.getenv("CONTEXT_KEEP_RECENT", "4"))
+CONTEXT_CHARS_PER_TOKEN = float(os.getenv("CONTEXT_CHARS_PER_TOKEN", "4"))
+CONTEXT_SUMMARY_CACHE_SIZE = int(os.getenv("CONTEXT_SUMMARY_CACHE_SIZE", "1024"))
+
+# Fixed per-message overhead (role markers, turn separators)
+_MESSAGE_OVERHEAD_TOKENS = 4
+
+# Summarises (previous summary or None, messages to fold in) into a new summary
+Summarizer = Callable[[str | None, list[BaseMessage]], Awaitable[str]]
+
+
+@dataclass
+class _Summary:
+    """A rolling summary covering messages[:count] of one chat."""
+
+    count: int
+    digest: bytes
+    text: str
+
+
+class SummaryCache:
+    """LRU cache of rolling summaries keyed by chat id."""
+
+    def __init__(self, max_entries: int | None = None) -> None:
+        self.max_entries = CONTEXT_SUMMARY_CACHE_SIZE if max_entries is None else max_entries
+        self._entries: OrderedDict[str, _Summary] = OrderedDict()
+
+    def get(self, chat_id: str) -> _Summary | None:
+        """Get the summary for a chat, marking it recently used."""
+        summary = self._entries.get(chat_id)
+        if summary is not None:
+            self._entries.move_to_end(chat_id)
+        return summary
+
+    def put(self, chat_id: str, summary: _Summary) -> None:
+        """Store the summary for a chat, evicting the least recently used."""
+        self._entries[chat_id] = summary
+        self._entries.move_to_end(chat_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop every cached summary."""
+        self._entries.clear()
+
+
+_summaries = SummaryCache()
+# Background summaries in progress, by chat id
+_pending: dict[str, asyncio.Task[None]] = {}
+
+
+def estimate_tokens(message: BaseMessage | str) -> int:
+    """Estimate the token count of a message from its text length.
+
+    Args:
+        message: A message or plain text.
+
+    Returns:
+        Approximate number of tokens, including per-message overhead.
+    """
+    if isinstance(message, str):
+        text = message
+    elif isinstance(message.content, str):
+        text = message.content
+    else:
+        text = str(message.content)
+    return int(len(text) / CONTEXT_CHARS_PER_TOKEN) + _MESSAGE_OVERHEAD_TOKENS
+
+
+async def fit_context(
+    messages: list[BaseMessage],
+    summarize: Summarizer,
+    chat_id: str | None = None,
+    budget: int | None = None,
+    stored_summary: str | None = None,
+    stored_start: int = 0,
+) -> tuple[str | None, int, int]:
+    """Decide which part of a history is replaced by a summary.
+
+    Args:
+        messages: Full conversation history.
+        summarize: Produces a rolling summary from the previous one and the
+            messages to fold in.
+        chat_id: Chat id used to cache summaries across turns. With a chat id,
+            new summaries are generated in the background.
+        budget: Token budget. Defaults to CONTEXT_TOKEN_BUDGET.
+        stored_summary: Summary from the checkpointed chat state, used when
+            the cache has none for this chat.
+        stored_start: Where the verbatim turns of stored_summary start.
+
+    Returns:
+        Tuple of (summary, start, summary_start): the prompt is the leading
+        system messages, the summary (if any), then messages[start:]. The
+        summary covers the messages before summary_start; start is past it
+        while a summary of the turns in between is generated in the
+        background. (None, 0, 0) means the history is sent unchanged.
+    """
+    budget = CONTEXT_TOKEN_BUDGET if budget is None else budget
+    tokens = [estimate_tokens(m) for m in messages]
+    if budget <= 0 or sum(tokens) <= budget:
+        return None, 0, 0
+
+    # Leading system messages are always kept verbatim
+    head = 0
+    while head < len(messages) and isinstance(messages[head], SystemMessage):
+        head += 1
+    head_tokens = sum(tokens[:head])
+
+    previous: str | None = None
+    start = head
+    cached = _summaries.get(chat_id) if chat_id else None
+    if (
+        cached is not None
+        and head < cached.count <= len(messages)
+        and _digest(messages[head : cached.count]) == cached.digest
+    ):
+        previous, start = cached.text, cached.count
+    elif stored_summary and head < stored_start <= len(messages):
+        # Checkpointed threads are rewound or reset when their history is edited
+        previous, start = stored_summary, stored_start
+    if previous is not None and (
+        head_tokens + estimate_tokens(previous) + sum(tokens[start:]) <= budget
+    ):
+        CONTEXT_SUMMARIES_TOTAL.labels(result="cached").inc()
+        return previous, start, start
+
+    # Keep recent messages within the recent share of the budget
+    target = budget * CONTEXT_RECENT_RATIO
+    cut, kept = len(messages), 0
+    while cut > start and (
+        len(messages) - cut < CONTEXT_KEEP_RECENT or kept + tokens[cut - 1] <= target
+    ):
+        cut -= 1
+        kept += tokens[cut]
+    # Start the verbatim span on a user turn
+    while cut < len(messages) - 1 and not isinstance(messages[cut], HumanMessage):
+        cut += 1
+
+    covered = start if previous is not None else 0
+    if cut <= start:
+        return previous, covered, covered
+
+    if chat_id:
+        # Do not hold up the first token: drop the span for this turn only
+        _summarize_in_background(
+            chat_id, summarize, previous, messages[start:cut], cut, _digest(messages[head:cut])
+        )
+        return previous, cut, covered
+
+    try:
+        summary = await summarize(previous, messages[start:cut])
+    except Exception as e:
+        # Still enforce the budget: drop the older span without a summary
+        logger.warning("Context summarisation failed, truncating history", error=str(e))
+        CONTEXT_SUMMARIES_TOTAL.labels(result="failed").inc()
+        return previous, cut, covered
+
+    CONTEXT_SUMMARIES_TOTAL.labels(result="generated").inc()
+    return summary, cut, cut
+
+
+def _summarize_in_background(
+    chat_id: str,
+    summarize: Summarizer,
+    previous: str | None,
+    span: list[BaseMessage],
+    count: int,
+    digest: bytes,
+) -> None:
+    """Fold span into the chat's summary in a background task, caching the result.
+
+    At most one summary per chat is generated at a time. The task runs in an
+    empty context, so it is not attached to the graph run that started it.
+    """
+    if chat_id in _pending:
+        return
+
+    async def run() -> None:
+        try:
+            text = await summarize(previous, span)
+        except Exception as e:
+            logger.warning("Context summarisation failed", chat_id=chat_id, error=str(e))
+            CONTEXT_SUMMARIES_TOTAL.labels(result="failed").inc()
+            return
+        CONTEXT_SUMMARIES_TOTAL.labels(result="generated").inc()
+        _summaries.put(chat_id, _Summary(count=count, digest=digest, text=text))
+
+    task = asyncio.create_task(run(), context=contextvars.Context())
+    _pending[chat_id] = task
+    task.add_done_callback(lambda _: _pending.pop(chat_id, None))
+
+
+def build_prompt(
+    messages: list[BaseMessage],
+    summary: str | None,
+    start: int,
+) -> list[BaseMessage]:
+    """Assemble the model prompt from the history and the fit_context() result."""
+    if summary is None and start == 0:
+        return messages
+
+    head = 0
+    while head < len(messages) and isinstance(messages[head], SystemMessage):
+        head += 1
+    prompt = list(messages[:head])
+    if summary:
+        prompt.append(SystemMessage(content=f"Summary of the earlier conversation:\n{summary}"))
+    prompt.extend(messages[max(start, head) :])
+    return prompt
+
+
+def _digest(messages: list[BaseMessage]) -> bytes:
+    """Hash the roles and text of a span of messages."""
+    digest = hashlib.blake2b(digest_size=16)
+    for message in messages:
+        digest.update(message.type.encode())
+        digest.update(b"\x00")
+        content = message.content if isinstance(message.content, str) else str(message.content)
+        digest.update(content.encode())
+        digest.update(b"\x00")
+    return digest.digest()
@@ -0,0 +1,63 @@
+"""Postgres-backed LangGraph checkpointer for server-side conversation state.
+
+With a checkpointer, the chatbot graph keeps each chat's message history in
+Postgres keyed by chat id (the LangGraph thread id), so the frontend only has
+to send the new user message on each turn.
+
+LangGraph's Postgres saver is built on psycopg rather than SQLAlchemy/asyncpg,
+so it opens its own small pool against the same database as get_engine().
+Requires the optional checkpoint extra and CHAT_CHECKPOINTER=postgres.
+"""
+
+import os
+from collections.abc import AsyncGenerator
+from contextlib import asynccontextmanager
+from typing import Any
+
+from backend.src.db.config import get_database_url
+
+# Configuration from environment
+CHAT_CHECKPOINTER = os.getenv("CHAT_CHECKPOINTER", "none")
+CHECKPOINT_POOL_SIZE = int(os.getenv("CHECKPOINT_POOL_SIZE", "5"))
+
+
+def get_checkpoint_database_url() -> str:
+    """Get the database URL in the plain libpq format psycopg expects."""
+    return get_database_url().replace("postgresql+asyncpg://", "postgresql://")
+
+
+@asynccontextmanager
+async def open_checkpointer() -> AsyncGenerator[Any | None, None]:
+    """Open the configured checkpointer for the lifetime of the application.
+
+    Yields None when server-side conversation state is disabled.
+
+    Usage:
+        async with open_checkpointer() as checkpointer:
+            configure_checkpointer(checkpointer)
+            ...
+    """
+    if CHAT_CHECKPOINTER != "postgres":
+        yield None
+        return
+
+    # Optional dependencies: langgraph-checkpoint-postgres, psycopg[pool]
+    from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
+    from psycopg.rows import dict_row
+    from psycopg_pool import AsyncConnectionPool
+
+    database_url = get_checkpoint_database_url()
+    if not database_url:
+        raise RuntimeError(
+            "POSTGRES_URL environment variable not set. Set it to a PostgreSQL connection string."
+        )
+
+    async with AsyncConnectionPool(
+        database_url,
+        max_size=CHECKPOINT_POOL_SIZE,
+        kwargs={"autocommit": True, "prepare_threshold": 0, "row_factory": dict_row},
+        open=False,
+    ) as pool:
+        checkpointer = AsyncPostgresSaver(pool)  # type: ignore[arg-type]
+        await checkpointer.setup()
+        yield checkpointer
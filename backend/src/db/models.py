@@ -8,13 +8,31 @@ Table mapping:
 - Document -> "Document" (composite PK: id, createdAt)
 - Suggestion -> "Suggestion"
 - Stream -> "Stream"
+
+Relationships are lazy="raise": nothing related is loaded implicitly, and
+touching an unloaded relationship raises instead of issuing a hidden query.
+A query that needs related rows asks for them with a loader option such as
+selectinload(Chat.messages).
+
+Rows below a chat (messages, votes, streams) and a document (suggestions)
+are removed by ON DELETE CASCADE foreign keys, not by the ORM
+(passive_deletes).
 """
 
 from datetime import datetime
 from typing import Any
 from uuid import uuid4
 
-from sqlalchemy import Boolean, DateTime, ForeignKey, ForeignKeyConstraint, String, Text
+from sqlalchemy import (
+    Boolean,
+    DateTime,
+    ForeignKey,
+    ForeignKeyConstraint,
+    Index,
+    String,
+    Text,
+    text,
+)
 from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
@@ -35,9 +53,9 @@ class User(Base):
     password: Mapped[str | None] = mapped_column(String(64), nullable=True)
 
     # Relationships
-    chats: Mapped[list["Chat"]] = relationship(back_populates="user", lazy="selectin")
-    documents: Mapped[list["Document"]] = relationship(back_populates="user", lazy="selectin")
-    suggestions: Mapped[list["Suggestion"]] = relationship(back_populates="user", lazy="selectin")
+    chats: Mapped[list["Chat"]] = relationship(back_populates="user", lazy="raise")
+    documents: Mapped[list["Document"]] = relationship(back_populates="user", lazy="raise")
+    suggestions: Mapped[list["Suggestion"]] = relationship(back_populates="user", lazy="raise")
 
 
 class Chat(Base):
@@ -52,16 +70,21 @@ class Chat(Base):
     visibility: Mapped[str] = mapped_column(String, nullable=False, default="private")
     lastContext: Mapped[dict[str, Any] | None] = mapped_column(JSONB, nullable=True)
 
+    # Sidebar history: a user's chats, newest first, keyset-paginated on (createdAt, id)
+    __table_args__ = (
+        Index("Chat_userId_createdAt_id_idx", "userId", text('"createdAt" DESC'), text("id DESC")),
+    )
+
     # Relationships
-    user: Mapped["User"] = relationship(back_populates="chats", lazy="selectin")
+    user: Mapped["User"] = relationship(back_populates="chats", lazy="raise")
     messages: Mapped[list["Message"]] = relationship(
-        back_populates="chat", cascade="all, delete-orphan", lazy="selectin"
+        back_populates="chat", cascade="all, delete-orphan", lazy="raise", passive_deletes=True
     )
     votes: Mapped[list["Vote"]] = relationship(
-        back_populates="chat", cascade="all, delete-orphan", lazy="selectin"
+        back_populates="chat", cascade="all, delete-orphan", lazy="raise", passive_deletes=True
     )
     streams: Mapped[list["Stream"]] = relationship(
-        back_populates="chat", cascade="all, delete-orphan", lazy="selectin"
+        back_populates="chat", cascade="all, delete-orphan", lazy="raise", passive_deletes=True
     )
 
 
@@ -71,15 +94,31 @@ class Message(Base):
     __tablename__ = "Message_v2"
 
     id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid4)
-    chatId: Mapped[UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("Chat.id"), nullable=False)
+    chatId: Mapped[UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("Chat.id", ondelete="CASCADE"), nullable=False
+    )
     role: Mapped[str] = mapped_column(String, nullable=False)
     parts: Mapped[Any] = mapped_column(JSONB, nullable=False)
     attachments: Mapped[Any] = mapped_column(JSONB, nullable=False)
     createdAt: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
 
+    __table_args__ = (
+        # A chat's messages in order
+        Index("Message_v2_chatId_createdAt_idx", "chatId", "createdAt"),
+        # Rate limiting: recent user messages across a user's chats
+        Index(
+            "Message_v2_user_chatId_createdAt_idx",
+            "chatId",
+            "createdAt",
+            postgresql_where=text("role = 'user'"),
+        ),
+    )
+
     # Relationships
-    chat: Mapped["Chat"] = relationship(back_populates="messages", lazy="selectin")
-    votes: Mapped[list["Vote"]] = relationship(back_populates="message", lazy="selectin")
+    chat: Mapped["Chat"] = relationship(back_populates="messages", lazy="raise")
+    votes: Mapped[list["Vote"]] = relationship(
+        back_populates="message", lazy="raise", passive_deletes=True
+    )
 
 
 class Vote(Base):
@@ -88,16 +127,19 @@ class Vote(Base):
     __tablename__ = "Vote_v2"
 
     chatId: Mapped[UUID] = mapped_column(
-        UUID(as_uuid=True), ForeignKey("Chat.id"), primary_key=True
+        UUID(as_uuid=True), ForeignKey("Chat.id", ondelete="CASCADE"), primary_key=True
     )
     messageId: Mapped[UUID] = mapped_column(
-        UUID(as_uuid=True), ForeignKey("Message_v2.id"), primary_key=True
+        UUID(as_uuid=True), ForeignKey("Message_v2.id", ondelete="CASCADE"), primary_key=True
     )
     isUpvoted: Mapped[bool] = mapped_column(Boolean, nullable=False)
 
+    # Votes looked up by message alone (the primary key leads with chatId)
+    __table_args__ = (Index("Vote_v2_messageId_idx", "messageId"),)
+
     # Relationships
-    chat: Mapped["Chat"] = relationship(back_populates="votes", lazy="selectin")
-    message: Mapped["Message"] = relationship(back_populates="votes", lazy="selectin")
+    chat: Mapped["Chat"] = relationship(back_populates="votes", lazy="raise")
+    message: Mapped["Message"] = relationship(back_populates="votes", lazy="raise")
 
 
 class Document(Base):
@@ -114,11 +156,12 @@ class Document(Base):
     userId: Mapped[UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("User.id"), nullable=False)
 
     # Relationships
-    user: Mapped["User"] = relationship(back_populates="documents", lazy="selectin")
+    user: Mapped["User"] = relationship(back_populates="documents", lazy="raise")
     suggestions: Mapped[list["Suggestion"]] = relationship(
         back_populates="document",
         foreign_keys="[Suggestion.documentId, Suggestion.documentCreatedAt]",
-        lazy="selectin",
+        lazy="raise",
+        passive_deletes=True,
     )
 
 
@@ -142,15 +185,17 @@ class Suggestion(Base):
         ForeignKeyConstraint(
             ["documentId", "documentCreatedAt"],
             ["Document.id", "Document.createdAt"],
+            ondelete="CASCADE",
         ),
+        Index("Suggestion_documentId_documentCreatedAt_idx", "documentId", "documentCreatedAt"),
     )
 
     # Relationships
-    user: Mapped["User"] = relationship(back_populates="suggestions", lazy="selectin")
+    user: Mapped["User"] = relationship(back_populates="suggestions", lazy="raise")
     document: Mapped["Document"] = relationship(
         back_populates="suggestions",
         foreign_keys=[documentId, documentCreatedAt],
-        lazy="selectin",
+        lazy="raise",
     )
 
 
@@ -160,8 +205,12 @@ class Stream(Base):
     __tablename__ = "Stream"
 
     id: Mapped[UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid4)
-    chatId: Mapped[UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("Chat.id"), nullable=False)
+    chatId: Mapped[UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("Chat.id", ondelete="CASCADE"), nullable=False
+    )
     createdAt: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
 
+    __table_args__ = (Index("Stream_chatId_createdAt_idx", "chatId", "createdAt"),)
+
     # Relationships
-    chat: Mapped["Chat"] = relationship(back_populates="streams", lazy="selectin")
+    chat: Mapped["Chat"] = relationship(back_populates="streams", lazy="raise")
@@ -2,17 +2,25 @@
 
 All functions are async and use SQLAlchemy with asyncpg.
 Each function mirrors the exact behavior of its Drizzle counterpart.
+
+Model relationships are lazy="raise", so every query loads exactly the rows
+it selects; none of the API responses need related rows. A query that does
+must state it with loader options (selectinload/joinedload).
 """
 
+import base64
+import json
+from collections.abc import AsyncIterator
 from datetime import datetime, timedelta, timezone
 from typing import Any
-from uuid import UUID
+from uuid import UUID, uuid4
 
 import bcrypt
-from sqlalchemy import and_, asc, delete, desc, func, select, update
+from sqlalchemy import and_, asc, delete, desc, func, insert, select, tuple_, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from backend.src.db.models import Chat, Document, Message, Stream, Suggestion, User, Vote
+from backend.src.observability.exceptions import ValidationError
 
 # ==============================================================================
 # USER QUERIES
@@ -75,73 +83,110 @@ async def get_chat_by_id(session: AsyncSession, id: UUID) -> Chat | None:
     return result.scalar_one_or_none()
 
 
+def encode_chat_cursor(chat: Chat) -> str:
+    """Encode a chat's (createdAt, id) sort key as an opaque pagination cursor."""
+    key = json.dumps([chat.createdAt.isoformat(), str(chat.id)])
+    return base64.urlsafe_b64encode(key.encode()).decode().rstrip("=")
+
+
+def decode_chat_cursor(cursor: str) -> tuple[datetime, UUID]:
+    """Decode a pagination cursor back into a (createdAt, id) sort key.
+
+    Raises:
+        ValidationError: If the cursor is malformed.
+    """
+    try:
+        created_at, id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        key = datetime.fromisoformat(created_at), UUID(id)
+        if key[0].tzinfo is None:
+            raise ValueError("Cursor timestamp has no timezone")
+        return key
+    except (TypeError, ValueError) as e:
+        raise ValidationError("Invalid pagination cursor", details={"cursor": cursor}) from e
+
+
 async def get_chats_by_user_id(
     session: AsyncSession,
     user_id: UUID,
     limit: int = 10,
-    starting_after: UUID | None = None,
-    ending_before: UUID | None = None,
+    starting_after: str | None = None,
+    ending_before: str | None = None,
 ) -> dict[str, Any]:
-    """Get paginated chats for a user using cursor-based pagination."""
-    extended_limit = limit + 1
+    """Get a page of a user's chats, newest first, in a single statement.
 
-    # Base query
-    query = select(Chat).where(Chat.userId == user_id).order_by(desc(Chat.createdAt))
+    Keyset pagination on (createdAt, id), so chats sharing a timestamp are
+    neither skipped nor repeated. Pass a page's nextCursor as ending_before
+    for the older page after it, or its prevCursor as starting_after for the
+    newer page before it. hasMore refers to the direction being paged.
+    """
+    key = tuple_(Chat.createdAt, Chat.id)
+    query = select(Chat).where(Chat.userId == user_id)
 
-    # Apply cursor-based pagination
     if starting_after:
-        ref_result = await session.execute(select(Chat.createdAt).where(Chat.id == starting_after))
-        ref_created_at = ref_result.scalar_one_or_none()
-        if ref_created_at:
-            query = query.where(Chat.createdAt > ref_created_at)
-    elif ending_before:
-        ref_result = await session.execute(select(Chat.createdAt).where(Chat.id == ending_before))
-        ref_created_at = ref_result.scalar_one_or_none()
-        if ref_created_at:
-            query = query.where(Chat.createdAt < ref_created_at)
-
-    result = await session.execute(query.limit(extended_limit))
+        # Newer chats: walk the index upwards from the cursor, then flip the page
+        query = query.where(key > tuple_(*decode_chat_cursor(starting_after)))
+        query = query.order_by(asc(Chat.createdAt), asc(Chat.id))
+    else:
+        if ending_before:
+            query = query.where(key < tuple_(*decode_chat_cursor(ending_before)))
+        query = query.order_by(desc(Chat.createdAt), desc(Chat.id))
+
+    result = await session.execute(query.limit(limit + 1))
     chats = list(result.scalars().all())
 
     has_more = len(chats) > limit
+    chats = chats[:limit]
+    if starting_after:
+        chats.reverse()
+    has_older = has_more if not starting_after else True
+    has_newer = has_more if starting_after else bool(ending_before)
 
     return {
-        "chats": chats[:limit] if has_more else chats,
+        "chats": chats,
         "hasMore": has_more,
+        "nextCursor": encode_chat_cursor(chats[-1]) if chats and has_older else None,
+        "prevCursor": encode_chat_cursor(chats[0]) if chats and has_newer else None,
     }
 
 
 async def delete_chat_by_id(session: AsyncSession, id: UUID) -> Chat | None:
-    """Delete a chat and all related data (votes, messages, streams)."""
-    # Delete related data first (cascade manually for safety)
-    await session.execute(delete(Vote).where(Vote.chatId == id))
-    await session.execute(delete(Message).where(Message.chatId == id))
-    await session.execute(delete(Stream).where(Stream.chatId == id))
-
-    # Delete and return the chat
+    """Delete a chat; its votes, messages and streams go with it (ON DELETE CASCADE)."""
     result = await session.execute(delete(Chat).where(Chat.id == id).returning(Chat))
     return result.scalar_one_or_none()
 
 
 async def delete_all_chats_by_user_id(session: AsyncSession, user_id: UUID) -> dict[str, int]:
-    """Delete all chats for a user."""
-    # Get all chat IDs first
-    result = await session.execute(select(Chat.id).where(Chat.userId == user_id))
-    chat_ids = [row[0] for row in result.all()]
-
-    if not chat_ids:
-        return {"deletedCount": 0}
-
-    # Delete related data
-    await session.execute(delete(Vote).where(Vote.chatId.in_(chat_ids)))
-    await session.execute(delete(Message).where(Message.chatId.in_(chat_ids)))
-    await session.execute(delete(Stream).where(Stream.chatId.in_(chat_ids)))
-
-    # Delete chats
-    result = await session.execute(delete(Chat).where(Chat.userId == user_id).returning(Chat.id))
-    deleted = list(result.all())
-
-    return {"deletedCount": len(deleted)}
+    """Delete all chats for a user in one statement (related rows cascade)."""
+    result = await session.execute(delete(Chat).where(Chat.userId == user_id))
+    return {"deletedCount": result.rowcount}
+
+
+async def delete_chats_by_user_id_in_batches(
+    session: AsyncSession, user_id: UUID, batch_size: int = 500
+) -> AsyncIterator[list[UUID]]:
+    """Delete all chats for a user in batches, committing after each batch.
+
+    Deleting a large account this way never holds one long transaction. Yields
+    the ids of the chats deleted by each committed batch.
+
+    Raises:
+        ValueError: If batch_size is below 1 (no batch would ever be short).
+    """
+    if batch_size < 1:
+        raise ValueError(f"batch_size must be at least 1, got {batch_size}")
+    while True:
+        batch = select(Chat.id).where(Chat.userId == user_id).limit(batch_size)
+        result = await session.scalars(
+            delete(Chat)
+            .where(Chat.id.in_(batch.scalar_subquery()))
+            .returning(Chat.id)
+            .execution_options(synchronize_session=False)
+        )
+        deleted = list(result)
+        await session.commit()
+        yield deleted
+        if len(deleted) < batch_size:
+            return
 
 
 async def update_chat_visibility_by_id(
@@ -151,6 +196,16 @@ async def update_chat_visibility_by_id(
     await session.execute(update(Chat).where(Chat.id == chat_id).values(visibility=visibility))
 
 
+async def update_chat_title_by_id(
+    session: AsyncSession, chat_id: UUID, user_id: UUID, title: str
+) -> bool:
+    """Update a chat's title if it belongs to the user. Returns whether it was updated."""
+    result = await session.execute(
+        update(Chat).where(Chat.id == chat_id, Chat.userId == user_id).values(title=title)
+    )
+    return result.rowcount > 0
+
+
 async def update_chat_last_context_by_id(
     session: AsyncSession, chat_id: UUID, context: dict[str, Any]
 ) -> None:
@@ -164,21 +219,26 @@ async def update_chat_last_context_by_id(
 
 
 async def save_messages(session: AsyncSession, messages: list[dict[str, Any]]) -> list[Message]:
-    """Save multiple messages at once."""
-    db_messages = [
-        Message(
-            id=msg.get("id"),
-            chatId=msg["chatId"],
-            role=msg["role"],
-            parts=msg["parts"],
-            attachments=msg.get("attachments", []),
-            createdAt=msg.get("createdAt", datetime.now(timezone.utc)),
-        )
-        for msg in messages
+    """Save multiple messages in bulk INSERT ... RETURNING statements, in input order."""
+    if not messages:
+        return []
+    # One microsecond apart, so messages saved together keep their order by createdAt
+    now = datetime.now(timezone.utc)
+    rows = [
+        {
+            "id": msg.get("id") or uuid4(),
+            "chatId": msg["chatId"],
+            "role": msg["role"],
+            "parts": msg["parts"],
+            "attachments": msg.get("attachments") or [],
+            "createdAt": msg.get("createdAt") or now + timedelta(microseconds=index),
+        }
+        for index, msg in enumerate(messages)
     ]
-    session.add_all(db_messages)
-    await session.flush()
-    return db_messages
+    result = await session.scalars(
+        insert(Message).returning(Message, sort_by_parameter_order=True), rows
+    )
+    return list(result.all())
 
 
 async def get_messages_by_chat_id(session: AsyncSession, chat_id: UUID) -> list[Message]:
@@ -198,20 +258,10 @@ async def get_message_by_id(session: AsyncSession, id: UUID) -> list[Message]:
 async def delete_messages_by_chat_id_after_timestamp(
     session: AsyncSession, chat_id: UUID, timestamp: datetime
 ) -> None:
-    """Delete messages after a given timestamp (for undo/regenerate)."""
-    # Get message IDs to delete
-    result = await session.execute(
-        select(Message.id).where(and_(Message.chatId == chat_id, Message.createdAt >= timestamp))
+    """Delete messages after a given timestamp (for undo/regenerate); their votes cascade."""
+    await session.execute(
+        delete(Message).where(and_(Message.chatId == chat_id, Message.createdAt >= timestamp))
     )
-    message_ids = [row[0] for row in result.all()]
-
-    if message_ids:
-        # Delete votes first
-        await session.execute(
-            delete(Vote).where(and_(Vote.chatId == chat_id, Vote.messageId.in_(message_ids)))
-        )
-        # Delete messages
-        await session.execute(delete(Message).where(Message.id.in_(message_ids)))
 
 
 async def get_message_count_by_user_id(
@@ -316,18 +366,7 @@ async def get_document_by_id(session: AsyncSession, id: UUID) -> Document | None
 async def delete_documents_by_id_after_timestamp(
     session: AsyncSession, id: UUID, timestamp: datetime
 ) -> list[Document]:
-    """Delete document versions after a timestamp."""
-    # Delete related suggestions first
-    await session.execute(
-        delete(Suggestion).where(
-            and_(
-                Suggestion.documentId == id,
-                Suggestion.documentCreatedAt > timestamp,
-            )
-        )
-    )
-
-    # Delete and return documents
+    """Delete document versions after a timestamp; their suggestions cascade."""
     result = await session.execute(
         delete(Document)
         .where(and_(Document.id == id, Document.createdAt > timestamp))
@@ -344,24 +383,27 @@ async def delete_documents_by_id_after_timestamp(
 async def save_suggestions(
     session: AsyncSession, suggestions: list[dict[str, Any]]
 ) -> list[Suggestion]:
-    """Save multiple suggestions at once."""
-    db_suggestions = [
-        Suggestion(
-            id=s.get("id"),
-            documentId=s["documentId"],
-            documentCreatedAt=s["documentCreatedAt"],
-            originalText=s["originalText"],
-            suggestedText=s["suggestedText"],
-            description=s.get("description"),
-            isResolved=s.get("isResolved", False),
-            userId=s["userId"],
-            createdAt=s.get("createdAt", datetime.now(timezone.utc)),
-        )
+    """Save multiple suggestions in bulk INSERT ... RETURNING statements, in input order."""
+    if not suggestions:
+        return []
+    rows = [
+        {
+            "id": s.get("id") or uuid4(),
+            "documentId": s["documentId"],
+            "documentCreatedAt": s["documentCreatedAt"],
+            "originalText": s["originalText"],
+            "suggestedText": s["suggestedText"],
+            "description": s.get("description"),
+            "isResolved": s.get("isResolved", False),
+            "userId": s["userId"],
+            "createdAt": s.get("createdAt") or datetime.now(timezone.utc),
+        }
         for s in suggestions
     ]
-    session.add_all(db_suggestions)
-    await session.flush()
-    return db_suggestions
+    result = await session.scalars(
+        insert(Suggestion).returning(Suggestion, sort_by_parameter_order=True), rows
+    )
+    return list(result.all())
 
 
 async def get_suggestions_by_document_id(
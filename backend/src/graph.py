@@ -1,92 +1,245 @@
-"""LangGraph chatbot implementation using Vertex AI.
+"""LangGraph chatbot implementation.
 
 Uses direct LLM binding for proper streaming support with astream_events().
+Models come from the provider selected by CHAT_MODEL_PROVIDER (Vertex AI by
+default) and are built lazily by the model registry (see backend.src.llm).
 """
 
 import os
-from typing import Annotated
+import time
+from collections.abc import Iterable
+from functools import lru_cache
+from typing import Annotated, Any
 
 from dotenv import load_dotenv
-from langchain_core.messages import BaseMessage
-from langchain_google_vertexai import ChatVertexAI
+from langchain_core.messages import (
+    AIMessage,
+    AIMessageChunk,
+    BaseMessage,
+    HumanMessage,
+    message_chunk_to_message,
+)
+from langchain_core.runnables import RunnableConfig
 from langgraph.graph import END, START, StateGraph
 from langgraph.graph.message import add_messages
 from langgraph.graph.state import CompiledStateGraph
-from typing_extensions import TypedDict
+from typing_extensions import NotRequired, TypedDict
 
+from backend.src.concurrency import get_llm_governor
+from backend.src.context import build_prompt, fit_context
+from backend.src.llm import get_model_registry
+from backend.src.llm.registry import DEFAULT_CHAT_MODEL
 from backend.src.observability import get_logger
+from backend.src.observability.metrics import CHAT_TTFT
+from backend.src.response_cache import get_response_cache
+from backend.src.routing import route_turn, routed_model
+from backend.src.singleflight import SingleFlight, fingerprint
 
 # Load environment variables from root .env
 load_dotenv()
 
 logger = get_logger(__name__)
 
+# Compiled chatbot graphs kept per (chat model, checkpointer)
+GRAPH_CACHE_SIZE = int(os.getenv("GRAPH_CACHE_SIZE", "8"))
+
 
 class ChatState(TypedDict):
     """State container for the chatbot.
 
     The messages field uses add_messages reducer to automatically
     append new messages rather than replacing the entire list.
-    """
 
-    messages: Annotated[list[BaseMessage], add_messages]
+    summary, summary_start and context_start are set by the context stage:
+    when the history exceeds the token budget, summary covers
+    messages[:summary_start] (after any leading system messages), and the
+    model prompt is summary followed by messages[context_start:].
+    context_start is past summary_start while a summary of the turns in
+    between is generated in the background.
 
+    route is set by the route stage: "fast" sends the turn to the low-latency
+    model (see backend.src.routing).
+    """
 
-# Create LLM instance at module level for reuse
-_chat_llm = ChatVertexAI(
-    model="gemini-2.5-flash",
-    project=os.getenv("GOOGLE_CLOUD_PROJECT", "knowsee-platform-development"),
-    location=os.getenv("GOOGLE_CLOUD_LOCATION", "europe-west2"),
-    temperature=0.7,
-    streaming=True,  # Explicitly enable streaming
-)
+    messages: Annotated[list[BaseMessage], add_messages]
+    summary: NotRequired[str | None]
+    summary_start: NotRequired[int]
+    context_start: NotRequired[int]
+    route: NotRequired[str]
 
 
-def create_chatbot_graph() -> CompiledStateGraph:
+def create_chatbot_graph(
+    checkpointer: Any | None = None, model_id: str = DEFAULT_CHAT_MODEL
+) -> CompiledStateGraph:
     """Create and compile the chatbot graph.
 
+    Args:
+        checkpointer: Optional LangGraph checkpointer. When set, each thread id
+            (chat id) keeps its message history server-side between calls.
+        model_id: Chat model id in the model registry.
+
     Returns:
         Compiled LangGraph application ready for invocation.
     """
 
-    async def chatbot_node(state: ChatState) -> ChatState:
+    async def context_node(state: ChatState, config: RunnableConfig) -> dict[str, Any]:
+        """Fit the history into the token budget (see backend.src.context).
+
+        Args:
+            state: Current conversation state with message history.
+            config: Run config; the thread id (chat id) keys cached summaries.
+
+        Returns:
+            Partial state update with the summary, where it ends and where
+            verbatim turns start.
+        """
+        chat_id = config.get("configurable", {}).get("thread_id")
+        summary, start, summary_start = await fit_context(
+            state["messages"],
+            summarize_messages,
+            chat_id,
+            stored_summary=state.get("summary"),
+            stored_start=state.get("summary_start", 0),
+        )
+        return {"summary": summary, "summary_start": summary_start, "context_start": start}
+
+    async def route_node(state: ChatState, config: RunnableConfig) -> dict[str, Any]:
+        """Classify the turn with local heuristics (see backend.src.routing).
+
+        A request that asked for a latency tier is not routed.
+
+        Args:
+            state: Current conversation state with message history.
+            config: Run config; configurable latency_tier is the requested tier.
+
+        Returns:
+            Partial state update with the route for this turn.
+        """
+        if config.get("configurable", {}).get("latency_tier"):
+            return {"route": "default"}
+        return {"route": route_turn(state["messages"], model_id)}
+
+    async def chatbot_node(state: ChatState, config: RunnableConfig) -> dict[str, Any]:
         """Process messages and generate a response.
 
-        Uses async invocation to allow LangGraph's astream_events()
-        to intercept and stream tokens properly.
+        Uses async streaming to allow LangGraph's astream_events() to
+        intercept and stream tokens properly, and to time the first token.
 
         Args:
             state: Current conversation state with message history.
+            config: Run config; configurable latency_tier overrides the model's tier.
 
         Returns:
             Partial state update containing the new AI message.
         """
-        response = await _chat_llm.ainvoke(state["messages"])
-        return {"messages": [response]}
+        prompt = build_prompt(
+            state["messages"],
+            state.get("summary"),
+            state.get("context_start", state.get("summary_start", 0)),
+        )
+        route = state.get("route", "default")
+        registry = get_model_registry()
+        role = routed_model(model_id, route)
+        tier = registry.tier(role, config.get("configurable", {}).get("latency_tier"))
+        llm = registry.get(role, tier)
+
+        start_time = time.perf_counter()
+        response: AIMessageChunk | None = None
+        async for chunk in llm.astream(prompt):
+            if response is None or not response.content:
+                if chunk.content:
+                    CHAT_TTFT.labels(model=model_id, route=route, tier=tier).observe(
+                        time.perf_counter() - start_time
+                    )
+            response = chunk if response is None else response + chunk
+        if response is None:
+            raise ValueError("No response generated")
+        return {"messages": [message_chunk_to_message(response)]}
 
     # Build the graph
     graph_builder = StateGraph(ChatState)
+    graph_builder.add_node("context", context_node)
+    graph_builder.add_node("route", route_node)
     graph_builder.add_node("chatbot", chatbot_node)
-    graph_builder.add_edge(START, "chatbot")
+    graph_builder.add_edge(START, "context")
+    graph_builder.add_edge("context", "route")
+    graph_builder.add_edge("route", "chatbot")
     graph_builder.add_edge("chatbot", END)
 
-    return graph_builder.compile()
+    return graph_builder.compile(checkpointer=checkpointer)
 
 
-# Pre-compiled graph instance for reuse
-chatbot_graph = create_chatbot_graph()
+@lru_cache(maxsize=GRAPH_CACHE_SIZE)
+def _compiled_graph(model_id: str, checkpointer: Any | None) -> CompiledStateGraph:
+    """Compile a chatbot graph once per (model, checkpointer), with LRU eviction."""
+    return create_chatbot_graph(checkpointer=checkpointer, model_id=model_id)
 
 
-# Title generation LLM (lighter config, lower temperature for consistency)
-# Note: Gemini 2.5 Flash uses "thinking" tokens internally, so max_output_tokens
-# must be high enough to cover both thinking overhead (~50-100) and actual output.
-_title_llm = ChatVertexAI(
-    model="gemini-2.5-flash",
-    project=os.getenv("GOOGLE_CLOUD_PROJECT", "knowsee-platform-development"),
-    location=os.getenv("GOOGLE_CLOUD_LOCATION", "europe-west2"),
-    temperature=0.3,
-    max_output_tokens=256,
-)
+# Pre-compiled graph instance for reuse (default chat model, no checkpointer)
+chatbot_graph = _compiled_graph(DEFAULT_CHAT_MODEL, None)
+
+# Application checkpointer (see configure_checkpointer)
+_checkpointer: Any | None = None
+
+
+def configure_checkpointer(checkpointer: Any | None) -> None:
+    """Enable checkpointed chatbot graphs, or disable them when None.
+
+    Called from the application lifespan with the saver opened by
+    backend.src.db.checkpointer.open_checkpointer().
+    """
+    global _checkpointer
+    _checkpointer = checkpointer
+
+
+def get_chat_graph(model_id: str = DEFAULT_CHAT_MODEL) -> CompiledStateGraph:
+    """Get the stateless chatbot graph for a chat model."""
+    return _compiled_graph(model_id, None)
+
+
+def get_checkpointed_graph(model_id: str = DEFAULT_CHAT_MODEL) -> CompiledStateGraph | None:
+    """Get the checkpointed chatbot graph for a chat model.
+
+    Graphs for every model share the checkpointer, so a chat keeps its history
+    when the user switches model.
+
+    Returns:
+        The compiled graph, or None if server-side state is disabled.
+    """
+    if _checkpointer is None:
+        return None
+    return _compiled_graph(model_id, _checkpointer)
+
+
+async def delete_chat_threads(chat_ids: Iterable[str]) -> None:
+    """Delete the checkpointed threads of deleted chats (a no-op without a checkpointer).
+
+    Failures are logged rather than raised: the chats are already gone, and an
+    orphaned thread is never read again.
+    """
+    if _checkpointer is None:
+        return
+    for chat_id in chat_ids:
+        try:
+            await _checkpointer.adelete_thread(chat_id)
+        except Exception as e:
+            logger.warning("Failed to delete chat thread", chat_id=chat_id, error=str(e))
+
+
+SUMMARY_PROMPT = """Summarise the earlier part of a conversation between a user and an assistant.
+Keep facts, decisions, names, numbers and open questions; drop pleasantries.
+Write at most 200 words.
+
+Previous summary (may be empty):
+{summary}
+
+Conversation to fold in:
+{conversation}"""
+
+# Concurrent identical LLM calls share one in-flight call (see backend.src.singleflight)
+_reply_calls: SingleFlight[str] = SingleFlight("chat")
+_title_calls: SingleFlight[str] = SingleFlight("title")
+_summary_calls: SingleFlight[str] = SingleFlight("summary")
 
 TITLE_PROMPT = """Generate a short, concise title (max 6 words) for this chat.
 Return ONLY the title, no quotes or punctuation at the end.
@@ -94,21 +247,111 @@ Return ONLY the title, no quotes or punctuation at the end.
 Message: {message}"""
 
 
-async def generate_title(message: str) -> str:
+async def summarize_messages(summary: str | None, messages: list[BaseMessage]) -> str:
+    """Fold messages into a rolling conversation summary.
+
+    Args:
+        summary: The previous summary, if any.
+        messages: Messages to add to the summary.
+
+    Returns:
+        The updated summary.
+    """
+    conversation = "\n".join(f"{message.type}: {message.content}" for message in messages)
+    prompt = SUMMARY_PROMPT.format(summary=summary or "", conversation=conversation)
+
+    async def call_llm() -> str:
+        response = await get_model_registry().get("summary").ainvoke(prompt)
+        content = response.content
+        return (content if isinstance(content, str) else str(content)).strip()
+
+    return await _summary_calls.do(fingerprint(prompt), call_llm)
+
+
+async def generate_reply(message: str, use_cache: bool = True) -> str:
+    """Answer a single message without history (the non-streaming /chat endpoint).
+
+    Answers are served from the response cache when the same message was
+    answered recently (see backend.src.response_cache), and concurrent
+    identical requests share one LLM call.
+
+    Args:
+        message: The user's message.
+        use_cache: Whether the response cache may be used.
+
+    Returns:
+        The assistant's reply text.
+
+    Raises:
+        RateLimitError: If the LLM concurrency governor is saturated.
+        ValueError: If the graph produced no AI message.
+    """
+    # Key the cache on the model the graph will route this message to
+    route = route_turn([HumanMessage(content=message)], DEFAULT_CHAT_MODEL, record=False)
+    chat_llm = get_model_registry().model(routed_model(DEFAULT_CHAT_MODEL, route))
+
+    async def call_llm() -> str:
+        async with get_llm_governor().slot("chat"):
+            result = await chatbot_graph.ainvoke({"messages": [HumanMessage(content=message)]})
+        ai_messages = [msg for msg in result["messages"] if isinstance(msg, AIMessage)]
+        if not ai_messages:
+            raise ValueError("No response generated")
+
+        # Handle content which can be str or list
+        content = ai_messages[-1].content
+        return content if isinstance(content, str) else str(content)
+
+    return await get_response_cache().get_or_compute(
+        "chat",
+        message,
+        model=chat_llm.model_name,
+        temperature=chat_llm.temperature,
+        compute=lambda: _reply_calls.do(
+            fingerprint(chat_llm.model_name, chat_llm.temperature, message), call_llm
+        ),
+        bypass=not use_cache,
+    )
+
+
+async def generate_title(message: str, use_cache: bool = True) -> str:
     """Generate a chat title from the first user message.
 
+    Titles are served from the response cache when the same message was
+    titled recently (see backend.src.response_cache), and concurrent
+    identical requests share one LLM call.
+
     Args:
         message: The user's first message in the chat.
+        use_cache: Whether the response cache may be used.
 
     Returns:
         A short title string (max ~6 words).
     """
-    try:
-        response = await _title_llm.ainvoke(TITLE_PROMPT.format(message=message))
+    title_llm = get_model_registry().model("title")
+
+    async def call_llm() -> str:
+        async with get_llm_governor().slot("title"):
+            response = (
+                await get_model_registry()
+                .get("title")
+                .ainvoke(TITLE_PROMPT.format(message=message))
+            )
         title = response.content if isinstance(response.content, str) else str(response.content)
         # Clean up and truncate
         title = title.strip().strip('"').strip("'")
         return title[:80] if len(title) > 80 else title
+
+    try:
+        return await get_response_cache().get_or_compute(
+            "title",
+            message,
+            model=title_llm.model_name,
+            temperature=title_llm.temperature,
+            compute=lambda: _title_calls.do(
+                fingerprint(title_llm.model_name, title_llm.temperature, message), call_llm
+            ),
+            bypass=not use_cache,
+        )
     except Exception as e:
         logger.warning("Title generation failed, using fallback", error=str(e))
         # Fallback: use first 50 chars of message
@@ -0,0 +1,22 @@
+"""Chat model providers for Knowsee Platform.
+
+Selects the LLM backend by environment variable, including a deterministic
+fake model for load tests and offline development.
+"""
+
+from backend.src.llm.fake import FakeStreamingChatModel
+from backend.src.llm.hedge import HedgedChatModel
+from backend.src.llm.providers import CHAT_MODEL_PROVIDER, create_chat_model
+from backend.src.llm.registry import ModelRegistry, get_model_registry
+from backend.src.llm.tiers import LATENCY_TIERS, LatencyTier
+
+__all__ = [
+    "CHAT_MODEL_PROVIDER",
+    "FakeStreamingChatModel",
+    "HedgedChatModel",
+    "LATENCY_TIERS",
+    "LatencyTier",
+    "ModelRegistry",
+    "create_chat_model",
+    "get_model_registry",
+]
@@ -0,0 +1,196 @@
+"""Deterministic fake chat model for offline load and latency testing.
+
+Streams a deterministic sequence of word tokens with configurable
+time-to-first-token, inter-token latency distribution, output length, usage
+metadata, injected error rate and request timeout. Randomness is seeded from the prompt, so a
+given prompt always produces the same text, latencies and failures
+regardless of how many calls run concurrently.
+"""
+
+import asyncio
+import hashlib
+import random
+import time
+from collections.abc import AsyncIterator, Iterator
+from typing import Any
+
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.messages.ai import UsageMetadata
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from backend.src.observability.exceptions import LLMError
+
+_WORDS = (
+    "the quick brown fox jumps over a lazy dog while knowsee streams "
+    "answers token by token to measure overhead"
+).split()
+
+
+class FakeStreamingChatModel(BaseChatModel):
+    """Chat model that streams deterministic text with simulated latency.
+
+    Usage:
+        llm = FakeStreamingChatModel(ttft_ms=300, itl_ms=15, output_tokens=200)
+        async for chunk in llm.astream("Hi"):
+            ...
+    """
+
+    model_name: str = "fake"
+    temperature: float = 0.0
+    # Delay before the first token
+    ttft_ms: float = 200.0
+    # Mean delay between tokens, and how it varies: constant, uniform, exponential
+    itl_ms: float = 20.0
+    itl_distribution: str = "constant"
+    # Relative spread for the uniform distribution (0.5 = +/-50%)
+    itl_jitter: float = 0.5
+    output_tokens: int = 100
+    max_output_tokens: int | None = None
+    # Probability that a call fails before producing any token
+    error_rate: float = 0.0
+    seed: int = 0
+    # Request deadline in seconds, like the provider's timeout; None waits forever
+    timeout: float | None = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-streaming"
+
+    @property
+    def _identifying_params(self) -> dict[str, Any]:
+        return {"model_name": self.model_name, "seed": self.seed}
+
+    def _plan(self, messages: list[BaseMessage]) -> tuple[random.Random, list[str], UsageMetadata]:
+        """Derive the RNG, output tokens and usage for a prompt."""
+        prompt = "\n".join(str(m.content) for m in messages)
+        digest = hashlib.sha256(f"{self.seed}:{prompt}".encode()).digest()
+        rng = random.Random(int.from_bytes(digest[:8], "big"))
+
+        if rng.random() < self.error_rate:
+            raise LLMError("Injected fake LLM failure", details={"model": self.model_name})
+
+        count = self.output_tokens
+        if self.max_output_tokens is not None:
+            count = min(count, self.max_output_tokens)
+        offset = rng.randrange(len(_WORDS))
+        tokens = [
+            ("" if i == 0 else " ") + _WORDS[(offset + i) % len(_WORDS)] for i in range(count)
+        ]
+        input_tokens = max(len(prompt) // 4, 1)
+        usage = UsageMetadata(
+            input_tokens=input_tokens,
+            output_tokens=count,
+            total_tokens=input_tokens + count,
+        )
+        return rng, tokens, usage
+
+    def _delay(self, rng: random.Random, index: int) -> float:
+        """Seconds to wait before emitting token `index`."""
+        if index == 0:
+            return self.ttft_ms / 1000
+        if self.itl_distribution == "exponential":
+            return rng.expovariate(1000 / self.itl_ms) if self.itl_ms > 0 else 0.0
+        if self.itl_distribution == "uniform":
+            spread = self.itl_ms * self.itl_jitter
+            return max(rng.uniform(self.itl_ms - spread, self.itl_ms + spread), 0.0) / 1000
+        return self.itl_ms / 1000
+
+    def _deadline(self, elapsed: float, delay: float) -> float | None:
+        """Seconds left before the timeout, if waiting `delay` more would exceed it."""
+        if self.timeout is not None and elapsed + delay > self.timeout:
+            return max(self.timeout - elapsed, 0.0)
+        return None
+
+    def _timeout_error(self) -> LLMError:
+        return LLMError(
+            "Fake LLM request timed out",
+            details={"model": self.model_name, "timeout": self.timeout},
+        )
+
+    def _chunks(
+        self, tokens: list[str], usage: UsageMetadata
+    ) -> Iterator[tuple[int, ChatGenerationChunk]]:
+        for index, token in enumerate(tokens):
+            last = index == len(tokens) - 1
+            chunk = AIMessageChunk(content=token, usage_metadata=usage if last else None)
+            yield index, ChatGenerationChunk(message=chunk)
+
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: CallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        rng, tokens, usage = self._plan(messages)
+        total = sum(self._delay(rng, i) for i in range(len(tokens)))
+        remaining = self._deadline(0.0, total)
+        time.sleep(total if remaining is None else remaining)
+        if remaining is not None:
+            raise self._timeout_error()
+        message = AIMessage(content="".join(tokens), usage_metadata=usage)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: AsyncCallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        rng, tokens, usage = self._plan(messages)
+        total = sum(self._delay(rng, i) for i in range(len(tokens)))
+        remaining = self._deadline(0.0, total)
+        await asyncio.sleep(total if remaining is None else remaining)
+        if remaining is not None:
+            raise self._timeout_error()
+        message = AIMessage(content="".join(tokens), usage_metadata=usage)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: CallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        rng, tokens, usage = self._plan(messages)
+        elapsed = 0.0
+        for index, chunk in self._chunks(tokens, usage):
+            delay = self._delay(rng, index)
+            remaining = self._deadline(elapsed, delay)
+            if remaining is not None:
+                time.sleep(remaining)
+                raise self._timeout_error()
+            time.sleep(delay)
+            elapsed += delay
+            if run_manager:
+                run_manager.on_llm_new_token(str(chunk.message.content), chunk=chunk)
+            yield chunk
+
+    async def _astream(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: AsyncCallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        rng, tokens, usage = self._plan(messages)
+        elapsed = 0.0
+        for index, chunk in self._chunks(tokens, usage):
+            delay = self._delay(rng, index)
+            remaining = self._deadline(elapsed, delay)
+            if remaining is not None:
+                await asyncio.sleep(remaining)
+                raise self._timeout_error()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            elapsed += delay
+            if run_manager:
+                await run_manager.on_llm_new_token(str(chunk.message.content), chunk=chunk)
+            yield chunk
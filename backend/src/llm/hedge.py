@@ -0,0 +1,270 @@
+"""Hedged requests across several chat model endpoints.
+
+A HedgedChatModel streams from the endpoint with the lowest time-to-first-
+token EWMA. If no token has arrived within that endpoint's recent p95 TTFT,
+a second request is sent to the next endpoint (another region or model), and
+the first stream to produce a token wins; the other is cancelled. An endpoint
+that fails before its first token fails over to the next one immediately.
+
+Only the wait for the first token is hedged: once a stream has produced a
+token, it is used to the end.
+"""
+
+import asyncio
+import contextlib
+import math
+import os
+import time
+from collections import deque
+from collections.abc import AsyncIterator
+from typing import Any
+
+from langchain_core.callbacks import (
+    AsyncCallbackManager,
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.language_models.chat_models import BaseChatModel, agenerate_from_stream
+from langchain_core.messages import BaseMessage, BaseMessageChunk
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
+from langchain_core.runnables import RunnableConfig
+from langgraph.constants import TAG_NOSTREAM
+from pydantic import PrivateAttr
+
+from backend.src.observability import get_logger
+from backend.src.observability.metrics import LLM_ENDPOINT_TTFT, LLM_HEDGE_EVENTS
+
+logger = get_logger(__name__)
+
+# Configuration from environment
+LLM_HEDGE_QUANTILE = float(os.getenv("LLM_HEDGE_QUANTILE", "0.95"))
+LLM_HEDGE_MIN_DELAY_MS = float(os.getenv("LLM_HEDGE_MIN_DELAY_MS", "100"))
+LLM_HEDGE_MAX_DELAY_MS = float(os.getenv("LLM_HEDGE_MAX_DELAY_MS", "5000"))
+# Hedge delay until an endpoint has LLM_HEDGE_MIN_SAMPLES TTFT samples
+LLM_HEDGE_DEFAULT_DELAY_MS = float(os.getenv("LLM_HEDGE_DEFAULT_DELAY_MS", "2000"))
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+LLM_HEDGE_WINDOW = int(os.getenv("LLM_HEDGE_WINDOW", "200"))
+LLM_HEDGE_EWMA_ALPHA = float(os.getenv("LLM_HEDGE_EWMA_ALPHA", "0.2"))
+
+
+class EndpointStats:
+    """Time-to-first-token EWMA and a window of recent samples for one endpoint."""
+
+    def __init__(self, window: int, alpha: float) -> None:
+        self.alpha = alpha
+        self.ewma: float | None = None
+        self.samples: deque[float] = deque(maxlen=window)
+
+    def _update(self, seconds: float) -> None:
+        self.ewma = seconds if self.ewma is None else self.ewma + self.alpha * (seconds - self.ewma)
+
+    def observe(self, seconds: float) -> None:
+        """Record a measured time to first token."""
+        self._update(seconds)
+        self.samples.append(seconds)
+
+    def censor(self, seconds: float) -> None:
+        """Record a cancelled request that had no token after `seconds`.
+
+        Its TTFT is only known to exceed `seconds`, so it can raise the EWMA
+        but is kept out of the quantile window.
+        """
+        if self.ewma is None or seconds > self.ewma:
+            self._update(seconds)
+
+    def quantile(self, q: float, min_samples: int) -> float | None:
+        """The q-quantile of recent samples, or None with too few samples."""
+        if len(self.samples) < max(min_samples, 1):
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(math.ceil(q * len(ordered)) - 1, len(ordered) - 1)]
+
+
+class HedgedChatModel(BaseChatModel):
+    """Chat model that hedges and fails over across several endpoints.
+
+    Usage:
+        llm = HedgedChatModel(
+            endpoints=[primary, secondary],
+            endpoint_names=["europe-west2", "europe-west1"],
+        )
+    """
+
+    endpoints: list[BaseChatModel]
+    endpoint_names: list[str]
+    model_name: str = ""
+    temperature: float = 0.0
+    hedge_quantile: float = LLM_HEDGE_QUANTILE
+    min_delay_ms: float = LLM_HEDGE_MIN_DELAY_MS
+    max_delay_ms: float = LLM_HEDGE_MAX_DELAY_MS
+    default_delay_ms: float = LLM_HEDGE_DEFAULT_DELAY_MS
+    min_samples: int = LLM_HEDGE_MIN_SAMPLES
+    window: int = LLM_HEDGE_WINDOW
+    ewma_alpha: float = LLM_HEDGE_EWMA_ALPHA
+
+    _stats: list[EndpointStats] = PrivateAttr(default_factory=list)
+
+    def model_post_init(self, context: Any) -> None:
+        super().model_post_init(context)
+        if len(self.endpoint_names) != len(self.endpoints):
+            raise ValueError("endpoint_names must name every endpoint")
+        self._stats = [EndpointStats(self.window, self.ewma_alpha) for _ in self.endpoints]
+
+    @property
+    def _llm_type(self) -> str:
+        return "hedged"
+
+    @property
+    def stats(self) -> dict[str, EndpointStats]:
+        """TTFT statistics by endpoint name."""
+        return dict(zip(self.endpoint_names, self._stats, strict=True))
+
+    def ranked(self) -> list[int]:
+        """Endpoint indexes, fastest TTFT EWMA first; unmeasured ones keep config order."""
+        return sorted(
+            range(len(self.endpoints)),
+            key=lambda i: (self._stats[i].ewma is None, self._stats[i].ewma or 0.0, i),
+        )
+
+    def hedge_delay(self, index: int) -> float:
+        """Seconds to wait for a first token from endpoint `index` before hedging."""
+        quantile = self._stats[index].quantile(self.hedge_quantile, self.min_samples)
+        delay_ms = self.default_delay_ms if quantile is None else quantile * 1000
+        return min(max(delay_ms, self.min_delay_ms), self.max_delay_ms) / 1000
+
+    async def _first_token(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None,
+        config: RunnableConfig,
+        **kwargs: Any,
+    ) -> tuple[int, float, BaseMessageChunk | None, AsyncIterator[BaseMessageChunk]]:
+        """Race endpoints until one produces a token.
+
+        Returns:
+            (endpoint index, TTFT seconds, first chunk or None if the stream
+            was empty, the winning stream to read the rest from).
+        """
+        remaining = self.ranked()
+        primary = remaining[0]
+        pending: dict[asyncio.Future, tuple[int, AsyncIterator[BaseMessageChunk], float]] = {}
+
+        def launch(event: str | None = None) -> None:
+            index = remaining.pop(0)
+            stream = aiter(
+                self.endpoints[index].astream(messages, stop=stop, config=config, **kwargs)
+            )
+            pending[asyncio.ensure_future(anext(stream))] = (index, stream, time.perf_counter())
+            if event:
+                LLM_HEDGE_EVENTS.labels(endpoint=self.endpoint_names[index], event=event).inc()
+
+        error: BaseException | None = None
+        launch()
+        try:
+            while pending:
+                timeout = self.hedge_delay(primary) if remaining else None
+                done, _ = await asyncio.wait(
+                    pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    launch("hedged")
+                    continue
+                for task in done:
+                    index, stream, started = pending.pop(task)
+                    exc = task.exception()
+                    if exc is None or isinstance(exc, StopAsyncIteration):
+                        chunk = None if exc is not None else task.result()
+                        return index, time.perf_counter() - started, chunk, stream
+                    error = exc
+                    logger.warning(
+                        "LLM endpoint failed before first token",
+                        endpoint=self.endpoint_names[index],
+                        error=str(exc),
+                    )
+                    with contextlib.suppress(Exception):
+                        await stream.aclose()
+                    if remaining:
+                        launch("failover")
+            assert error is not None
+            raise error
+        finally:
+            # Cancel the losers (or everything, if we were cancelled ourselves)
+            now = time.perf_counter()
+            for task, (index, stream, started) in pending.items():
+                task.cancel()
+                self._stats[index].censor(now - started)
+                LLM_HEDGE_EVENTS.labels(
+                    endpoint=self.endpoint_names[index], event="cancelled"
+                ).inc()
+            await asyncio.gather(*pending, return_exceptions=True)
+            for _, stream, _ in pending.values():
+                with contextlib.suppress(Exception):
+                    await stream.aclose()
+
+    async def _astream(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: AsyncCallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        # Endpoint runs are traced as children but tagged nostream: the graph
+        # streams this model's tokens, not each endpoint's
+        callbacks = None
+        if run_manager:
+            callbacks = AsyncCallbackManager(
+                handlers=run_manager.inheritable_handlers,
+                inheritable_handlers=run_manager.inheritable_handlers,
+                parent_run_id=run_manager.run_id,
+                tags=run_manager.inheritable_tags,
+                inheritable_tags=run_manager.inheritable_tags,
+                metadata=run_manager.inheritable_metadata,
+                inheritable_metadata=run_manager.inheritable_metadata,
+            )
+        config: RunnableConfig = {"callbacks": callbacks, "tags": [TAG_NOSTREAM]}
+        primary = self.ranked()[0]
+        index, ttft, first, stream = await self._first_token(messages, stop, config, **kwargs)
+
+        name = self.endpoint_names[index]
+        self._stats[index].observe(ttft)
+        LLM_ENDPOINT_TTFT.labels(endpoint=name).observe(ttft)
+        if index != primary:
+            LLM_HEDGE_EVENTS.labels(endpoint=name, event="won").inc()
+
+        try:
+            if first is None:
+                return
+            yield await self._relay(first, run_manager)
+            async for chunk in stream:
+                yield await self._relay(chunk, run_manager)
+        finally:
+            await stream.aclose()
+
+    @staticmethod
+    async def _relay(
+        chunk: BaseMessageChunk, run_manager: AsyncCallbackManagerForLLMRun | None
+    ) -> ChatGenerationChunk:
+        generation = ChatGenerationChunk(message=chunk)
+        if run_manager:
+            await run_manager.on_llm_new_token(str(chunk.content), chunk=generation)
+        return generation
+
+    async def _agenerate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: AsyncCallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        return await agenerate_from_stream(self._astream(messages, stop, run_manager, **kwargs))
+
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: CallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        # Hedging needs an event loop; sync callers use the fastest endpoint
+        primary = self.endpoints[self.ranked()[0]]
+        return primary._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
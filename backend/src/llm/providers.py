@@ -0,0 +1,156 @@
+"""Chat model provider selection.
+
+CHAT_MODEL_PROVIDER picks the backend for every chat model in graph.py:
+- vertex: Gemini on Vertex AI (default)
+- fake: FakeStreamingChatModel, a deterministic local model with simulated
+  latency, for load tests and offline development (see backend.src.llm.fake)
+
+With LLM_HEDGE_ENDPOINTS set, the streaming chat model hedges slow first
+tokens and fails over across extra Vertex AI regions or models (see
+backend.src.llm.hedge).
+"""
+
+import asyncio
+import os
+from typing import Any
+
+from dotenv import load_dotenv
+from langchain_core.language_models.chat_models import BaseChatModel
+
+from backend.src.llm.fake import FakeStreamingChatModel
+from backend.src.llm.hedge import HedgedChatModel
+
+# Load environment variables from root .env
+load_dotenv()
+
+# Configuration from environment
+CHAT_MODEL_PROVIDER = os.getenv("CHAT_MODEL_PROVIDER", "vertex")
+VERTEX_CHAT_MODEL = os.getenv("VERTEX_CHAT_MODEL", "gemini-2.5-flash")
+VERTEX_REASONING_MODEL = os.getenv("VERTEX_REASONING_MODEL", "gemini-2.5-pro")
+# Model for trivial turns (see backend.src.routing); it runs at the interactive tier
+VERTEX_FAST_MODEL = os.getenv("VERTEX_FAST_MODEL", VERTEX_CHAT_MODEL)
+GOOGLE_CLOUD_LOCATION = os.getenv("GOOGLE_CLOUD_LOCATION", "europe-west2")
+# Extra endpoints for hedged chat calls, as "<location>" or "<location>/<model>"
+LLM_HEDGE_ENDPOINTS = [
+    e.strip() for e in os.getenv("LLM_HEDGE_ENDPOINTS", "").split(",") if e.strip()
+]
+# Fake provider behaviour
+FAKE_LLM_TTFT_MS = float(os.getenv("FAKE_LLM_TTFT_MS", "200"))
+FAKE_LLM_ITL_MS = float(os.getenv("FAKE_LLM_ITL_MS", "20"))
+FAKE_LLM_ITL_DISTRIBUTION = os.getenv("FAKE_LLM_ITL_DISTRIBUTION", "constant")
+FAKE_LLM_ITL_JITTER = float(os.getenv("FAKE_LLM_ITL_JITTER", "0.5"))
+FAKE_LLM_OUTPUT_TOKENS = int(os.getenv("FAKE_LLM_OUTPUT_TOKENS", "100"))
+FAKE_LLM_ERROR_RATE = float(os.getenv("FAKE_LLM_ERROR_RATE", "0"))
+FAKE_LLM_SEED = int(os.getenv("FAKE_LLM_SEED", "0"))
+
+PROVIDERS = ("vertex", "fake")
+
+
+def create_chat_model(
+    temperature: float,
+    model: str | None = None,
+    max_output_tokens: int | None = None,
+    streaming: bool = False,
+    provider: str | None = None,
+    hedge: bool = False,
+    thinking_budget: int | None = None,
+    timeout: float | None = None,
+    **kwargs: Any,
+) -> BaseChatModel:
+    """Create a chat model from the configured provider.
+
+    Args:
+        temperature: Sampling temperature.
+        model: Provider model name (defaults to VERTEX_CHAT_MODEL).
+        max_output_tokens: Optional cap on generated tokens.
+        streaming: Whether to request streaming from the provider.
+        provider: Override for CHAT_MODEL_PROVIDER.
+        hedge: Hedge across LLM_HEDGE_ENDPOINTS (Vertex AI only).
+        thinking_budget: Gemini thinking token budget; None uses the model
+            default and 0 disables thinking (Vertex AI only).
+        timeout: Request timeout in seconds; None uses the provider default.
+        **kwargs: Extra provider-specific arguments.
+
+    Returns:
+        A LangChain chat model exposing model_name and temperature.
+
+    Raises:
+        ValueError: If the provider is unknown.
+    """
+    provider = provider or CHAT_MODEL_PROVIDER
+
+    if provider == "vertex":
+        from langchain_google_vertexai import ChatVertexAI
+
+        model = model or VERTEX_CHAT_MODEL
+        endpoints = [(GOOGLE_CLOUD_LOCATION, model)]
+        if hedge:
+            for endpoint in LLM_HEDGE_ENDPOINTS:
+                location, _, endpoint_model = endpoint.partition("/")
+                endpoints.append((location, endpoint_model or model))
+        if thinking_budget is not None:
+            kwargs["thinking_budget"] = thinking_budget
+        if timeout is not None:
+            kwargs["timeout"] = timeout
+
+        models = [
+            ChatVertexAI(
+                model=endpoint_model,
+                project=os.getenv("GOOGLE_CLOUD_PROJECT", "knowsee-platform-development"),
+                location=location,
+                temperature=temperature,
+                max_output_tokens=max_output_tokens,
+                streaming=streaming,
+                **kwargs,
+            )
+            for location, endpoint_model in endpoints
+        ]
+        if len(models) == 1:
+            return models[0]
+        return HedgedChatModel(
+            endpoints=models,
+            endpoint_names=[f"{location}/{name}" for location, name in endpoints],
+            model_name=model,
+            temperature=temperature,
+        )
+
+    if provider == "fake":
+        return FakeStreamingChatModel(
+            model_name=f"fake-{model}" if model else "fake",
+            temperature=temperature,
+            max_output_tokens=max_output_tokens,
+            ttft_ms=FAKE_LLM_TTFT_MS,
+            itl_ms=FAKE_LLM_ITL_MS,
+            itl_distribution=FAKE_LLM_ITL_DISTRIBUTION,
+            itl_jitter=FAKE_LLM_ITL_JITTER,
+            output_tokens=FAKE_LLM_OUTPUT_TOKENS,
+            error_rate=FAKE_LLM_ERROR_RATE,
+            seed=FAKE_LLM_SEED,
+            timeout=timeout,
+            **kwargs,
+        )
+
+    raise ValueError(f"Unknown CHAT_MODEL_PROVIDER {provider!r}; expected one of {PROVIDERS}")
+
+
+async def warm_up_model(model: BaseChatModel) -> None:
+    """Open a model's connections before the first request needs them.
+
+    For Vertex AI this fetches an auth token and opens the async gRPC
+    channel with a count-tokens call, which generates nothing and is not
+    billed. Other providers have nothing to warm.
+    """
+    if isinstance(model, HedgedChatModel):
+        await asyncio.gather(*(warm_up_model(endpoint) for endpoint in model.endpoints))
+        return
+
+    client = getattr(model, "async_prediction_client", None)
+    if client is not None:
+        full_model_name = model.full_model_name  # type: ignore[attr-defined]
+        await client.count_tokens(
+            {
+                "endpoint": full_model_name,
+                "model": full_model_name,
+                "contents": [{"role": "user", "parts": [{"text": "ping"}]}],
+            }
+        )
@@ -0,0 +1,218 @@
+"""Lazily constructed chat models, shared by the graph and the title endpoint.
+
+Models are keyed by id: the chat model ids the frontend sends as
+selectedChatModel, plus internal roles (title, summary). Each role runs at a
+latency tier (see backend.src.llm.tiers), and a caller may ask for another
+tier; one client is cached per (role, tier). Clients are created on first
+use instead of at import, so importing the graph does not pull in a
+provider SDK. The application lifespan calls warm_up() to construct every
+model and open its connections (credentials, TLS and gRPC channel) in the
+background before /health/ready reports ready.
+"""
+
+import asyncio
+import os
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.runnables import Runnable, RunnableBinding
+from langgraph.constants import TAG_NOSTREAM
+
+from backend.src.llm.providers import (
+    VERTEX_CHAT_MODEL,
+    VERTEX_FAST_MODEL,
+    VERTEX_REASONING_MODEL,
+    create_chat_model,
+    warm_up_model,
+)
+from backend.src.llm.tiers import (
+    LATENCY_TIERS,
+    thinking_budget_for,
+    tier_metadata,
+    with_tier_metrics,
+)
+from backend.src.observability import get_logger
+from backend.src.observability.exceptions import ValidationError
+from backend.src.observability.metrics import STARTUP_PHASE_DURATION
+
+logger = get_logger(__name__)
+
+# Configuration from environment
+MODEL_WARMUP_ENABLED = os.getenv("MODEL_WARMUP_ENABLED", "true").lower() == "true"
+MODEL_WARMUP_TIMEOUT_SECONDS = float(os.getenv("MODEL_WARMUP_TIMEOUT_SECONDS", "30"))
+
+
+@dataclass(frozen=True)
+class ModelSpec:
+    """How to build the model for one role."""
+
+    temperature: float
+    # Provider model name; None uses the provider default (VERTEX_CHAT_MODEL)
+    model: str | None = None
+    # Overrides the tier's max_output_tokens
+    max_output_tokens: int | None = None
+    streaming: bool = False
+    hedge: bool = False
+    # Default latency tier, and the surface its usage is reported under
+    tier: str = "standard"
+    surface: str = "chat"
+    tags: tuple[str, ...] = ()
+
+
+MODEL_SPECS: dict[str, ModelSpec] = {
+    # Streaming chat replies; hedged across LLM_HEDGE_ENDPOINTS, if set
+    "chat-model": ModelSpec(temperature=0.7, streaming=True, hedge=True),
+    "chat-model-reasoning": ModelSpec(
+        temperature=0.7, model=VERTEX_REASONING_MODEL, streaming=True, hedge=True, tier="deep"
+    ),
+    # Trivial turns routed away from chat-model (see backend.src.routing); not selectable
+    "chat-model-fast": ModelSpec(
+        temperature=0.7, model=VERTEX_FAST_MODEL, streaming=True, hedge=True, tier="interactive"
+    ),
+    # Title generation (lighter config, lower temperature for consistency).
+    # The interactive tier disables thinking; should its budget be raised,
+    # max_output_tokens must also cover the thinking overhead (~50-100).
+    "title": ModelSpec(temperature=0.3, max_output_tokens=256, tier="interactive", surface="title"),
+    # Summarisation for the context stage; tagged so its tokens never reach the chat stream
+    "summary": ModelSpec(
+        temperature=0.2, max_output_tokens=1024, surface="background", tags=(TAG_NOSTREAM,)
+    ),
+}
+
+# Ids a request may select as its chat model (StreamingChatRequest.selectedChatModel)
+CHAT_MODEL_IDS = ("chat-model", "chat-model-reasoning")
+DEFAULT_CHAT_MODEL = "chat-model"
+
+
+def resolve_chat_model(selected: str | None) -> str:
+    """Map a requested chat model id to a registry id.
+
+    Raises:
+        ValidationError: If the id is not a known chat model.
+    """
+    if not selected:
+        return DEFAULT_CHAT_MODEL
+    if selected not in CHAT_MODEL_IDS:
+        raise ValidationError(
+            f"Unknown chat model: {selected}", details={"available": list(CHAT_MODEL_IDS)}
+        )
+    return selected
+
+
+class ModelRegistry:
+    """Builds each role's chat model once, on first use or during warm-up."""
+
+    def __init__(self, specs: dict[str, ModelSpec] | None = None) -> None:
+        self.specs = MODEL_SPECS if specs is None else specs
+        self._models: dict[tuple[str, str], BaseChatModel] = {}
+        self._bound: dict[tuple[str, str], Runnable] = {}
+        self._overrides: dict[str, BaseChatModel] = {}
+        self.warmup_status = "pending"
+        self.warmup_error: str | None = None
+
+    def tier(self, role: str, tier: str | None = None) -> str:
+        """The latency tier a call on `role` runs at (the role's default if None)."""
+        return tier or self.specs[role].tier
+
+    def model(self, role: str, tier: str | None = None) -> BaseChatModel:
+        """The underlying chat model for a role (model_name, temperature, ...)."""
+        if role in self._overrides:
+            return self._overrides[role]
+        key = (role, self.tier(role, tier))
+        if key not in self._models:
+            spec, limits = self.specs[role], LATENCY_TIERS[key[1]]
+            self._models[key] = create_chat_model(
+                temperature=spec.temperature,
+                model=spec.model,
+                max_output_tokens=spec.max_output_tokens or limits.max_output_tokens,
+                streaming=spec.streaming,
+                hedge=spec.hedge,
+                thinking_budget=thinking_budget_for(limits, spec.model or VERTEX_CHAT_MODEL),
+                timeout=limits.timeout_seconds,
+            )
+        return self._models[key]
+
+    def get(self, role: str, tier: str | None = None) -> Runnable:
+        """The runnable to invoke for a role, with the role's tags and tier metrics."""
+        key = (role, self.tier(role, tier))
+        if key not in self._bound:
+            spec = self.specs[role]
+            self._bound[key] = RunnableBinding(
+                bound=self.model(*key),
+                config={"tags": list(spec.tags), "metadata": tier_metadata(spec.surface, key[1])},
+                config_factories=[with_tier_metrics],
+            )
+        return self._bound[key]
+
+    @contextmanager
+    def override(self, role: str, model: BaseChatModel) -> Iterator[None]:
+        """Use `model` for a role, at every tier, within the block (for tests and benchmarks)."""
+        previous = self._overrides.get(role)
+        self._overrides[role] = model
+        self._drop_bound(role)
+        try:
+            yield
+        finally:
+            if previous is None:
+                self._overrides.pop(role, None)
+            else:
+                self._overrides[role] = previous
+            self._drop_bound(role)
+
+    def _drop_bound(self, role: str) -> None:
+        for key in [key for key in self._bound if key[0] == role]:
+            del self._bound[key]
+
+    @property
+    def ready(self) -> bool:
+        """Whether warm-up has finished (successfully or not) or was skipped."""
+        return self.warmup_status != "pending"
+
+    async def warm_up(self, timeout: float | None = None) -> None:
+        """Construct every model and open its connections.
+
+        A failed or timed-out warm-up is logged and recorded, not raised: the
+        first request will retry connecting lazily.
+        """
+        start_time = time.perf_counter()
+        try:
+            # Constructing a model imports its SDK and may read credentials from disk
+            for role in self.specs:
+                await asyncio.to_thread(self.model, role)
+            STARTUP_PHASE_DURATION.labels(phase="models").set(time.perf_counter() - start_time)
+
+            connect_start = time.perf_counter()
+            await asyncio.wait_for(
+                asyncio.gather(*(warm_up_model(self.model(role)) for role in self.specs)),
+                MODEL_WARMUP_TIMEOUT_SECONDS if timeout is None else timeout,
+            )
+            STARTUP_PHASE_DURATION.labels(phase="connect").set(time.perf_counter() - connect_start)
+            self.warmup_status = "ready"
+        except Exception as e:
+            self.warmup_status = "failed"
+            self.warmup_error = str(e) or type(e).__name__
+            logger.warning("Model warm-up failed", error=self.warmup_error)
+        finally:
+            STARTUP_PHASE_DURATION.labels(phase="warmup").set(time.perf_counter() - start_time)
+
+    def skip_warm_up(self) -> None:
+        """Mark warm-up as not required (models stay lazy)."""
+        self.warmup_status = "skipped"
+
+    def health(self) -> dict[str, Any]:
+        """Readiness check entry for /health/ready."""
+        check: dict[str, Any] = {"healthy": self.ready, "status": self.warmup_status}
+        if self.warmup_error:
+            check["error"] = self.warmup_error
+        return check
+
+
+@lru_cache(maxsize=1)
+def get_model_registry() -> ModelRegistry:
+    """Create the process-wide model registry lazily on first access."""
+    return ModelRegistry()
@@ -0,0 +1,196 @@
+"""Latency tiers: how much a call may think, generate and wait.
+
+Every model role declares a tier, and a chat request may ask for another one
+(StreamingChatRequest.latencyTier):
+- interactive: no thinking, short answers, tight deadline (titles, trivial turns)
+- standard: the model's default thinking (chat)
+- deep: a large thinking budget and a long deadline (explicit deep requests)
+
+Each tier maps to a Gemini thinking budget, a max_output_tokens cap and a
+request timeout, configurable as LLM_TIER_<TIER>_THINKING_BUDGET,
+LLM_TIER_<TIER>_MAX_OUTPUT_TOKENS and LLM_TIER_<TIER>_TIMEOUT_SECONDS (an
+empty value uses the model default). Models that cannot go below a minimum
+thinking budget (Gemini 2.5 Pro cannot turn thinking off) get that minimum
+instead. The registry caches one client per (role, tier) and tags its runs
+with their surface and tier, which TierMetricsCallback uses to break usage
+and latency down.
+"""
+
+import asyncio
+import os
+import time
+from dataclasses import dataclass
+from typing import Any
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from langchain_core.runnables import RunnableConfig
+from langchain_core.runnables.config import ensure_config, merge_configs
+
+from backend.src.observability.exceptions import ValidationError
+from backend.src.observability.metrics import LLM_TIER_DURATION, LLM_TIER_TOKENS
+
+
+def _env_int(name: str, default: str) -> int | None:
+    value = os.getenv(name, default).strip()
+    return int(value) if value else None
+
+
+@dataclass(frozen=True)
+class LatencyTier:
+    """Generation limits for one latency tier."""
+
+    name: str
+    # Gemini thinking token budget: 0 disables thinking, -1 is dynamic, None the model default
+    thinking_budget: int | None
+    max_output_tokens: int | None
+    timeout_seconds: float | None
+
+
+def _tier(name: str, thinking_budget: str, max_output_tokens: str, timeout: str) -> LatencyTier:
+    prefix = f"LLM_TIER_{name.upper()}"
+    timeout_seconds = os.getenv(f"{prefix}_TIMEOUT_SECONDS", timeout).strip()
+    return LatencyTier(
+        name=name,
+        thinking_budget=_env_int(f"{prefix}_THINKING_BUDGET", thinking_budget),
+        max_output_tokens=_env_int(f"{prefix}_MAX_OUTPUT_TOKENS", max_output_tokens),
+        timeout_seconds=float(timeout_seconds) if timeout_seconds else None,
+    )
+
+
+LATENCY_TIERS: dict[str, LatencyTier] = {
+    tier.name: tier
+    for tier in (
+        _tier("interactive", thinking_budget="0", max_output_tokens="2048", timeout="20"),
+        _tier("standard", thinking_budget="", max_output_tokens="", timeout="120"),
+        _tier("deep", thinking_budget="8192", max_output_tokens="", timeout="300"),
+    )
+}
+
+
+# Smallest thinking budget a model accepts, by model name prefix
+MIN_THINKING_BUDGETS: dict[str, int] = {
+    "gemini-2.5-pro": 128,
+}
+
+
+def thinking_budget_for(tier: LatencyTier, model: str) -> int | None:
+    """The tier's thinking budget, raised to the model's minimum if it is below it.
+
+    Dynamic (-1) and model-default (None) budgets are left alone.
+    """
+    budget = tier.thinking_budget
+    minimum = next(
+        (value for prefix, value in MIN_THINKING_BUDGETS.items() if model.startswith(prefix)), 0
+    )
+    if budget is not None and 0 <= budget < minimum:
+        return minimum
+    return budget
+
+
+def resolve_latency_tier(selected: str | None) -> str | None:
+    """Validate a requested latency tier.
+
+    Raises:
+        ValidationError: If the tier is unknown.
+    """
+    if selected and selected not in LATENCY_TIERS:
+        raise ValidationError(
+            f"Unknown latency tier: {selected}", details={"available": list(LATENCY_TIERS)}
+        )
+    return selected or None
+
+
+class TierMetricsCallback(BaseCallbackHandler):
+    """Records LLM duration and token usage per surface and tier.
+
+    The registry binds it to each client (alongside the run's own callbacks,
+    such as LangGraph's stream handlers), so only registry calls pay for it.
+    It is synchronous and runs inline, and only handles start, end and error:
+    per-token events hit the base class no-op and never reach the executor.
+    Runs are attributed by the llm_surface and llm_tier metadata the registry
+    binds to each client; runs without it are ignored. Runs nested inside a
+    tracked run (e.g. the endpoints of a hedged call) are skipped, so each
+    logical call is counted once.
+    """
+
+    run_inline = True
+
+    def __init__(self) -> None:
+        self._started: dict[UUID, tuple[float, str, str]] = {}
+        self._nested: set[UUID] = set()
+
+    def on_chat_model_start(
+        self,
+        serialized: dict[str, Any],
+        messages: Any,
+        *,
+        run_id: UUID,
+        parent_run_id: UUID | None = None,
+        metadata: dict[str, Any] | None = None,
+        **kwargs: Any,
+    ) -> None:
+        if parent_run_id in self._started or parent_run_id in self._nested:
+            self._nested.add(run_id)
+            return
+        if metadata and "llm_surface" in metadata:
+            surface, tier = metadata["llm_surface"], metadata.get("llm_tier", "standard")
+            self._started[run_id] = (time.perf_counter(), surface, tier)
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        labels = self._finish(run_id, "success")
+        if labels is not None:
+            self._record_usage(response, *labels)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish(run_id, "cancelled" if isinstance(error, asyncio.CancelledError) else "error")
+
+    def _finish(self, run_id: UUID, status: str) -> tuple[str, str] | None:
+        """Record a tracked run's duration and return its (surface, tier)."""
+        self._nested.discard(run_id)
+        started = self._started.pop(run_id, None)
+        if started is None:
+            return None
+        start, surface, tier = started
+        LLM_TIER_DURATION.labels(surface=surface, tier=tier, status=status).observe(
+            time.perf_counter() - start
+        )
+        return surface, tier
+
+    def _record_usage(self, response: LLMResult, surface: str, tier: str) -> None:
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if not usage:
+                    continue
+                # Vertex AI reports thinking tokens apart from output_tokens
+                for kind, count in (
+                    ("input", usage.get("input_tokens", 0)),
+                    ("output", usage.get("output_tokens", 0)),
+                    ("thinking", usage.get("output_token_details", {}).get("reasoning", 0)),
+                ):
+                    if count:
+                        LLM_TIER_TOKENS.labels(surface=surface, tier=tier, kind=kind).inc(count)
+
+
+def tier_metadata(surface: str, tier: str) -> dict[str, str]:
+    """Run metadata attributing a client's calls to a surface and tier."""
+    return {"llm_surface": surface, "llm_tier": tier}
+
+
+# Shared by every registry client; state is keyed by run id
+tier_metrics = TierMetricsCallback()
+
+
+def with_tier_metrics(config: RunnableConfig) -> RunnableConfig:
+    """Config factory adding tier_metrics to a call's callbacks.
+
+    A callbacks list bound with with_config would replace the callbacks a
+    call inherits from its context (such as LangGraph's stream handlers)
+    rather than join them, so the inherited ones are merged in here.
+    """
+    if config.get("callbacks") is not None:
+        return {"callbacks": [tier_metrics]}
+    inherited = ensure_config().get("callbacks")
+    return merge_configs({"callbacks": inherited}, {"callbacks": [tier_metrics]})
@@ -0,0 +1,147 @@
+"""Incremental frontend-to-LangGraph message conversion, cached per chat.
+
+Without server-side state the frontend resends the whole history on every
+turn. Converting it means joining every text part of every message into new
+HumanMessage/AIMessage objects, which dominates request CPU on long chats.
+
+The cache keeps the converted messages of each chat together with a rolling
+hash of the message prefix. On the next turn the incoming history is hashed
+message by message; the longest prefix whose hash matches is reused and only
+the tail is converted. An edit anywhere in the history simply shortens the
+reused prefix.
+"""
+
+import hashlib
+import os
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+from langchain_core.messages import BaseMessage
+
+from backend.src.observability.metrics import MESSAGE_CACHE_REQUESTS
+
+# Configuration from environment (a byte budget of 0 disables the cache)
+MESSAGE_CACHE_MAX_CHATS = int(os.getenv("MESSAGE_CACHE_MAX_CHATS", "1024"))
+MESSAGE_CACHE_MAX_BYTES = int(os.getenv("MESSAGE_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+
+# Converter for a single frontend message (None for roles that are skipped)
+Converter = Callable[[dict[str, Any]], BaseMessage | None]
+
+
+@dataclass
+class _Entry:
+    """Converted prefix of one chat."""
+
+    # hashes[i] is the rolling hash of messages[0..i] of the frontend history
+    hashes: list[bytes] = field(default_factory=list)
+    # converted[i] is the converted message i (None for skipped roles)
+    converted: list[BaseMessage | None] = field(default_factory=list)
+    size: int = 0
+
+
+class MessageConversionCache:
+    """LRU cache of converted message lists, keyed by chat id.
+
+    Memory is bounded by both a chat count and an approximate byte budget
+    (the text size of the cached messages); least recently used chats are
+    evicted first.
+
+    Usage:
+        cache = MessageConversionCache()
+        messages = cache.convert("chat-1", history, convert_message)
+    """
+
+    def __init__(self, max_chats: int | None = None, max_bytes: int | None = None) -> None:
+        self.max_chats = MESSAGE_CACHE_MAX_CHATS if max_chats is None else max_chats
+        self.max_bytes = MESSAGE_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._size = 0
+
+    @property
+    def enabled(self) -> bool:
+        """Whether conversions are cached at all."""
+        return self.max_bytes > 0 and self.max_chats > 0
+
+    @property
+    def size(self) -> int:
+        """Approximate bytes of text held by the cache."""
+        return self._size
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def convert(
+        self,
+        chat_id: str,
+        messages: list[dict[str, Any]],
+        converter: Converter,
+    ) -> list[BaseMessage]:
+        """Convert a chat history, reusing the cached prefix for this chat.
+
+        Args:
+            chat_id: Chat the history belongs to.
+            messages: Full frontend message history.
+            converter: Converts one frontend message.
+
+        Returns:
+            Converted LangChain messages (a new list on every call).
+        """
+        if not self.enabled:
+            return [m for m in map(converter, messages) if m is not None]
+
+        entry = self._entries.pop(chat_id, None)
+        self._size -= entry.size if entry else 0
+        cached = entry or _Entry()
+
+        hashes: list[bytes] = []
+        previous = b""
+        reused = 0
+        for index, msg in enumerate(messages):
+            previous = _rolling_hash(previous, msg)
+            hashes.append(previous)
+            if reused == index and index < len(cached.hashes) and cached.hashes[index] == previous:
+                reused += 1
+
+        MESSAGE_CACHE_REQUESTS.labels(result="hit" if reused else "miss").inc()
+
+        converted = cached.converted[:reused]
+        converted.extend(converter(msg) for msg in messages[reused:])
+        size = sum(len(m.content) if isinstance(m.content, str) else 0 for m in converted if m)
+
+        new_entry = _Entry(hashes=hashes, converted=converted, size=size)
+        if size <= self.max_bytes:
+            self._entries[chat_id] = new_entry
+            self._size += size
+            self._evict()
+
+        return [m for m in converted if m is not None]
+
+    def clear(self) -> None:
+        """Drop every cached chat."""
+        self._entries.clear()
+        self._size = 0
+
+    def _evict(self) -> None:
+        while self._entries and (
+            len(self._entries) > self.max_chats or self._size > self.max_bytes
+        ):
+            _, entry = self._entries.popitem(last=False)
+            self._size -= entry.size
+
+
+def _rolling_hash(previous: bytes, msg: dict[str, Any]) -> bytes:
+    """Hash one message on top of the hash of the messages before it."""
+    digest = hashlib.blake2b(previous, digest_size=16)
+    digest.update(str(msg.get("role", "user")).encode())
+    parts = msg.get("parts")
+    if parts:
+        for part in parts:
+            if part.get("type") == "text":
+                digest.update(b"\x00")
+                digest.update(part.get("text", "").encode())
+    else:
+        digest.update(b"\x01")
+        digest.update(str(msg.get("content") or "").encode())
+    return digest.digest()
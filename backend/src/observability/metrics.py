@@ -10,7 +10,7 @@ from functools import wraps
 from typing import Any, TypeVar
 
 from fastapi import FastAPI
-from prometheus_client import Counter, Histogram
+from prometheus_client import Counter, Gauge, Histogram
 
 # Check if metrics are enabled
 METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
@@ -49,6 +49,104 @@ STREAM_DURATION = Histogram(
     buckets=(1.0, 5.0, 10.0, 30.0, 60.0, 120.0),
 )
 
+MESSAGE_CACHE_REQUESTS = Counter(
+    "message_conversion_cache_total",
+    "Chat history conversions by whether a cached prefix was reused",
+    ["result"],
+)
+
+CONTEXT_SUMMARIES_TOTAL = Counter(
+    "context_summaries_total",
+    "Context-window summaries by outcome (cached, generated, failed)",
+    ["result"],
+)
+
+RESPONSE_CACHE_REQUESTS = Counter(
+    "response_cache_requests_total",
+    "Response cache lookups by endpoint and result (hit_<tier>, miss, bypass)",
+    ["endpoint", "result"],
+)
+
+SINGLEFLIGHT_CALLS = Counter(
+    "llm_singleflight_total",
+    "LLM calls by whether they started a call (leader) or joined an in-flight one (shared)",
+    ["operation", "result"],
+)
+
+LLM_QUEUE_WAIT = Histogram(
+    "llm_queue_wait_seconds",
+    "Time spent waiting for an LLM concurrency slot",
+    ["operation"],
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+
+LLM_QUEUE_DEPTH = Gauge(
+    "llm_queue_depth",
+    "Callers currently waiting for an LLM concurrency slot",
+)
+
+LLM_IN_FLIGHT = Gauge(
+    "llm_in_flight",
+    "LLM calls currently holding a concurrency slot",
+)
+
+LLM_QUEUE_REJECTED = Counter(
+    "llm_queue_rejected_total",
+    "LLM calls rejected by the concurrency governor",
+    ["operation", "reason"],
+)
+
+ADMISSION_DECISIONS = Counter(
+    "admission_decisions_total",
+    "Chat admission decisions by user type and result",
+    ["user_type", "result"],
+)
+
+LLM_ENDPOINT_TTFT = Histogram(
+    "llm_endpoint_ttft_seconds",
+    "Time to first token per LLM endpoint",
+    ["endpoint"],
+    buckets=(0.1, 0.25, 0.5, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0),
+)
+
+LLM_HEDGE_EVENTS = Counter(
+    "llm_hedge_events_total",
+    "Hedged LLM requests by endpoint and event (hedged, won, failover, cancelled)",
+    ["endpoint", "event"],
+)
+
+CHAT_ROUTE_DECISIONS = Counter(
+    "chat_route_decisions_total",
+    "Chat turn routing decisions by route (fast, default) and reason",
+    ["route", "reason"],
+)
+
+CHAT_TTFT = Histogram(
+    "chat_ttft_seconds",
+    "Time to first token of chat replies by chat model, route and latency tier",
+    ["model", "route", "tier"],
+    buckets=(0.1, 0.25, 0.5, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0),
+)
+
+LLM_TIER_DURATION = Histogram(
+    "llm_tier_duration_seconds",
+    "LLM call duration by surface (chat, title, background), latency tier and status",
+    ["surface", "tier", "status"],
+    buckets=(0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0),
+)
+
+LLM_TIER_TOKENS = Counter(
+    "llm_tier_tokens_total",
+    "LLM tokens by surface, latency tier and kind (input, output, thinking)",
+    ["surface", "tier", "kind"],
+)
+
+STARTUP_PHASE_DURATION = Gauge(
+    "app_startup_phase_seconds",
+    "Duration of the last application startup phases",
+    ["phase"],
+)
+
 
 def setup_metrics(app: FastAPI) -> None:
     """Set up Prometheus metrics instrumentation for FastAPI.
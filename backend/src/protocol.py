@@ -2,48 +2,86 @@
 
 Lifted and simplified from langchain_aisdk_adapter.
 Implements the Vercel AI SDK UI Message Stream Protocol v1.
+
+Event helpers return SSE frames as UTF-8 bytes ready for the ASGI body.
+The hot-path events (text deltas and friends) are assembled from precomputed
+byte prefixes plus a C-accelerated JSON string escaper, avoiding a dict build
+and a full json.dumps per frame. Output is byte-for-byte identical to
+format_sse(payload).encode("utf-8").
 """
 
 import json
 from typing import Any
 
+# C-accelerated escaper used by json.dumps(..., ensure_ascii=False) for str values
+_escape = json.encoder.encode_basestring  # type: ignore[attr-defined]
+
+# Precomputed frame fragments for hot-path events
+_START_PREFIX = b'data: {"type":"start","messageId":'
+_START_STEP_PREFIX = b'data: {"type":"start-step","messageId":'
+_TEXT_START_PREFIX = b'data: {"type":"text-start","id":'
+_TEXT_DELTA_PREFIX = b'data: {"type":"text-delta","id":'
+_TEXT_DELTA_INFIX = b',"delta":'
+_TEXT_END_PREFIX = b'data: {"type":"text-end","id":'
+_ERROR_PREFIX = b'data: {"type":"error","errorText":'
+_FRAME_SUFFIX = b"}\n\n"
+_DONE_MARKER = b"data: [DONE]\n\n"
+
 
 def format_sse(payload: dict[str, Any]) -> str:
     """Format a payload as a Server-Sent Event for AI SDK v5."""
     return f"data: {json.dumps(payload, separators=(',', ':'), ensure_ascii=False)}\n\n"
 
 
-def create_start_event(message_id: str) -> str:
+def encode_sse(payload: dict[str, Any]) -> bytes:
+    """Format a payload as a Server-Sent Event, encoded as UTF-8 bytes."""
+    return format_sse(payload).encode("utf-8")
+
+
+def _frame(prefix: bytes, value: str) -> bytes:
+    """Build a frame whose only variable field is a single trailing string."""
+    return b"".join((prefix, _escape(value).encode("utf-8"), _FRAME_SUFFIX))
+
+
+def create_start_event(message_id: str) -> bytes:
     """Create stream start event."""
-    return format_sse({"type": "start", "messageId": message_id})
+    return _frame(_START_PREFIX, message_id)
 
 
-def create_start_step_event(step_id: str) -> str:
+def create_start_step_event(step_id: str) -> bytes:
     """Create step start event."""
-    return format_sse({"type": "start-step", "messageId": step_id})
+    return _frame(_START_STEP_PREFIX, step_id)
 
 
-def create_text_start(text_id: str) -> str:
+def create_text_start(text_id: str) -> bytes:
     """Create text stream start event."""
-    return format_sse({"type": "text-start", "id": text_id})
+    return _frame(_TEXT_START_PREFIX, text_id)
 
 
-def create_text_delta(text_id: str, delta: str) -> str:
+def create_text_delta(text_id: str, delta: str) -> bytes:
     """Create text delta event."""
-    return format_sse({"type": "text-delta", "id": text_id, "delta": delta})
+    return b"".join(
+        (
+            _TEXT_DELTA_PREFIX,
+            _escape(text_id).encode("utf-8"),
+            _TEXT_DELTA_INFIX,
+            _escape(delta).encode("utf-8"),
+            _FRAME_SUFFIX,
+        )
+    )
 
 
-def create_text_end(text_id: str) -> str:
+def create_text_end(text_id: str) -> bytes:
     """Create text stream end event."""
-    return format_sse({"type": "text-end", "id": text_id})
+    return _frame(_TEXT_END_PREFIX, text_id)
 
 
 def create_finish_step_event(
     finish_reason: str = "stop",
     usage: dict[str, int] | None = None,
-) -> str:
+) -> bytes:
     """Create step finish event."""
-    return format_sse(
+    return encode_sse(
         {
             "type": "finish-step",
             "finishReason": finish_reason,
@@ -56,9 +94,9 @@ def create_finish_step_event(
 def create_finish_event(
     finish_reason: str = "stop",
     usage: dict[str, int] | None = None,
-) -> str:
+) -> bytes:
     """Create stream finish event."""
-    return format_sse(
+    return encode_sse(
         {
             "type": "finish",
             "finishReason": finish_reason,
@@ -67,20 +105,32 @@ def create_finish_event(
     )
 
 
-def create_error_event(error_text: str) -> str:
+def create_error_event(error_text: str) -> bytes:
     """Create error event."""
-    return format_sse({"type": "error", "errorText": error_text})
+    return _frame(_ERROR_PREFIX, error_text)
+
+
+def create_data_part(name: str, data: Any, transient: bool = False) -> bytes:
+    """Create a custom data part (type "data-<name>").
+
+    Transient parts reach the client's onData handler but are not added to
+    the message.
+    """
+    payload: dict[str, Any] = {"type": f"data-{name}", "data": data}
+    if transient:
+        payload["transient"] = True
+    return encode_sse(payload)
 
 
-def create_done_marker() -> str:
+def create_done_marker() -> bytes:
     """Create stream termination marker."""
-    return "data: [DONE]\n\n"
+    return _DONE_MARKER
 
 
 # Tool-related events for future use
-def create_tool_input_start(tool_call_id: str, tool_name: str) -> str:
+def create_tool_input_start(tool_call_id: str, tool_name: str) -> bytes:
     """Create tool input start event."""
-    return format_sse(
+    return encode_sse(
         {
             "type": "tool-input-start",
             "toolCallId": tool_call_id,
@@ -89,9 +139,9 @@ def create_tool_input_start(tool_call_id: str, tool_name: str) -> str:
     )
 
 
-def create_tool_input_delta(tool_call_id: str, delta: str) -> str:
+def create_tool_input_delta(tool_call_id: str, delta: str) -> bytes:
     """Create tool input delta event."""
-    return format_sse(
+    return encode_sse(
         {
             "type": "tool-input-delta",
             "toolCallId": tool_call_id,
@@ -104,9 +154,9 @@ def create_tool_input_available(
     tool_call_id: str,
     tool_name: str,
     tool_input: Any,
-) -> str:
+) -> bytes:
     """Create tool input available event."""
-    return format_sse(
+    return encode_sse(
         {
             "type": "tool-input-available",
             "toolCallId": tool_call_id,
@@ -116,9 +166,9 @@ def create_tool_input_available(
     )
 
 
-def create_tool_output_available(tool_call_id: str, output: Any) -> str:
+def create_tool_output_available(tool_call_id: str, output: Any) -> bytes:
     """Create tool output available event."""
-    return format_sse(
+    return encode_sse(
         {
             "type": "tool-output-available",
             "toolCallId": tool_call_id,
@@ -0,0 +1,222 @@
+"""Response cache for non-streaming LLM endpoints (/chat and /api/title).
+
+Identical requests (starter prompts, retries, the frontend asking for a title
+twice) would otherwise each cost a Vertex call. Responses are cached under a
+key derived from the normalised prompt, the model and its temperature, with a
+TTL per endpoint.
+
+Two tiers are available:
+- memory: an in-process LRU bounded by a byte budget (always on when enabled)
+- redis: a shared tier behind it, enabled by RESPONSE_CACHE_REDIS
+
+Cache failures never fail a request: a tier that errors is treated as a miss.
+"""
+
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from functools import lru_cache
+from typing import Any, Protocol
+
+from backend.src.observability import get_logger
+from backend.src.observability.metrics import RESPONSE_CACHE_REQUESTS
+
+logger = get_logger(__name__)
+
+# Configuration from environment
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+RESPONSE_CACHE_REDIS = os.getenv("RESPONSE_CACHE_REDIS", "false").lower() == "true"
+# Sampling temperatures above this are treated as non-deterministic and never cached
+RESPONSE_CACHE_MAX_TEMPERATURE = float(os.getenv("RESPONSE_CACHE_MAX_TEMPERATURE", "0.5"))
+# TTL in seconds per endpoint (0 disables caching for that endpoint). Chat
+# answers are sampled, so they are only cached when explicitly enabled.
+RESPONSE_CACHE_TTL_SECONDS: dict[str, float] = {
+    "chat": float(os.getenv("RESPONSE_CACHE_TTL_CHAT", "0")),
+    "title": float(os.getenv("RESPONSE_CACHE_TTL_TITLE", "86400")),
+}
+REDIS_URL = os.getenv("REDIS_URL", "")
+
+
+class ResponseCacheTier(Protocol):
+    """Interface of one cache tier."""
+
+    name: str
+
+    async def get(self, key: str) -> str | None:
+        """Get a cached response, or None if absent or expired."""
+        ...
+
+    async def set(self, key: str, value: str, ttl: float) -> None:
+        """Store a response for ttl seconds."""
+        ...
+
+
+class MemoryResponseCache:
+    """In-process LRU tier bounded by the UTF-8 size of keys and values."""
+
+    name = "memory"
+
+    def __init__(
+        self,
+        max_bytes: int | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_bytes = RESPONSE_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        self._clock = clock
+        # key -> (expires_at, value, size)
+        self._entries: OrderedDict[str, tuple[float, str, int]] = OrderedDict()
+        self._size = 0
+
+    @property
+    def size(self) -> int:
+        """Bytes held by the tier."""
+        return self._size
+
+    async def get(self, key: str) -> str | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value, _ = entry
+        if expires_at <= self._clock():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: str, ttl: float) -> None:
+        size = len(key.encode()) + len(value.encode())
+        if size > self.max_bytes:
+            return
+        self._remove(key)
+        self._entries[key] = (self._clock() + ttl, value, size)
+        self._size += size
+        while self._size > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= entry[2]
+
+
+class RedisResponseCache:
+    """Shared tier on a Redis-compatible server. Requires the optional redis package."""
+
+    name = "redis"
+
+    def __init__(self, url: str | None = None, client: Any = None) -> None:
+        if client is None:
+            import redis.asyncio as redis  # optional dependency
+
+            client = redis.from_url(url or REDIS_URL)
+        self._redis = client
+
+    async def get(self, key: str) -> str | None:
+        value = await self._redis.get(key)
+        if value is None:
+            return None
+        return value.decode() if isinstance(value, bytes) else str(value)
+
+    async def set(self, key: str, value: str, ttl: float) -> None:
+        await self._redis.set(key, value, ex=max(int(ttl), 1))
+
+
+class ResponseCache:
+    """Read-through cache over one or more tiers, fastest first.
+
+    Usage:
+        cache = get_response_cache()
+        title = await cache.get_or_compute(
+            "title", message, model="gemini-2.5-flash", temperature=0.3, compute=call_llm
+        )
+    """
+
+    def __init__(self, tiers: list[ResponseCacheTier]) -> None:
+        self.tiers = tiers
+
+    async def get_or_compute(
+        self,
+        endpoint: str,
+        prompt: str,
+        *,
+        model: str,
+        temperature: float | None,
+        compute: Callable[[], Awaitable[str]],
+        bypass: bool = False,
+    ) -> str:
+        """Return the cached response for a prompt, computing and storing it on a miss.
+
+        Args:
+            endpoint: Endpoint name, selecting the TTL and metric label.
+            prompt: The user prompt; normalised before keying.
+            model: Model name, part of the key.
+            temperature: Sampling temperature, part of the key.
+            compute: Produces the response on a miss. Exceptions propagate and
+                nothing is cached.
+            bypass: Skip the cache entirely (e.g. Cache-Control: no-cache).
+
+        Returns:
+            The cached or freshly computed response.
+        """
+        ttl = RESPONSE_CACHE_TTL_SECONDS.get(endpoint, 0)
+        if (
+            bypass
+            or not self.tiers
+            or ttl <= 0
+            or (temperature or 0) > RESPONSE_CACHE_MAX_TEMPERATURE
+        ):
+            RESPONSE_CACHE_REQUESTS.labels(endpoint=endpoint, result="bypass").inc()
+            return await compute()
+
+        key = cache_key(endpoint, prompt, model, temperature)
+        for index, tier in enumerate(self.tiers):
+            try:
+                value = await tier.get(key)
+            except Exception as e:
+                logger.warning("Response cache read failed", tier=tier.name, error=str(e))
+                continue
+            if value is not None:
+                RESPONSE_CACHE_REQUESTS.labels(endpoint=endpoint, result=f"hit_{tier.name}").inc()
+                # Backfill faster tiers so the next read stays local
+                await self._store(self.tiers[:index], key, value, ttl)
+                return value
+
+        RESPONSE_CACHE_REQUESTS.labels(endpoint=endpoint, result="miss").inc()
+        value = await compute()
+        await self._store(self.tiers, key, value, ttl)
+        return value
+
+    @staticmethod
+    async def _store(tiers: list[ResponseCacheTier], key: str, value: str, ttl: float) -> None:
+        for tier in tiers:
+            try:
+                await tier.set(key, value, ttl)
+            except Exception as e:
+                logger.warning("Response cache write failed", tier=tier.name, error=str(e))
+
+
+def cache_key(endpoint: str, prompt: str, model: str, temperature: float | None) -> str:
+    """Build the cache key from the normalised prompt, model and temperature.
+
+    Prompts are normalised by collapsing whitespace and case folding, so
+    trivially different spellings of the same prompt share an entry.
+    """
+    normalised = " ".join(prompt.split()).casefold()
+    payload = json.dumps([endpoint, model, temperature, normalised], ensure_ascii=False)
+    digest = hashlib.sha256(payload.encode()).hexdigest()
+    return f"knowsee:response:{endpoint}:{digest}"
+
+
+@lru_cache(maxsize=1)
+def get_response_cache() -> ResponseCache:
+    """Create the configured response cache lazily on first access."""
+    tiers: list[ResponseCacheTier] = []
+    if RESPONSE_CACHE_ENABLED:
+        tiers.append(MemoryResponseCache())
+        if RESPONSE_CACHE_REDIS:
+            tiers.append(RedisResponseCache())
+    return ResponseCache(tiers)
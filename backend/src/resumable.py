@@ -0,0 +1,470 @@
+"""Resumable SSE streams with Last-Event-ID replay.
+
+Generation runs in a background producer task that appends every SSE frame to
+a bounded per-stream buffer keyed by the Stream table id. HTTP responses are
+subscribers: they replay buffered frames after a given event id, then follow
+the live tail. A client that reconnects mid-answer therefore resumes the
+existing generation instead of starting a new LLM call.
+
+Subscribers send heartbeats to the store while attached, so a client that
+reattaches through another replica keeps the generation alive.
+
+Two stores are available, selected by RESUMABLE_STREAM_BACKEND:
+- memory: per-process ring buffers with age and size eviction (default)
+- redis: Redis Streams, for deployments with more than one replica
+"""
+
+import asyncio
+import contextlib
+import os
+import time
+import uuid
+from collections import OrderedDict
+from collections.abc import AsyncGenerator, AsyncIterator, Callable
+from functools import lru_cache
+from typing import Any, Protocol
+
+from backend.src.observability import get_logger
+from backend.src.observability.exceptions import ValidationError
+
+logger = get_logger(__name__)
+
+# Configuration from environment
+RESUMABLE_STREAM_BACKEND = os.getenv("RESUMABLE_STREAM_BACKEND", "memory")
+RESUMABLE_STREAM_TTL_SECONDS = float(os.getenv("RESUMABLE_STREAM_TTL_SECONDS", "300"))
+RESUMABLE_STREAM_MAX_FRAMES = int(os.getenv("RESUMABLE_STREAM_MAX_FRAMES", "5000"))
+RESUMABLE_STREAM_MAX_BYTES = int(os.getenv("RESUMABLE_STREAM_MAX_BYTES", str(1024 * 1024)))
+RESUMABLE_STREAM_MAX_TOTAL_BYTES = int(
+    os.getenv("RESUMABLE_STREAM_MAX_TOTAL_BYTES", str(64 * 1024 * 1024))
+)
+RESUMABLE_STREAM_ORPHAN_GRACE_SECONDS = float(
+    os.getenv("RESUMABLE_STREAM_ORPHAN_GRACE_SECONDS", "30")
+)
+RESUMABLE_STREAM_HEARTBEAT_SECONDS = float(os.getenv("RESUMABLE_STREAM_HEARTBEAT_SECONDS", "5"))
+REDIS_URL = os.getenv("REDIS_URL", "")
+
+
+class ResumableStreamStore(Protocol):
+    """Storage for SSE frames of in-flight and recently finished streams."""
+
+    async def create(self, stream_id: str) -> None:
+        """Start a new, empty stream."""
+        ...
+
+    async def append(self, stream_id: str, frame: bytes) -> int:
+        """Append a frame and return its event id (monotonically increasing from 1)."""
+        ...
+
+    async def close(self, stream_id: str) -> None:
+        """Mark a stream as finished so subscribers stop after the last frame."""
+        ...
+
+    async def replayable(self, stream_id: str, after_id: int) -> bool:
+        """Whether every frame after after_id is still available."""
+        ...
+
+    def read(self, stream_id: str, after_id: int) -> AsyncIterator[tuple[int, bytes]]:
+        """Yield (event_id, frame) pairs after after_id, then follow the live tail.
+
+        Stops early, rather than skip frames, if frames the reader has not seen
+        yet were trimmed from the buffer.
+        """
+        ...
+
+    async def heartbeat(self, stream_id: str, subscriber_id: str, ttl: float) -> None:
+        """Record that a subscriber is attached for the next ttl seconds."""
+        ...
+
+    async def detach(self, stream_id: str, subscriber_id: str) -> None:
+        """Forget a subscriber that has detached."""
+        ...
+
+    async def has_subscribers(self, stream_id: str) -> bool:
+        """Whether any subscriber, on any replica, has a live heartbeat."""
+        ...
+
+
+class _StreamBuffer:
+    """Frames of a single stream. Event ids are contiguous, so first_id indexes the list."""
+
+    __slots__ = ("frames", "first_id", "size", "done", "updated_at", "changed")
+
+    def __init__(self, now: float) -> None:
+        self.frames: list[bytes] = []
+        self.first_id = 1
+        self.size = 0
+        self.done = False
+        self.updated_at = now
+        self.changed = asyncio.Event()
+
+    @property
+    def last_id(self) -> int:
+        return self.first_id + len(self.frames) - 1
+
+    def notify(self) -> None:
+        """Wake every subscriber waiting on the current event."""
+        self.changed.set()
+        self.changed = asyncio.Event()
+
+
+class InMemoryStreamStore:
+    """Per-process ring buffers with eviction by age and size.
+
+    Each stream keeps at most max_frames frames and max_bytes bytes, dropping
+    the oldest first. Streams idle for longer than ttl seconds are evicted, and
+    finished streams are evicted oldest-first once max_total_bytes is exceeded.
+    Live streams are never evicted for size, only for age.
+    """
+
+    def __init__(
+        self,
+        ttl: float | None = None,
+        max_frames: int | None = None,
+        max_bytes: int | None = None,
+        max_total_bytes: int | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.ttl = RESUMABLE_STREAM_TTL_SECONDS if ttl is None else ttl
+        self.max_frames = RESUMABLE_STREAM_MAX_FRAMES if max_frames is None else max_frames
+        self.max_bytes = RESUMABLE_STREAM_MAX_BYTES if max_bytes is None else max_bytes
+        self.max_total_bytes = (
+            RESUMABLE_STREAM_MAX_TOTAL_BYTES if max_total_bytes is None else max_total_bytes
+        )
+        self._clock = clock
+        self._buffers: OrderedDict[str, _StreamBuffer] = OrderedDict()
+        self._total_bytes = 0
+        # Heartbeat expiry by subscriber id, per stream
+        self._subscribers: dict[str, dict[str, float]] = {}
+
+    async def create(self, stream_id: str) -> None:
+        self._evict()
+        previous = self._buffers.pop(stream_id, None)
+        if previous is not None:
+            self._total_bytes -= previous.size
+        self._buffers[stream_id] = _StreamBuffer(self._clock())
+
+    async def append(self, stream_id: str, frame: bytes) -> int:
+        buffer = self._buffers.get(stream_id)
+        if buffer is None:
+            return 0
+
+        buffer.frames.append(frame)
+        buffer.size += len(frame)
+        self._total_bytes += len(frame)
+        buffer.updated_at = self._clock()
+        self._buffers.move_to_end(stream_id)
+
+        # Drop the oldest frames once the per-stream budget is exceeded
+        excess = 0
+        dropped = 0
+        while len(buffer.frames) - excess > 1 and (
+            len(buffer.frames) - excess > self.max_frames or buffer.size - dropped > self.max_bytes
+        ):
+            dropped += len(buffer.frames[excess])
+            excess += 1
+        if excess:
+            del buffer.frames[:excess]
+            buffer.first_id += excess
+            buffer.size -= dropped
+            self._total_bytes -= dropped
+
+        buffer.notify()
+        return buffer.last_id
+
+    async def close(self, stream_id: str) -> None:
+        buffer = self._buffers.get(stream_id)
+        if buffer is None:
+            return
+        buffer.done = True
+        buffer.updated_at = self._clock()
+        buffer.notify()
+        self._evict()
+
+    async def replayable(self, stream_id: str, after_id: int) -> bool:
+        buffer = self._buffers.get(stream_id)
+        if buffer is None:
+            return False
+        return after_id >= buffer.first_id - 1
+
+    async def read(self, stream_id: str, after_id: int) -> AsyncGenerator[tuple[int, bytes], None]:
+        cursor = after_id
+        while True:
+            buffer = self._buffers.get(stream_id)
+            if buffer is None:
+                return
+
+            # Grab the waiter before slicing; there is no await in between
+            waiter = buffer.changed
+            start = cursor - buffer.first_id + 1
+            if start < 0:
+                _log_gap(stream_id, cursor, buffer.first_id)
+                return
+            pending = buffer.frames[start:]
+            first_pending_id = buffer.first_id + start
+            done = buffer.done
+
+            for offset, frame in enumerate(pending):
+                yield first_pending_id + offset, frame
+            cursor = first_pending_id + len(pending) - 1 if pending else cursor
+
+            if done and cursor >= buffer.last_id:
+                return
+            if not pending:
+                await waiter.wait()
+
+    async def heartbeat(self, stream_id: str, subscriber_id: str, ttl: float) -> None:
+        self._subscribers.setdefault(stream_id, {})[subscriber_id] = self._clock() + ttl
+
+    async def detach(self, stream_id: str, subscriber_id: str) -> None:
+        subscribers = self._subscribers.get(stream_id, {})
+        subscribers.pop(subscriber_id, None)
+        if not subscribers:
+            self._subscribers.pop(stream_id, None)
+
+    async def has_subscribers(self, stream_id: str) -> bool:
+        now = self._clock()
+        return any(expiry > now for expiry in self._subscribers.get(stream_id, {}).values())
+
+    def _evict(self) -> None:
+        """Drop expired streams, then finished streams until under the total budget."""
+        now = self._clock()
+        for stream_id, buffer in list(self._buffers.items()):
+            if now - buffer.updated_at > self.ttl:
+                self._drop(stream_id)
+
+        if self._total_bytes <= self.max_total_bytes:
+            return
+        for stream_id, buffer in list(self._buffers.items()):
+            if self._total_bytes <= self.max_total_bytes:
+                break
+            if buffer.done:
+                self._drop(stream_id)
+
+    def _drop(self, stream_id: str) -> None:
+        buffer = self._buffers.pop(stream_id)
+        self._subscribers.pop(stream_id, None)
+        self._total_bytes -= buffer.size
+        buffer.done = True
+        buffer.notify()
+
+
+class RedisStreamStore:
+    """Redis Streams backed store, shared by every replica.
+
+    Frames are stored with explicit entry ids "0-<event_id>" so SSE ids stay
+    small integers. Only the producing process appends to a stream, so the
+    sequence counter is kept locally. Subscriber heartbeats live in a sorted
+    set scored by expiry time. Requires the optional redis package.
+    """
+
+    _END_FIELD = b"end"
+    _FRAME_FIELD = b"frame"
+
+    def __init__(
+        self,
+        url: str | None = None,
+        ttl: float | None = None,
+        max_frames: int | None = None,
+        block_ms: int = 5000,
+        client: Any = None,
+    ) -> None:
+        if client is None:
+            import redis.asyncio as redis  # optional dependency
+
+            client = redis.from_url(url or REDIS_URL)
+        self._redis = client
+        self.ttl = int(RESUMABLE_STREAM_TTL_SECONDS if ttl is None else ttl)
+        self.max_frames = RESUMABLE_STREAM_MAX_FRAMES if max_frames is None else max_frames
+        self.block_ms = block_ms
+        self._seq: dict[str, int] = {}
+
+    @staticmethod
+    def _key(stream_id: str) -> str:
+        return f"knowsee:stream:{stream_id}"
+
+    @staticmethod
+    def _subscribers_key(stream_id: str) -> str:
+        return f"knowsee:stream:{stream_id}:subscribers"
+
+    async def create(self, stream_id: str) -> None:
+        self._seq[stream_id] = 0
+        await self._redis.delete(self._key(stream_id))
+
+    async def append(self, stream_id: str, frame: bytes) -> int:
+        event_id = self._seq.get(stream_id, 0) + 1
+        self._seq[stream_id] = event_id
+        key = self._key(stream_id)
+        async with self._redis.pipeline(transaction=False) as pipe:
+            pipe.xadd(
+                key,
+                {self._FRAME_FIELD: frame},
+                id=f"0-{event_id}",
+                maxlen=self.max_frames,
+                approximate=True,
+            )
+            pipe.expire(key, self.ttl)
+            await pipe.execute()
+        return event_id
+
+    async def close(self, stream_id: str) -> None:
+        event_id = self._seq.pop(stream_id, 0) + 1
+        key = self._key(stream_id)
+        async with self._redis.pipeline(transaction=False) as pipe:
+            pipe.xadd(key, {self._END_FIELD: b"1"}, id=f"0-{event_id}")
+            pipe.expire(key, self.ttl)
+            await pipe.execute()
+
+    async def replayable(self, stream_id: str, after_id: int) -> bool:
+        first = await self._redis.xrange(self._key(stream_id), count=1)
+        if not first:
+            return False
+        first_id = int(first[0][0].split(b"-")[1])
+        return after_id >= first_id - 1
+
+    async def read(self, stream_id: str, after_id: int) -> AsyncGenerator[tuple[int, bytes], None]:
+        key = self._key(stream_id)
+        cursor: str | bytes = f"0-{after_id}"
+        last_id = after_id
+        while True:
+            response = await self._redis.xread({key: cursor}, count=100, block=self.block_ms)
+            if not response:
+                # Producer may have died; stop once the stream has expired
+                if not await self._redis.exists(key):
+                    return
+                continue
+            for _, entries in response:
+                for entry_id, fields in entries:
+                    cursor = entry_id
+                    event_id = int(entry_id.split(b"-")[1])
+                    if event_id > last_id + 1:
+                        _log_gap(stream_id, last_id, event_id)
+                        return
+                    last_id = event_id
+                    if self._END_FIELD in fields:
+                        return
+                    yield event_id, fields[self._FRAME_FIELD]
+
+    async def heartbeat(self, stream_id: str, subscriber_id: str, ttl: float) -> None:
+        key = self._subscribers_key(stream_id)
+        async with self._redis.pipeline(transaction=False) as pipe:
+            pipe.zadd(key, {subscriber_id: time.time() + ttl})
+            pipe.expire(key, self.ttl)
+            await pipe.execute()
+
+    async def detach(self, stream_id: str, subscriber_id: str) -> None:
+        await self._redis.zrem(self._subscribers_key(stream_id), subscriber_id)
+
+    async def has_subscribers(self, stream_id: str) -> bool:
+        live = await self._redis.zcount(self._subscribers_key(stream_id), time.time(), "+inf")
+        return live > 0
+
+
+def _log_gap(stream_id: str, cursor: int, first_id: int) -> None:
+    """Log a reader that fell behind frames trimmed from its stream."""
+    logger.warning(
+        "Resumable stream reader fell behind trimmed frames, ending it",
+        stream_id=stream_id,
+        cursor=cursor,
+        first_id=first_id,
+    )
+
+
+@lru_cache(maxsize=1)
+def get_stream_store() -> ResumableStreamStore:
+    """Create the configured stream store lazily on first access."""
+    if RESUMABLE_STREAM_BACKEND == "redis":
+        return RedisStreamStore()
+    return InMemoryStreamStore()
+
+
+# Producer tasks by stream id (also keeps them from being garbage collected)
+_producers: dict[str, asyncio.Task[None]] = {}
+# Orphan watchers by stream id, one per producer
+_orphan_watchers: dict[str, asyncio.Task[None]] = {}
+
+
+async def start_resumable_stream(stream_id: str, frames: AsyncIterator[bytes]) -> None:
+    """Run a frame generator in the background, recording its output in the store.
+
+    Raises:
+        ValidationError: (409) If this process is already producing the stream.
+    """
+    if stream_id in _producers:
+        raise ValidationError(
+            "Stream is already in progress",
+            code="stream_in_progress",
+            status_code=409,
+            details={"stream_id": stream_id},
+        )
+    store = get_stream_store()
+    await store.create(stream_id)
+
+    async def produce() -> None:
+        try:
+            async for frame in frames:
+                await store.append(stream_id, frame)
+        except Exception as e:
+            logger.warning("Resumable stream producer failed", stream_id=stream_id, error=str(e))
+        finally:
+            await asyncio.shield(store.close(stream_id))
+
+    task = asyncio.create_task(produce())
+    _producers[stream_id] = task
+    task.add_done_callback(lambda _: _producers.pop(stream_id, None))
+
+
+async def _cancel_when_orphaned(stream_id: str) -> None:
+    """Cancel generation once no subscriber anywhere has a live heartbeat.
+
+    Checks every orphan grace period, so a client has at least that long to
+    reattach (on any replica) before the answer is abandoned.
+    """
+    store = get_stream_store()
+    while True:
+        await asyncio.sleep(RESUMABLE_STREAM_ORPHAN_GRACE_SECONDS)
+        producer = _producers.get(stream_id)
+        if producer is None:
+            return
+        try:
+            if await store.has_subscribers(stream_id):
+                continue
+        except Exception as e:
+            logger.warning("Subscriber check failed", stream_id=stream_id, error=str(e))
+            continue
+        logger.info("Cancelling orphaned resumable stream", stream_id=stream_id)
+        producer.cancel()
+        return
+
+
+async def _send_heartbeats(stream_id: str, subscriber_id: str) -> None:
+    """Keep a subscriber's heartbeat alive, removing it once cancelled."""
+    store = get_stream_store()
+    try:
+        while True:
+            await store.heartbeat(stream_id, subscriber_id, 3 * RESUMABLE_STREAM_HEARTBEAT_SECONDS)
+            await asyncio.sleep(RESUMABLE_STREAM_HEARTBEAT_SECONDS)
+    except Exception as e:
+        logger.warning("Subscriber heartbeat failed", stream_id=stream_id, error=str(e))
+    finally:
+        with contextlib.suppress(Exception):
+            await store.detach(stream_id, subscriber_id)
+
+
+async def subscribe(stream_id: str, last_event_id: int = 0) -> AsyncGenerator[bytes, None]:
+    """Replay frames after last_event_id and follow the live tail, with SSE ids.
+
+    When a subscriber of an in-flight stream detaches, generation is cancelled
+    unless some subscriber, on any replica, is attached within the orphan
+    grace period.
+    """
+    subscriber_id = uuid.uuid4().hex
+    heartbeats = asyncio.create_task(_send_heartbeats(stream_id, subscriber_id))
+    try:
+        async for event_id, frame in get_stream_store().read(stream_id, last_event_id):
+            yield b"id: %d\n" % event_id + frame
+    finally:
+        heartbeats.cancel()
+        if stream_id in _producers and stream_id not in _orphan_watchers:
+            watcher = asyncio.create_task(_cancel_when_orphaned(stream_id))
+            _orphan_watchers[stream_id] = watcher
+            watcher.add_done_callback(lambda _: _orphan_watchers.pop(stream_id, None))
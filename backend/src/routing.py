@@ -0,0 +1,90 @@
+"""Heuristic routing of chat turns to a low-latency model configuration.
+
+Short, simple turns ("thanks!", "ok, go ahead") gain nothing from Gemini's
+thinking tokens but still pay their latency. The route stage classifies the
+latest user turn with cheap local features and no LLM call:
+- length of the message
+- markers of a request that needs reasoning (why/how/explain, code, lists)
+- question marks, and how deep into the conversation the turn is
+
+Trivial turns go to ROUTER_FAST_MODEL (thinking disabled by default); every
+other turn keeps the selected model.
+"""
+
+import os
+import re
+
+from langchain_core.messages import BaseMessage, HumanMessage
+
+from backend.src.llm.registry import DEFAULT_CHAT_MODEL
+from backend.src.observability.metrics import CHAT_ROUTE_DECISIONS
+
+# Configuration from environment
+ROUTER_ENABLED = os.getenv("ROUTER_ENABLED", "true").lower() == "true"
+ROUTER_FAST_MODEL = os.getenv("ROUTER_FAST_MODEL", "chat-model-fast")
+# Longest message (in characters) that may be routed to the fast model
+ROUTER_MAX_CHARS = int(os.getenv("ROUTER_MAX_CHARS", "80"))
+# Questions are only routed early in a conversation, before context matters
+ROUTER_MAX_QUESTION_DEPTH = int(os.getenv("ROUTER_MAX_QUESTION_DEPTH", "2"))
+
+_REASONING_MARKERS = re.compile(
+    r"\b(why|how|explain|compare|analy[sz]e|debug|fix|write|draft|code|plan|step|"
+    r"summari[sz]e|calculate|prove|design|review|translate|list)\b",
+    re.IGNORECASE,
+)
+
+
+def classify_turn(messages: list[BaseMessage]) -> tuple[str, str]:
+    """Classify the latest user turn.
+
+    Args:
+        messages: The conversation, ending with the new user message.
+
+    Returns:
+        Tuple of (route, reason): route is "fast" or "default"; reason is a
+        low-cardinality label explaining the decision.
+    """
+    if not messages or not isinstance(messages[-1], HumanMessage):
+        return "default", "no_user_turn"
+
+    content = messages[-1].content
+    text = (content if isinstance(content, str) else str(content)).strip()
+    depth = sum(isinstance(message, HumanMessage) for message in messages) - 1
+
+    if len(text) > ROUTER_MAX_CHARS:
+        return "default", "long"
+    if "```" in text or "\n" in text:
+        return "default", "structured"
+    if _REASONING_MARKERS.search(text):
+        return "default", "reasoning"
+    if "?" in text and depth >= ROUTER_MAX_QUESTION_DEPTH:
+        return "default", "follow_up_question"
+    return "fast", "short"
+
+
+def route_turn(messages: list[BaseMessage], model_id: str, record: bool = True) -> str:
+    """Route a turn and record the decision.
+
+    Only turns on the default chat model are routed; an explicitly selected
+    model (e.g. the reasoning model) is always honoured.
+
+    Args:
+        messages: The conversation, ending with the new user message.
+        model_id: The chat model selected for the request.
+        record: Whether to count the decision (False to predict a route).
+
+    Returns:
+        "fast" to answer with ROUTER_FAST_MODEL, otherwise "default".
+    """
+    if not ROUTER_ENABLED or model_id != DEFAULT_CHAT_MODEL:
+        return "default"
+
+    route, reason = classify_turn(messages)
+    if record:
+        CHAT_ROUTE_DECISIONS.labels(route=route, reason=reason).inc()
+    return route
+
+
+def routed_model(model_id: str, route: str | None) -> str:
+    """The registry id that answers a turn on `model_id` given its route."""
+    return ROUTER_FAST_MODEL if route == "fast" else model_id
@@ -0,0 +1,82 @@
+"""Single-flight coalescing of concurrent identical calls.
+
+Retries and several tabs can fire the same request at once. Without
+coalescing each becomes its own Vertex call. A SingleFlight group runs one
+call per request fingerprint; every concurrent caller with the same
+fingerprint awaits the same task and receives its result (or exception).
+"""
+
+import asyncio
+import hashlib
+import json
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Any, Generic, TypeVar
+
+from backend.src.observability.metrics import SINGLEFLIGHT_CALLS
+
+T = TypeVar("T")
+
+
+@dataclass
+class _Call(Generic[T]):
+    """An in-flight call and the number of callers waiting on it."""
+
+    task: asyncio.Future[T]
+    waiters: int = 0
+
+
+class SingleFlight(Generic[T]):
+    """Deduplicate concurrent calls that share a key.
+
+    A caller that is cancelled only stops waiting; the shared call is
+    cancelled once no caller is left waiting for it.
+
+    Usage:
+        titles: SingleFlight[str] = SingleFlight("title")
+        title = await titles.do(fingerprint(model, prompt), lambda: llm_call(prompt))
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._calls: dict[str, _Call[T]] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """Run fn once for all concurrent callers with the same key.
+
+        Args:
+            key: Request fingerprint (see fingerprint()).
+            fn: Starts the call; only invoked by the first caller.
+
+        Returns:
+            The shared result.
+        """
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+            SINGLEFLIGHT_CALLS.labels(operation=self.name, result="leader").inc()
+        else:
+            SINGLEFLIGHT_CALLS.labels(operation=self.name, result="shared").inc()
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                call.task.cancel()
+
+    def _forget(self, key: str, call: _Call[T]) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+
+def fingerprint(*parts: Any) -> str:
+    """Build a request fingerprint from JSON-serialisable parts."""
+    payload = json.dumps(parts, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
@@ -1,18 +1,49 @@
 """Vercel AI SDK Data Stream Protocol implementation for LangGraph.
 
-Uses async astream_events() for proper event handling and tool visibility.
+Two streaming engines are available, selected by STREAM_ENGINE:
+- messages: astream(stream_mode=["messages", "updates"]) only delivers model
+  chunks and node state updates, so no per-callback event dicts are built
+  and filtered (default)
+- events: astream_events(version="v2") for full tool and subgraph visibility
+
+When a checkpointer is configured (CHAT_CHECKPOINTER), conversation history is
+kept server-side per chat id and each request only carries the new message.
 """
 
+import asyncio
+import contextlib
+import os
+import time
 import uuid
-from collections.abc import AsyncGenerator
+from collections.abc import AsyncGenerator, AsyncIterator
 from typing import Any
 
+from fastapi import Request
 from fastapi.responses import StreamingResponse
-from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
-
-from backend.src.graph import chatbot_graph
+from langchain_core.messages import (
+    AIMessage,
+    AIMessageChunk,
+    BaseMessage,
+    HumanMessage,
+    RemoveMessage,
+)
+from langchain_core.runnables import RunnableConfig
+from langgraph.constants import TAG_NOSTREAM
+from langgraph.graph.message import REMOVE_ALL_MESSAGES
+from langgraph.graph.state import CompiledStateGraph
+
+from backend.src.admission import AdmissionPermit, release_when_done
+from backend.src.chat_title import SPECULATIVE_TITLE_WAIT_SECONDS
+from backend.src.coalescer import TextDeltaCoalescer
+from backend.src.graph import get_chat_graph, get_checkpointed_graph
+from backend.src.llm.registry import DEFAULT_CHAT_MODEL
+from backend.src.message_cache import MessageConversionCache
+from backend.src.observability import get_logger
+from backend.src.observability.exceptions import ValidationError
+from backend.src.observability.metrics import STREAM_DURATION
 from backend.src.protocol import (
     AISDK_V5_HEADERS,
+    create_data_part,
     create_done_marker,
     create_error_event,
     create_finish_event,
@@ -23,23 +54,56 @@ from backend.src.protocol import (
     create_text_end,
     create_text_start,
 )
+from backend.src.resumable import start_resumable_stream, subscribe
+
+logger = get_logger(__name__)
+
+# Streaming engine: "messages" (low overhead) or "events" (tool/subgraph visibility)
+STREAM_ENGINE = os.getenv("STREAM_ENGINE", "messages")
+
+# Normalised engine events: (kind, value)
+# - ("text", str): a text chunk from the chat model
+# - ("usage", Any): usage metadata of a finished model call; flushes buffered text
+# - ("flush", None): a boundary (e.g. tool event) that buffered text must not cross
+# - ("title", str): the speculative chat title finished (see backend.src.chat_title)
+EngineEvent = tuple[str, Any]
+
+# Converted chat histories, reused across turns when the client resends them
+_conversion_cache = MessageConversionCache()
 
 
 async def stream_langgraph_response(
     messages: list[dict[str, Any]],
-) -> AsyncGenerator[str, None]:
+    engine: str | None = None,
+    chat_id: str | None = None,
+    history: str = "full",
+    model_id: str = DEFAULT_CHAT_MODEL,
+    latency_tier: str | None = None,
+    title: asyncio.Task[str] | None = None,
+) -> AsyncGenerator[bytes, None]:
     """Stream LangGraph responses using Vercel AI SDK Data Stream Protocol v5.
 
-    Uses astream_events() for proper event handling, enabling:
+    Enables:
     - Incremental text streaming
-    - Tool call visibility (for future agents)
+    - Tool call visibility (for future agents, with the events engine)
     - Usage metadata extraction
+    - Text-delta coalescing (see backend.src.coalescer)
+    - A speculative chat title, sent as a transient data-chatTitle part as
+      soon as it is ready
 
     Args:
         messages: List of message dicts with 'role' and 'content'/'parts'.
+        engine: "messages" or "events". Defaults to STREAM_ENGINE.
+        chat_id: Chat id used as the checkpointer thread id.
+        history: "full" when messages is the whole conversation, "delta" when
+            it only holds the new message(s) (requires a checkpointer).
+        model_id: Chat model id (see backend.src.llm.registry).
+        latency_tier: Optional latency tier overriding the model's (see
+            backend.src.llm.tiers).
+        title: Optional chat title task started alongside the stream.
 
     Yields:
-        SSE formatted strings for the Vercel AI SDK.
+        SSE frames (UTF-8 bytes) for the Vercel AI SDK.
     """
     message_id = f"msg-{uuid.uuid4().hex}"
     step_id = f"step-{uuid.uuid4().hex}"
@@ -47,56 +111,87 @@ async def stream_langgraph_response(
 
     text_started = False
     usage = {"promptTokens": 0, "completionTokens": 0}
-
-    # Convert messages to LangGraph format
-    langgraph_messages = convert_to_langgraph_messages(messages)
+    coalescer = TextDeltaCoalescer()
+    start_time = time.perf_counter()
+    status = "success"
+    title_sent = False
 
     # Emit start events
     yield create_start_event(message_id)
     yield create_start_step_event(step_id)
 
     try:
-        async for event in chatbot_graph.astream_events(
-            {"messages": langgraph_messages},
-            version="v2",
-        ):
-            event_type = event.get("event", "")
+        graph, graph_input, config = await prepare_graph_input(messages, chat_id, history, model_id)
+        if latency_tier:
+            configurable = {**(config or {}).get("configurable", {}), "latency_tier": latency_tier}
+            config = {**(config or {}), "configurable": configurable}
+        if (engine or STREAM_ENGINE) == "events":
+            events = _astream_events_engine(graph, graph_input, config)
+        else:
+            events = _astream_messages_engine(graph, graph_input, config)
+        if title is not None:
+            events = _with_title(events, title)
+
+        async for event in _with_flush_deadlines(events, coalescer):
+            # Coalescing window elapsed with no new event: release buffered text
+            if event is None:
+                for chunk_id, chunk_text in coalescer.flush():
+                    yield create_text_delta(chunk_id, chunk_text)
+                continue
+
+            kind, value = event
+
+            if kind == "title":
+                yield create_data_part("chatTitle", value, transient=True)
+                title_sent = True
+                continue
 
             # Handle text streaming from chat model
-            if event_type == "on_chat_model_stream":
-                data: dict[str, Any] = event.get("data", {})  # type: ignore[assignment]
-                chunk = data.get("chunk")
-                if chunk:
-                    content = _extract_content(chunk)
-                    if content:
-                        if not text_started:
-                            yield create_text_start(text_id)
-                            text_started = True
-                        yield create_text_delta(text_id, content)
-
-            # Extract usage from chat model end
-            elif event_type == "on_chat_model_end":
-                data = event.get("data", {})  # type: ignore[assignment]
-                output = data.get("output")
-                if output and hasattr(output, "usage_metadata"):
-                    meta = output.usage_metadata
-                    if isinstance(meta, dict):
-                        usage["promptTokens"] = meta.get("input_tokens", 0)
-                        usage["completionTokens"] = meta.get("output_tokens", 0)
-                    else:
-                        usage["promptTokens"] = getattr(meta, "input_tokens", 0)
-                        usage["completionTokens"] = getattr(meta, "output_tokens", 0)
+            if kind == "text":
+                if not text_started:
+                    yield create_text_start(text_id)
+                    text_started = True
+                for chunk_id, chunk_text in coalescer.add(text_id, value):
+                    yield create_text_delta(chunk_id, chunk_text)
+                continue
+
+            # Model call finished or tool boundary: never reorder behind buffered text
+            for chunk_id, chunk_text in coalescer.flush():
+                yield create_text_delta(chunk_id, chunk_text)
+            if kind == "usage" and value:
+                usage = _extract_usage(value)
 
         # End text stream if started
+        for chunk_id, chunk_text in coalescer.flush():
+            yield create_text_delta(chunk_id, chunk_text)
         if text_started:
             yield create_text_end(text_id)
 
+        # The answer beat the title: give it a moment to arrive in this stream.
+        # If it misses the stream it is still saved, and the sidebar shows it on refresh.
+        if title is not None and not title_sent:
+            late_title = None
+            with contextlib.suppress(Exception):
+                late_title = await asyncio.wait_for(
+                    asyncio.shield(title), SPECULATIVE_TITLE_WAIT_SECONDS
+                )
+            if late_title is not None:
+                yield create_data_part("chatTitle", late_title, transient=True)
+
         # Emit finish events
         yield create_finish_step_event("stop", usage)
         yield create_finish_event("stop", usage)
 
+    except (asyncio.CancelledError, GeneratorExit):
+        # Client went away and the stream was cancelled (see cancel_on_disconnect)
+        status = "cancelled"
+        raise
+
     except Exception as e:
         # Handle errors gracefully
+        status = "error"
+        for chunk_id, chunk_text in coalescer.flush():
+            yield create_text_delta(chunk_id, chunk_text)
         if not text_started:
             yield create_text_start(text_id)
         yield create_text_delta(text_id, f"Error: {e!s}")
@@ -105,10 +200,200 @@ async def stream_langgraph_response(
         yield create_finish_step_event("error", usage)
         yield create_finish_event("error", usage)
 
+    finally:
+        STREAM_DURATION.labels(status=status).observe(time.perf_counter() - start_time)
+
     # Signal end of stream
     yield create_done_marker()
 
 
+async def _astream_messages_engine(
+    graph: CompiledStateGraph,
+    graph_input: dict[str, Any],
+    config: RunnableConfig | None = None,
+) -> AsyncGenerator[EngineEvent, None]:
+    """Low-overhead engine: model chunks and node updates only."""
+    async for mode, payload in graph.astream(
+        graph_input,
+        config,
+        stream_mode=["messages", "updates"],
+    ):
+        if mode == "messages":
+            chunk, _metadata = payload
+            # Tool results are streamed in this mode too; only model output is text
+            if isinstance(chunk, AIMessageChunk):
+                content = _extract_content(chunk)
+                if content:
+                    yield ("text", content)
+
+        elif mode == "updates":
+            for update in payload.values():
+                for message in (update or {}).get("messages", []):
+                    if isinstance(message, AIMessage):
+                        yield ("usage", message.usage_metadata)
+
+
+async def _astream_events_engine(
+    graph: CompiledStateGraph,
+    graph_input: dict[str, Any],
+    config: RunnableConfig | None = None,
+) -> AsyncGenerator[EngineEvent, None]:
+    """Full-visibility engine built on astream_events(version="v2")."""
+    async for event in graph.astream_events(graph_input, config, version="v2"):
+        event_type = event.get("event", "")
+
+        # Internal model calls (e.g. context summaries) are not part of the answer
+        if TAG_NOSTREAM in event.get("tags", ()):
+            continue
+
+        # Handle text streaming from chat model
+        if event_type == "on_chat_model_stream":
+            data: dict[str, Any] = event.get("data", {})  # type: ignore[assignment]
+            chunk = data.get("chunk")
+            if chunk:
+                content = _extract_content(chunk)
+                if content:
+                    yield ("text", content)
+
+        # Extract usage from chat model end
+        elif event_type == "on_chat_model_end":
+            data = event.get("data", {})  # type: ignore[assignment]
+            output = data.get("output")
+            yield ("usage", getattr(output, "usage_metadata", None))
+
+        # Tool events must not be reordered behind buffered text
+        elif event_type.startswith("on_tool_"):
+            yield ("flush", None)
+
+
+def _extract_usage(meta: Any) -> dict[str, int]:
+    """Convert LangChain usage metadata to AI SDK usage counts."""
+    if isinstance(meta, dict):
+        return {
+            "promptTokens": meta.get("input_tokens", 0),
+            "completionTokens": meta.get("output_tokens", 0),
+        }
+    return {
+        "promptTokens": getattr(meta, "input_tokens", 0),
+        "completionTokens": getattr(meta, "output_tokens", 0),
+    }
+
+
+async def cancel_on_disconnect(
+    request: Request,
+    frames: AsyncGenerator[bytes, None],
+) -> AsyncGenerator[bytes, None]:
+    """Relay frames to the client, closing the generator however the response ends.
+
+    Starlette's StreamingResponse already watches for http.disconnect (uvicorn
+    speaks ASGI spec 2.3) and cancels the response when the client leaves.
+    That cancellation reaches the generator and cancels the in-flight model
+    call. This relay skips generation for a client that left before
+    streaming, and closes the generator even when the cancellation lands
+    between frames, outside it.
+
+    Args:
+        request: The incoming HTTP request, used to skip departed clients.
+        frames: The SSE frame generator to relay.
+
+    Yields:
+        SSE frames from the generator, until it finishes or the client leaves.
+    """
+    if await request.is_disconnected():
+        await frames.aclose()
+        return
+
+    try:
+        async for frame in frames:
+            yield frame
+    except asyncio.CancelledError:
+        logger.info("Client disconnected, cancelling stream")
+        raise
+    finally:
+        await frames.aclose()
+
+
+async def _pump(events: AsyncIterator[EngineEvent], queue: asyncio.Queue[Any]) -> None:
+    """Move events into a queue as ("event", e), ending with ("end", None) or ("error", e)."""
+    try:
+        async for event in events:
+            await queue.put(("event", event))
+    except Exception as e:
+        await queue.put(("error", e))
+    else:
+        await queue.put(("end", None))
+
+
+async def _with_title(
+    events: AsyncIterator[EngineEvent], title: asyncio.Task[str]
+) -> AsyncGenerator[EngineEvent, None]:
+    """Yield graph events, plus ("title", str) as soon as the title task finishes.
+
+    A failed title yields nothing. Stopping early never cancels the title task,
+    which still saves the title.
+    """
+    queue: asyncio.Queue[tuple[str, Any]] = asyncio.Queue(maxsize=64)
+
+    async def wait_title() -> None:
+        try:
+            value = await asyncio.shield(title)
+        except Exception:
+            return
+        await queue.put(("event", ("title", value)))
+
+    tasks = [asyncio.create_task(_pump(events, queue)), asyncio.create_task(wait_title())]
+    try:
+        while True:
+            kind, item = await queue.get()
+            if kind == "end":
+                return
+            if kind == "error":
+                raise item
+            yield item
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def _with_flush_deadlines(
+    events: AsyncIterator[EngineEvent],
+    coalescer: TextDeltaCoalescer,
+) -> AsyncGenerator[EngineEvent | None, None]:
+    """Yield graph events, plus None whenever the coalescer's window elapses.
+
+    Without this, buffered text would only be released when the next chunk
+    arrives, so a pause in generation would stall text on the client. Events
+    are pumped through a queue by a background task so waiting on a deadline
+    never cancels the underlying graph iterator.
+    """
+    if not coalescer.enabled:
+        async for event in events:
+            yield event
+        return
+
+    queue: asyncio.Queue[tuple[str, Any]] = asyncio.Queue(maxsize=64)
+    producer = asyncio.create_task(_pump(events, queue))
+    try:
+        while True:
+            timeout = coalescer.time_until_flush()
+            try:
+                kind, item = await asyncio.wait_for(queue.get(), timeout)
+            except TimeoutError:
+                yield None
+                continue
+
+            if kind == "end":
+                return
+            if kind == "error":
+                raise item
+            yield item
+    finally:
+        if not producer.done():
+            producer.cancel()
+            await asyncio.gather(producer, return_exceptions=True)
+
+
 def _extract_content(chunk: Any) -> str:
     """Extract text content from a LangChain message chunk."""
     if isinstance(chunk, dict):
@@ -130,50 +415,222 @@ def _extract_content(chunk: Any) -> str:
     return ""
 
 
-def convert_to_langgraph_messages(messages: list[dict[str, Any]]) -> list[BaseMessage]:
+def convert_to_langgraph_messages(
+    messages: list[dict[str, Any]],
+    chat_id: str | None = None,
+) -> list[BaseMessage]:
     """Convert frontend message format to LangGraph messages.
 
     Args:
         messages: List of message dicts from the frontend.
+        chat_id: Optional chat id; when given, the converted prefix from the
+            previous turn of this chat is reused (see backend.src.message_cache).
 
     Returns:
         List of LangChain BaseMessage objects.
     """
-    langgraph_messages: list[BaseMessage] = []
+    if chat_id:
+        return _conversion_cache.convert(chat_id, messages, _convert_message)
 
+    langgraph_messages: list[BaseMessage] = []
     for msg in messages:
-        role = msg.get("role", "user")
-        content = ""
-
-        # Extract content from parts or content field
-        if "parts" in msg and msg["parts"]:
-            for part in msg["parts"]:
-                if part.get("type") == "text":
-                    content += part.get("text", "")
-        elif "content" in msg:
-            content = msg["content"]
-
-        if role == "user":
-            langgraph_messages.append(HumanMessage(content=content))
-        elif role == "assistant":
-            langgraph_messages.append(AIMessage(content=content))
-
+        message = _convert_message(msg)
+        if message is not None:
+            langgraph_messages.append(message)
     return langgraph_messages
 
 
+def _convert_message(msg: dict[str, Any]) -> BaseMessage | None:
+    """Convert one frontend message, or None for unsupported roles."""
+    role = msg.get("role", "user")
+    if role == "user":
+        return HumanMessage(content=message_text(msg))
+    if role == "assistant":
+        return AIMessage(content=message_text(msg))
+    return None
+
+
+def message_text(msg: dict[str, Any]) -> str:
+    """Extract the text of a frontend message from its parts or content field."""
+    if "parts" in msg and msg["parts"]:
+        return "".join(part.get("text", "") for part in msg["parts"] if part.get("type") == "text")
+    return msg.get("content") or ""
+
+
+async def prepare_graph_input(
+    messages: list[dict[str, Any]],
+    chat_id: str | None = None,
+    history: str = "full",
+    model_id: str = DEFAULT_CHAT_MODEL,
+) -> tuple[CompiledStateGraph, dict[str, Any], RunnableConfig | None]:
+    """Select the graph and build its input for a chat turn.
+
+    The chat id is the run's thread id. Without a checkpointer (or chat id)
+    the full history is converted and sent as-is. With one, only new messages
+    are sent: in "delta" mode the request already holds just those; in "full"
+    (compatibility) mode the incoming history is reconciled against the stored
+    thread, so only the tail after the stored prefix is converted. If the
+    histories diverge (edited or regenerated messages), the thread is reset
+    to the incoming history.
+
+    Args:
+        messages: List of message dicts from the frontend.
+        chat_id: Chat id used as the checkpointer thread id.
+        history: "full" or "delta".
+        model_id: Chat model id; each model has its own compiled graph.
+
+    Returns:
+        Tuple of (graph, graph input, run config).
+    """
+    graph = get_checkpointed_graph(model_id)
+    config: RunnableConfig | None = {"configurable": {"thread_id": chat_id}} if chat_id else None
+    if graph is None or config is None:
+        graph_input = {"messages": convert_to_langgraph_messages(messages, chat_id)}
+        return get_chat_graph(model_id), graph_input, config
+    if history == "delta":
+        return graph, {"messages": convert_to_langgraph_messages(messages)}, config
+
+    incoming = [msg for msg in messages if msg.get("role") in ("user", "assistant")]
+    snapshot = await graph.aget_state(config)
+    stored: list[BaseMessage] = snapshot.values.get("messages", [])
+
+    if len(stored) < len(incoming) and all(
+        _same_message(old, new) for old, new in zip(stored, incoming, strict=False)
+    ):
+        new_messages = convert_to_langgraph_messages(incoming[len(stored) :])
+        return graph, {"messages": new_messages}, config
+
+    if stored:
+        logger.info("Chat history diverged from checkpoint, resetting thread", chat_id=chat_id)
+    reset: list[BaseMessage] = [RemoveMessage(id=REMOVE_ALL_MESSAGES)]
+    graph_input = {
+        "messages": reset + convert_to_langgraph_messages(incoming),
+        "summary": None,
+        "summary_start": 0,
+        "context_start": 0,
+    }
+    return graph, graph_input, config
+
+
+async def rewind_thread(
+    chat_id: str, history_length: int, model_id: str = DEFAULT_CHAT_MODEL
+) -> None:
+    """Check a chat's checkpointed thread against the client's history before a delta turn.
+
+    Editing or regenerating a message deletes the later messages from the
+    database, but not from the thread. When the thread holds more messages
+    than the client's history, the extra turns are removed (with the summary,
+    if it covered them). When it holds fewer, it cannot be repaired from a
+    delta.
+
+    Args:
+        chat_id: Chat id used as the checkpointer thread id.
+        history_length: Number of messages the client holds before the new one.
+        model_id: Chat model id; each model has its own compiled graph.
+
+    Raises:
+        ValidationError: (409) If the thread is missing messages; the client
+            should resend the full history.
+    """
+    graph = get_checkpointed_graph(model_id)
+    if graph is None:
+        return
+    config: RunnableConfig = {"configurable": {"thread_id": chat_id}}
+    snapshot = await graph.aget_state(config)
+    stored: list[BaseMessage] = snapshot.values.get("messages", [])
+    if len(stored) == history_length:
+        return
+    if len(stored) < history_length:
+        raise ValidationError(
+            "Server-side chat history is incomplete, resend the full history",
+            code="history_mismatch",
+            status_code=409,
+            details={"stored": len(stored), "expected": history_length},
+        )
+
+    logger.info(
+        "Rewinding chat thread to client history",
+        chat_id=chat_id,
+        removed=len(stored) - history_length,
+    )
+    update: dict[str, Any] = {
+        "messages": [
+            RemoveMessage(id=message.id) for message in stored[history_length:] if message.id
+        ]
+    }
+    if snapshot.values.get("summary_start", 0) > history_length:
+        update.update(summary=None, summary_start=0, context_start=0)
+    await graph.aupdate_state(config, update, as_node="chatbot")
+
+
+def _same_message(stored: BaseMessage, incoming: dict[str, Any]) -> bool:
+    """Check whether a checkpointed message matches an incoming frontend message."""
+    if isinstance(stored, HumanMessage):
+        role = "user"
+    elif isinstance(stored, AIMessage):
+        role = "assistant"
+    else:
+        return False
+    return role == incoming.get("role") and _extract_content(stored) == message_text(incoming)
+
+
 async def create_streaming_response(
     messages: list[dict[str, Any]],
+    stream_id: str | None = None,
+    request: Request | None = None,
+    chat_id: str | None = None,
+    history: str = "full",
+    permit: AdmissionPermit | None = None,
+    model_id: str = DEFAULT_CHAT_MODEL,
+    latency_tier: str | None = None,
+    title: asyncio.Task[str] | None = None,
 ) -> StreamingResponse:
     """Create a FastAPI StreamingResponse with proper headers.
 
+    When a stream id (the Stream table id) is given, generation runs in the
+    background and is recorded in the resumable stream store, so a client can
+    reconnect with Last-Event-ID instead of triggering a new generation.
+
+    When the request is given, a client disconnect cancels the response. For
+    resumable streams this detaches the subscriber; generation is cancelled
+    once no subscriber has reattached within the orphan grace period.
+
     Args:
         messages: List of message dicts from the frontend.
+        stream_id: Optional Stream table id enabling resumption.
+        request: Optional incoming request, enabling disconnect cancellation.
+        chat_id: Chat id used as the checkpointer thread id.
+        history: "full" or "delta" (see prepare_graph_input).
+        permit: Optional admission permit, released when generation ends.
+        model_id: Chat model id (see backend.src.llm.registry).
+        latency_tier: Optional latency tier overriding the model's.
+        title: Optional chat title task, sent as a data part when ready.
 
     Returns:
         StreamingResponse configured for Vercel AI SDK v5.
     """
+    frames = stream_langgraph_response(
+        messages,
+        chat_id=chat_id,
+        history=history,
+        model_id=model_id,
+        latency_tier=latency_tier,
+        title=title,
+    )
+    if permit is not None:
+        frames = release_when_done(frames, permit)
+    body: AsyncGenerator[bytes, None]
+    if stream_id:
+        await start_resumable_stream(stream_id, frames)
+        body = subscribe(stream_id)
+    else:
+        body = frames
+
+    if request is not None:
+        body = cancel_on_disconnect(request, body)
+
     return StreamingResponse(
-        stream_langgraph_response(messages),
+        body,
         media_type="text/event-stream",
         headers=AISDK_V5_HEADERS,
     )
@@ -0,0 +1,5 @@
+"""Performance benchmarks for the Knowsee backend.
+
+Benchmarks are plain modules run with ``python -m bench.<name>``. They are not
+collected by pytest and never call real LLM providers.
+"""
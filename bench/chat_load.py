@@ -0,0 +1,420 @@
+"""Load test for /api/chat: many concurrent SSE streams against the fake model.
+
+Drives the real FastAPI app through httpx, either in-process (a streaming
+ASGI transport, so time-to-first-byte is measured per frame rather than after
+the whole body is buffered) or against a uvicorn subprocess. The chat model is
+the deterministic FakeStreamingChatModel (CHAT_MODEL_PROVIDER=fake) and
+admission limits are lifted, so the numbers describe our own overhead:
+routing, middleware, LangGraph, the stream engine and SSE encoding.
+
+Reports p50/p95/p99 time-to-first-byte and time-to-first-text-delta, frames
+per second, server CPU per stream and RSS growth, and writes the results as
+JSON so runs can be compared across commits. In asgi mode client and server
+share one process, so CPU and RSS include the client's share.
+
+Usage:
+    python -m bench.chat_load
+    python -m bench.chat_load --streams 5000 --mode uvicorn --output load.json
+    python -m bench.chat_load --ttft-ms 0 --itl-ms 0 --tokens 500
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from collections.abc import AsyncIterator
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from typing import Any
+
+import httpx
+
+MODES = ("asgi", "uvicorn")
+
+
+def _server_env(args: argparse.Namespace) -> dict[str, str]:
+    """Environment for the app under test: fake model, no admission limits."""
+    return {
+        "CHAT_MODEL_PROVIDER": "fake",
+        "FAKE_LLM_TTFT_MS": str(args.ttft_ms),
+        "FAKE_LLM_ITL_MS": str(args.itl_ms),
+        "FAKE_LLM_ITL_DISTRIBUTION": args.itl_distribution,
+        "FAKE_LLM_OUTPUT_TOKENS": str(args.tokens),
+        "FAKE_LLM_ERROR_RATE": str(args.error_rate),
+        "ADMISSION_MAX_CONCURRENT_STREAMS": "0",
+        "RATE_LIMIT_REGISTERED": "0",
+        "LOG_LEVEL": "WARNING",
+    }
+
+
+def _process_usage(pid: int) -> tuple[float, int]:
+    """Return (CPU seconds, resident bytes) of a process.
+
+    Reads /proc on Linux; elsewhere only the current process is supported,
+    with peak RSS standing in for current RSS.
+    """
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            # Skip "pid (comm)", which may contain spaces
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open(f"/proc/{pid}/statm") as f:
+            pages = int(f.read().split()[1])
+        ticks = os.sysconf("SC_CLK_TCK")
+        return (int(fields[11]) + int(fields[12])) / ticks, pages * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        if pid != os.getpid():
+            raise
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        scale = 1 if sys.platform == "darwin" else 1024
+        return usage.ru_utime + usage.ru_stime, usage.ru_maxrss * scale
+
+
+class _QueueStream(httpx.AsyncByteStream):
+    """Response body fed by the app's http.response.body messages."""
+
+    def __init__(
+        self, queue: asyncio.Queue[bytes | None], task: asyncio.Task, disconnect: asyncio.Event
+    ) -> None:
+        self._queue = queue
+        self._task = task
+        self._disconnect = disconnect
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        while (chunk := await self._queue.get()) is not None:
+            yield chunk
+
+    async def aclose(self) -> None:
+        self._disconnect.set()
+        await self._task
+
+
+class StreamingASGITransport(httpx.AsyncBaseTransport):
+    """ASGI transport that returns the response as soon as headers are sent.
+
+    httpx.ASGITransport buffers the whole body before returning, which hides
+    time-to-first-byte; this transport relays body chunks as they are sent.
+    """
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        body = await request.aread()
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": request.method,
+            "headers": [(k.lower(), v) for k, v in request.headers.raw],
+            "scheme": request.url.scheme,
+            "path": request.url.path,
+            "raw_path": request.url.raw_path.split(b"?")[0],
+            "query_string": request.url.query,
+            "server": (request.url.host, request.url.port or 80),
+            "client": ("127.0.0.1", 123),
+            "root_path": "",
+        }
+        queue: asyncio.Queue[bytes | None] = asyncio.Queue()
+        started: asyncio.Future[tuple[int, list[tuple[bytes, bytes]]]] = (
+            asyncio.get_running_loop().create_future()
+        )
+        disconnect = asyncio.Event()
+        request_sent = False
+
+        async def receive() -> dict[str, Any]:
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            await disconnect.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message: dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                started.set_result((message["status"], message.get("headers", [])))
+            elif message["type"] == "http.response.body":
+                if message.get("body"):
+                    queue.put_nowait(message["body"])
+                if not message.get("more_body", False):
+                    queue.put_nowait(None)
+
+        async def run_app() -> None:
+            try:
+                await self.app(scope, receive, send)
+            except Exception as e:
+                if not started.done():
+                    started.set_exception(e)
+            finally:
+                queue.put_nowait(None)
+
+        task = asyncio.create_task(run_app())
+        status, headers = await started
+        return httpx.Response(status, headers=headers, stream=_QueueStream(queue, task, disconnect))
+
+
+@dataclass
+class StreamResult:
+    """Timings of one chat stream, in seconds from sending the request."""
+
+    ok: bool = False
+    ttfb: float | None = None
+    ttft: float | None = None
+    total: float = 0.0
+    frames: int = 0
+    text_deltas: int = 0
+    error: str | None = None
+
+
+async def _run_stream(client: httpx.AsyncClient, index: int) -> StreamResult:
+    """Send one chat request and parse its AI SDK frames."""
+    result = StreamResult()
+    body = {
+        "id": f"bench-{index}",
+        "userId": f"bench-user-{index}",
+        "messages": [{"role": "user", "content": f"Benchmark prompt {index}"}],
+    }
+    start = time.perf_counter()
+    try:
+        async with client.stream("POST", "/api/chat", json=body) as response:
+            if response.status_code != 200:
+                result.error = f"http {response.status_code}"
+                return result
+            buffer = b""
+            async for chunk in response.aiter_bytes():
+                if result.ttfb is None:
+                    result.ttfb = time.perf_counter() - start
+                buffer += chunk
+                *frames, buffer = buffer.split(b"\n\n")
+                for frame in frames:
+                    if not frame.startswith(b"data: "):
+                        continue
+                    result.frames += 1
+                    payload = frame[len(b"data: ") :]
+                    if payload == b"[DONE]":
+                        result.ok = result.error is None
+                        continue
+                    event = json.loads(payload)
+                    if event["type"] == "text-delta":
+                        result.text_deltas += 1
+                        if result.ttft is None:
+                            result.ttft = time.perf_counter() - start
+                    elif event["type"] == "error":
+                        result.error = event.get("errorText", "error")
+    except httpx.HTTPError as e:
+        result.error = type(e).__name__
+    finally:
+        result.total = time.perf_counter() - start
+    return result
+
+
+def _percentiles(values: list[float]) -> dict[str, float | None]:
+    """p50/p95/p99 in milliseconds."""
+    if len(values) < 2:
+        value = values[0] * 1000 if values else None
+        return {"p50": value, "p95": value, "p99": value}
+    cuts = statistics.quantiles(values, n=100, method="inclusive")
+    return {"p50": cuts[49] * 1000, "p95": cuts[94] * 1000, "p99": cuts[98] * 1000}
+
+
+@dataclass
+class LoadReport:
+    """Aggregate results of a load run."""
+
+    streams: int
+    succeeded: int
+    errors: dict[str, int]
+    wall_seconds: float
+    ttfb_ms: dict[str, float | None]
+    ttft_ms: dict[str, float | None]
+    total_ms: dict[str, float | None]
+    frames_per_second: float
+    text_deltas_per_second: float
+    cpu_ms_per_stream: float | None
+    rss_growth_mb: float | None
+    config: dict[str, Any] = field(default_factory=dict)
+
+
+async def _drive(
+    client: httpx.AsyncClient, streams: int, concurrency: int
+) -> tuple[list[StreamResult], float]:
+    """Run all streams with at most `concurrency` in flight."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(index: int) -> StreamResult:
+        async with semaphore:
+            return await _run_stream(client, index)
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(one(i) for i in range(streams)))
+    return results, time.perf_counter() - start
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def _wait_ready(client: httpx.AsyncClient, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            if (await client.get("/health")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        if time.monotonic() > deadline:
+            raise RuntimeError("uvicorn did not become healthy")
+        await asyncio.sleep(0.2)
+
+
+async def run(args: argparse.Namespace) -> LoadReport:
+    """Run the load test described by the parsed command line."""
+    concurrency = args.concurrency or args.streams
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    timeout = httpx.Timeout(args.timeout)
+
+    if args.mode == "asgi":
+        os.environ.update(_server_env(args))
+        from backend.src.app import app
+
+        async with app.router.lifespan_context(app):
+            transport = StreamingASGITransport(app)
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://bench", timeout=timeout
+            ) as client:
+                await _drive(client, min(args.warmup, args.streams), concurrency)
+                cpu_before, rss_before = _process_usage(os.getpid())
+                results, wall = await _drive(client, args.streams, concurrency)
+                cpu_after, rss_after = _process_usage(os.getpid())
+    else:
+        port = _free_port()
+        server = subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "uvicorn",
+                "backend.src.app:app",
+                "--port",
+                str(port),
+                "--log-level",
+                "warning",
+                "--no-access-log",
+            ],
+            env={**os.environ, **_server_env(args)},
+        )
+        try:
+            async with httpx.AsyncClient(
+                base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=timeout
+            ) as client:
+                await _wait_ready(client)
+                await _drive(client, min(args.warmup, args.streams), concurrency)
+                cpu_before, rss_before = _process_usage(server.pid)
+                results, wall = await _drive(client, args.streams, concurrency)
+                cpu_after, rss_after = _process_usage(server.pid)
+        finally:
+            server.terminate()
+            server.wait(timeout=10)
+
+    errors: dict[str, int] = {}
+    for result in results:
+        if not result.ok:
+            key = result.error or "incomplete"
+            errors[key] = errors.get(key, 0) + 1
+    frames = sum(r.frames for r in results)
+    deltas = sum(r.text_deltas for r in results)
+
+    return LoadReport(
+        streams=args.streams,
+        succeeded=sum(r.ok for r in results),
+        errors=errors,
+        wall_seconds=wall,
+        ttfb_ms=_percentiles([r.ttfb for r in results if r.ttfb is not None]),
+        ttft_ms=_percentiles([r.ttft for r in results if r.ttft is not None]),
+        total_ms=_percentiles([r.total for r in results]),
+        frames_per_second=frames / wall,
+        text_deltas_per_second=deltas / wall,
+        cpu_ms_per_stream=(cpu_after - cpu_before) / args.streams * 1000,
+        rss_growth_mb=(rss_after - rss_before) / 2**20,
+        config={
+            "mode": args.mode,
+            "streams": args.streams,
+            "concurrency": concurrency,
+            "ttft_ms": args.ttft_ms,
+            "itl_ms": args.itl_ms,
+            "itl_distribution": args.itl_distribution,
+            "tokens": args.tokens,
+            "error_rate": args.error_rate,
+        },
+    )
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _print(report: LoadReport) -> None:
+    print(f"streams      {report.succeeded}/{report.streams} ok in {report.wall_seconds:.2f}s")
+    if report.errors:
+        print(f"errors       {report.errors}")
+    print(f"{'metric':<12} {'p50':>9} {'p95':>9} {'p99':>9}")
+    for name, values in (
+        ("ttfb ms", report.ttfb_ms),
+        ("ttft ms", report.ttft_ms),
+        ("total ms", report.total_ms),
+    ):
+        cells = [f"{v:>9.1f}" if v is not None else f"{'-':>9}" for v in values.values()]
+        print(f"{name:<12} {' '.join(cells)}")
+    print(f"frames/s     {report.frames_per_second:.0f}")
+    print(f"deltas/s     {report.text_deltas_per_second:.0f}")
+    print(f"cpu/stream   {report.cpu_ms_per_stream:.2f} ms")
+    print(f"rss growth   {report.rss_growth_mb:.1f} MB")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--streams", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=0, help="0 = all streams at once")
+    parser.add_argument("--mode", choices=MODES, default="asgi")
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--ttft-ms", type=float, default=200.0)
+    parser.add_argument("--itl-ms", type=float, default=20.0)
+    parser.add_argument(
+        "--itl-distribution", choices=("constant", "uniform", "exponential"), default="constant"
+    )
+    parser.add_argument("--tokens", type=int, default=100)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--timeout", type=float, default=300.0)
+    parser.add_argument("--output", help="Write JSON results to this path")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    _print(report)
+
+    if args.output:
+        document = {
+            "benchmark": "chat_load",
+            "commit": _git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            **asdict(report),
+        }
+        with open(args.output, "w") as f:
+            json.dump(document, f, indent=2)
+        print(f"wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Micro-benchmark for SSE frame encoding in backend/src/protocol.py.
+
+Compares the legacy path (build a dict, json.dumps, wrap in an f-string, then
+encode to bytes as Starlette does) against the precomputed byte-level helpers.
+
+Usage:
+    python -m bench.sse_encoder
+    python -m bench.sse_encoder --iterations 500000
+"""
+
+import argparse
+import json
+import timeit
+from collections.abc import Callable
+
+from backend.src.protocol import (
+    create_start_event,
+    create_text_delta,
+    create_text_end,
+    create_text_start,
+)
+
+TEXT_ID = "text-0123456789abcdef0123456789abcdef"
+SAMPLE_DELTAS = {
+    "short": "Hello",
+    "sentence": "The quick brown fox jumps over the lazy dog. ",
+    "unicode": 'Café — 你好 \U0001f600 "quoted"\n',
+    "paragraph": "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 8,
+}
+
+
+def _legacy(payload: dict[str, str]) -> bytes:
+    """Frame encoding as it was done before the byte-level helpers."""
+    text = f"data: {json.dumps(payload, separators=(',', ':'), ensure_ascii=False)}\n\n"
+    return text.encode("utf-8")
+
+
+def _time_ns(func: Callable[[], bytes], iterations: int) -> float:
+    """Return the best-of-five per-call cost of func in nanoseconds."""
+    timer = timeit.Timer(func)
+    return min(timer.repeat(repeat=5, number=iterations)) / iterations * 1e9
+
+
+def run(iterations: int) -> list[tuple[str, float, float]]:
+    """Run all cases, returning (name, legacy_ns, fast_ns) rows."""
+    rows: list[tuple[str, float, float]] = []
+
+    for name, delta in SAMPLE_DELTAS.items():
+        payload = {"type": "text-delta", "id": TEXT_ID, "delta": delta}
+        assert _legacy(payload) == create_text_delta(TEXT_ID, delta)
+        rows.append(
+            (
+                f"text-delta/{name}",
+                _time_ns(lambda p=payload: _legacy(p), iterations),
+                _time_ns(lambda d=delta: create_text_delta(TEXT_ID, d), iterations),
+            )
+        )
+
+    lifecycle: list[tuple[str, dict[str, str], Callable[[], bytes]]] = [
+        (
+            "start",
+            {"type": "start", "messageId": TEXT_ID},
+            lambda: create_start_event(TEXT_ID),
+        ),
+        ("text-start", {"type": "text-start", "id": TEXT_ID}, lambda: create_text_start(TEXT_ID)),
+        ("text-end", {"type": "text-end", "id": TEXT_ID}, lambda: create_text_end(TEXT_ID)),
+    ]
+    for name, payload, fast in lifecycle:
+        assert _legacy(payload) == fast()
+        rows.append(
+            (name, _time_ns(lambda p=payload: _legacy(p), iterations), _time_ns(fast, iterations))
+        )
+
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200_000)
+    args = parser.parse_args()
+
+    print(f"{'case':<22} {'legacy ns':>10} {'bytes ns':>10} {'speedup':>8}")
+    for name, legacy_ns, fast_ns in run(args.iterations):
+        print(f"{name:<22} {legacy_ns:>10.0f} {fast_ns:>10.0f} {legacy_ns / fast_ns:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Benchmark per-token overhead of the two streaming engines in stream.py.
+
+Runs the real compiled chatbot graph against a stub chat model that streams
+a fixed number of tokens with no network or sleep, so the measured time is
+our own overhead: LangGraph dispatch, engine filtering and SSE encoding.
+Coalescing is disabled so every token produces a frame.
+
+Usage:
+    python -m bench.stream_engines
+    python -m bench.stream_engines --tokens 2000 --runs 20
+"""
+
+import argparse
+import asyncio
+import time
+from unittest.mock import patch
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+
+from backend.src.llm import get_model_registry
+from backend.src.stream import stream_langgraph_response
+
+ENGINES = ("events", "messages")
+
+
+def _stub_model(tokens: int) -> GenericFakeChatModel:
+    """A chat model that streams `tokens` whitespace-separated tokens forever."""
+    text = " ".join(f"tok{i}" for i in range(tokens))
+    return GenericFakeChatModel(messages=iter(lambda: AIMessage(content=text), None))
+
+
+async def _run_once(engine: str) -> tuple[float, int]:
+    """Consume one full stream, returning (seconds, frame count)."""
+    start = time.perf_counter()
+    frames = 0
+    async for _ in stream_langgraph_response([{"role": "user", "content": "Hi"}], engine=engine):
+        frames += 1
+    return time.perf_counter() - start, frames
+
+
+async def run(tokens: int, runs: int) -> dict[str, float]:
+    """Return the best per-token cost in microseconds for each engine."""
+    results: dict[str, float] = {}
+    with (
+        get_model_registry().override("chat-model", _stub_model(tokens)),
+        patch("backend.src.routing.ROUTER_ENABLED", False),
+        patch("backend.src.coalescer.STREAM_COALESCE_WINDOW_MS", 0),
+    ):
+        for engine in ENGINES:
+            await _run_once(engine)  # warm up
+            best = min([(await _run_once(engine))[0] for _ in range(runs)])
+            # The fake model streams each token and each separating space
+            results[engine] = best / (tokens * 2 - 1) * 1e6
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tokens", type=int, default=1000)
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.tokens, args.runs))
+    print(f"{'engine':<10} {'us/chunk':>10}")
+    for engine, per_token in results.items():
+        print(f"{engine:<10} {per_token:>10.1f}")
+    print(f"speedup    {results['events'] / results['messages']:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
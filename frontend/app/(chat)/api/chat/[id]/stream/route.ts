@@ -8,22 +8,18 @@ import {
 } from "@/lib/db/queries";
 import type { Chat } from "@/lib/db/types";
 import { ChatSDKError } from "@/lib/errors";
-import { getStreamContext } from "@/lib/stream-context";
 import type { ChatMessage } from "@/lib/types";
 
+const BACKEND_URL = process.env.BACKEND_URL || "http://localhost:8000";
+
 export async function GET(
-  _: Request,
+  request: Request,
   { params }: { params: Promise<{ id: string }> }
 ) {
   const { id: chatId } = await params;
 
-  const streamContext = getStreamContext();
   const resumeRequestedAt = new Date();
 
-  if (!streamContext) {
-    return new Response(null, { status: 204 });
-  }
-
   if (!chatId) {
     return new ChatSDKError("bad_request:api").toResponse();
   }
@@ -67,15 +63,33 @@ export async function GET(
     execute: () => {},
   });
 
-  const stream = await streamContext.resumableStream(recentStreamId, () =>
-    emptyDataStream.pipeThrough(new JsonToSseTransformStream())
-  );
+  // The backend replays the stream from its resumable stream store and
+  // follows the live tail; Last-Event-ID skips frames the client already has
+  const lastEventId = request.headers.get("Last-Event-ID");
+  let backendResponse: Response | null = null;
+
+  try {
+    backendResponse = await fetch(
+      `${BACKEND_URL}/api/chat/stream/${recentStreamId}`,
+      {
+        headers: lastEventId ? { "Last-Event-ID": lastEventId } : {},
+        signal: request.signal,
+      }
+    );
+  } catch (error) {
+    console.error("Backend stream resume error:", error);
+  }
 
   /*
    * For when the generation is streaming during SSR
-   * but the resumable stream has concluded at this point.
+   * but the resumable stream has concluded at this point
+   * (the backend answers 204 once the stream has expired).
    */
-  if (!stream) {
+  if (
+    !backendResponse?.ok ||
+    backendResponse.status === 204 ||
+    !backendResponse.body
+  ) {
     const messages = await getMessagesByChatId({ id: chatId });
     const mostRecentMessage = messages.at(-1);
 
@@ -109,5 +123,12 @@ export async function GET(
     );
   }
 
-  return new Response(stream, { status: 200 });
+  return new Response(backendResponse.body, {
+    status: 200,
+    headers: {
+      "Content-Type": "text/event-stream",
+      "Cache-Control": "no-cache",
+      "x-vercel-ai-ui-message-stream": "v1",
+    },
+  });
 }
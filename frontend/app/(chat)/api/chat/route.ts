@@ -3,6 +3,7 @@ import { auth } from "@/app/(auth)/auth";
 import type { VisibilityType } from "@/components/visibility-selector";
 import { userEntitlements } from "@/lib/ai/entitlements";
 import type { ChatModel } from "@/lib/ai/models";
+import { guestRegex } from "@/lib/constants";
 import {
   createStreamId,
   deleteChatById,
@@ -11,6 +12,7 @@ import {
   getMessagesByChatId,
   saveChat,
   saveMessages,
+  updateChatTitleById,
 } from "@/lib/db/queries";
 import type { DBMessage } from "@/lib/db/types";
 import { ChatSDKError } from "@/lib/errors";
@@ -22,13 +24,25 @@ import { type PostRequestBody, postRequestBodySchema } from "./schema";
 export const maxDuration = 60;
 
 const BACKEND_URL = process.env.BACKEND_URL || "http://localhost:8000";
+// "delta" sends only the new message (requires CHAT_CHECKPOINTER on the backend)
+const BACKEND_CHAT_HISTORY = process.env.BACKEND_CHAT_HISTORY || "full";
+// "redis" when the backend's ADMISSION_BACKEND is redis: its per-user buckets
+// are then the durable daily entitlement, so the message count is skipped
+const BACKEND_ADMISSION = process.env.BACKEND_ADMISSION || "memory";
+// Placeholder until the chat's title is saved
+const NEW_CHAT_TITLE = "New chat";
 
 /**
  * Parse SSE stream from backend and extract text content.
  */
 async function* parseBackendSSE(
   response: Response
-): AsyncGenerator<{ type: string; text?: string; delta?: string }> {
+): AsyncGenerator<{
+  type: string;
+  text?: string;
+  delta?: string;
+  data?: string;
+}> {
   const reader = response.body?.getReader();
   if (!reader) {
     return;
@@ -97,13 +111,17 @@ export async function POST(request: Request) {
       return new ChatSDKError("unauthorized:chat").toResponse();
     }
 
-    const messageCount = await getMessageCountByUserId({
-      id: session.user.id,
-      differenceInHours: 24,
-    });
+    // In-memory backend buckets reset on restart and apply per replica, so
+    // the 24-hour message count stays the daily entitlement (429 below)
+    if (BACKEND_ADMISSION !== "redis") {
+      const messageCount = await getMessageCountByUserId({
+        id: session.user.id,
+        differenceInHours: 24,
+      });
 
-    if (messageCount > userEntitlements.maxMessagesPerDay) {
-      return new ChatSDKError("rate_limit:chat").toResponse();
+      if (messageCount > userEntitlements.maxMessagesPerDay) {
+        return new ChatSDKError("rate_limit:chat").toResponse();
+      }
     }
 
     const chat = await getChatById({ id });
@@ -115,14 +133,12 @@ export async function POST(request: Request) {
       }
       messagesFromDb = await getMessagesByChatId({ id });
     } else {
-      const title = await generateTitleFromUserMessage({
-        message,
-      });
-
+      // The backend generates the real title alongside the first answer
+      // (generateTitle below) and streams it back as a data-chatTitle part
       await saveChat({
         id,
         userId: session.user.id,
-        title,
+        title: NEW_CHAT_TITLE,
         visibility: selectedVisibilityType,
       });
     }
@@ -144,26 +160,52 @@ export async function POST(request: Request) {
     const streamId = generateUUID();
     await createStreamId({ streamId, chatId: id });
 
-    // Build message history for backend
-    const uiMessages = [...convertToUIMessages(messagesFromDb), message];
-    const backendMessages = uiMessages.map((msg) => ({
-      role: msg.role,
-      parts: msg.parts,
-    }));
-
-    // Call backend streaming endpoint
-    const backendResponse = await fetch(`${BACKEND_URL}/api/chat`, {
-      method: "POST",
-      headers: {
-        "Content-Type": "application/json",
-      },
-      body: JSON.stringify({
-        id: message.id,
-        messages: backendMessages,
-        selectedChatModel,
-        selectedVisibilityType,
-      }),
-    });
+    // Messages before the new one (a regenerated message is already saved)
+    const historyFromDb = messagesFromDb.filter((msg) => msg.id !== message.id);
+
+    // Call backend streaming endpoint. With server-side history the backend
+    // only needs the new message, plus the history length so it can rewind
+    // turns deleted by an edit or regenerate.
+    const callBackend = (sendDelta: boolean) =>
+      fetch(`${BACKEND_URL}/api/chat`, {
+        method: "POST",
+        headers: {
+          "Content-Type": "application/json",
+        },
+        body: JSON.stringify({
+          id: message.id,
+          chatId: id,
+          messages: sendDelta
+            ? []
+            : [...convertToUIMessages(historyFromDb), message].map((msg) => ({
+                role: msg.role,
+                parts: msg.parts,
+              })),
+          message: sendDelta
+            ? { role: message.role, parts: message.parts }
+            : undefined,
+          historyLength: sendDelta ? historyFromDb.length : undefined,
+          selectedChatModel,
+          selectedVisibilityType,
+          streamId,
+          userId: session.user.id,
+          userType: guestRegex.test(session.user.email ?? "")
+            ? "guest"
+            : "registered",
+          generateTitle: !chat,
+        }),
+      });
+
+    let backendResponse = await callBackend(BACKEND_CHAT_HISTORY === "delta");
+
+    // The server-side history is missing turns: send the full history instead
+    if (backendResponse.status === 409) {
+      backendResponse = await callBackend(false);
+    }
+
+    if (backendResponse.status === 429) {
+      return new ChatSDKError("rate_limit:chat").toResponse();
+    }
 
     if (!backendResponse.ok) {
       const errorText = await backendResponse
@@ -177,8 +219,9 @@ export async function POST(request: Request) {
       return new ChatSDKError("offline:chat").toResponse();
     }
 
-    // Track accumulated text for saving
+    // Track accumulated text and the chat title for saving
     let accumulatedText = "";
+    let chatTitle: string | undefined;
     const messageId = generateUUID();
 
     // Create UI message stream that wraps backend response
@@ -204,6 +247,13 @@ export async function POST(request: Request) {
               id: messageId,
               delta: event.delta,
             });
+          } else if (event.type === "data-chatTitle" && event.data) {
+            chatTitle = event.data;
+            writer.write({
+              type: "data-chatTitle",
+              data: event.data,
+              transient: true,
+            });
           }
         }
 
@@ -212,6 +262,25 @@ export async function POST(request: Request) {
           type: "text-end",
           id: messageId,
         });
+
+        // A new chat must not keep its placeholder title. The backend sends
+        // none when speculative titles are off or the title task failed, and
+        // its own save can fail, so save the title here before the stream ends.
+        if (!chat) {
+          if (!chatTitle) {
+            chatTitle = await generateTitleFromUserMessage({ message });
+            writer.write({
+              type: "data-chatTitle",
+              data: chatTitle,
+              transient: true,
+            });
+          }
+          await updateChatTitleById({
+            chatId: id,
+            userId: session.user.id,
+            title: chatTitle,
+          });
+        }
       },
       onFinish: async () => {
         // Save assistant message
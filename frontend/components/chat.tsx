@@ -101,6 +101,10 @@ export function Chat({
       if (dataPart.type === "data-usage") {
         setUsage(dataPart.data);
       }
+      if (dataPart.type === "data-chatTitle") {
+        // The title was saved on the backend: refresh the sidebar now
+        mutate(unstable_serialize(getChatHistoryPaginationKey));
+      }
     },
     onFinish: () => {
       mutate(unstable_serialize(getChatHistoryPaginationKey));
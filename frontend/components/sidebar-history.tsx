@@ -39,6 +39,8 @@ type GroupedChats = {
 export type ChatHistory = {
   chats: Chat[];
   hasMore: boolean;
+  nextCursor: string | null;
+  prevCursor: string | null;
 };
 
 const PAGE_SIZE = 20;
@@ -88,13 +90,11 @@ export function getChatHistoryPaginationKey(
     return `/api/history?limit=${PAGE_SIZE}`;
   }
 
-  const firstChatFromPage = previousPageData.chats.at(-1);
-
-  if (!firstChatFromPage) {
+  if (!previousPageData.nextCursor) {
     return null;
   }
 
-  return `/api/history?ending_before=${firstChatFromPage.id}&limit=${PAGE_SIZE}`;
+  return `/api/history?ending_before=${encodeURIComponent(previousPageData.nextCursor)}&limit=${PAGE_SIZE}`;
 }
 
 export function SidebarHistory({ user }: { user: User | undefined }) {
@@ -13,4 +13,9 @@ export const chatModels: ChatModel[] = [
     name: "Gemini 2.5 Flash",
     description: "LangGraph chatbot powered by Gemini 2.5 Flash via Vertex AI",
   },
+  {
+    id: "chat-model-reasoning",
+    name: "Gemini 2.5 Pro",
+    description: "Slower, more thorough answers from Gemini 2.5 Pro via Vertex AI",
+  },
 ];
@@ -4,3 +4,6 @@ export const isProductionEnvironment = process.env.NODE_ENV === "production";
 export const isDevelopmentEnvironment = process.env.NODE_ENV === "development";
 
 export const DUMMY_PASSWORD = generateDummyPassword();
+
+// Email of guest users created by the backend (create_guest_user)
+export const guestRegex = /^guest-\d+$/;
@@ -175,9 +175,12 @@ export async function getChatsByUserId({
       params.set("ending_before", endingBefore);
     }
 
-    return await backendFetch<{ chats: Chat[]; hasMore: boolean }>(
-      `/api/db/chats?${params.toString()}`
-    );
+    return await backendFetch<{
+      chats: Chat[];
+      hasMore: boolean;
+      nextCursor: string | null;
+      prevCursor: string | null;
+    }>(`/api/db/chats?${params.toString()}`);
   } catch (error) {
     if (error instanceof BackendAPIError) {
       throw new ChatSDKError(
@@ -504,6 +507,27 @@ export async function updateChatVisibilityById({
   }
 }
 
+export async function updateChatTitleById({
+  chatId,
+  userId,
+  title,
+}: {
+  chatId: string;
+  userId: string;
+  title: string;
+}) {
+  try {
+    return await backendPatch<{ success: boolean }>(
+      `/api/db/chats/${chatId}/title`,
+      { userId, title }
+    );
+  } catch (error) {
+    // The chat keeps its placeholder title: warn but don't fail the stream
+    console.warn("Failed to update title for chat", chatId, error);
+    return;
+  }
+}
+
 export async function updateChatLastContextById({
   chatId,
   context,
@@ -28,6 +28,7 @@ export type CustomUIDataTypes = {
   clear: null;
   finish: null;
   usage: AppUsage;
+  chatTitle: string;
 };
 
 export type ChatMessage = UIMessage<
@@ -3,11 +3,15 @@
 These tests verify database round-trips using the real test database.
 """
 
+import json
+from datetime import datetime, timezone
 from uuid import uuid4
 
 import pytest
+from sqlalchemy import event, text, update
 
 from backend.src.db import queries
+from backend.src.db.models import Chat
 
 pytestmark = pytest.mark.asyncio
 
@@ -117,14 +121,47 @@ class TestChatDatabaseOperations:
         assert len(result["chats"]) == 5
         assert result["hasMore"] is False
 
+    async def test_get_chats_by_user_id_pages_through_equal_timestamps(self, test_session):
+        """Test that keyset paging neither skips nor repeats chats sharing a timestamp."""
+        user = await queries.create_user(test_session, f"keyset-{uuid4()}@test.com", "pass")
+        for i in range(5):
+            await queries.save_chat(test_session, uuid4(), user.id, f"Chat {i}", "private")
+        await test_session.execute(
+            update(Chat).where(Chat.userId == user.id).values(createdAt=datetime.now(timezone.utc))
+        )
+        await test_session.commit()
+
+        # Page older, two at a time
+        pages, cursor = [], None
+        while True:
+            page = await queries.get_chats_by_user_id(
+                test_session, user.id, limit=2, ending_before=cursor
+            )
+            pages.append([chat.id for chat in page["chats"]])
+            if not page["nextCursor"]:
+                break
+            cursor = page["nextCursor"]
+
+        ids = [id for page in pages for id in page]
+        assert [len(page) for page in pages] == [2, 2, 1]
+        assert ids == sorted(ids, reverse=True)
+        assert len(set(ids)) == 5
+
+        # Page back newer from the last page
+        newer = await queries.get_chats_by_user_id(
+            test_session, user.id, limit=2, starting_after=page["prevCursor"]
+        )
+        assert [chat.id for chat in newer["chats"]] == pages[1]
+        assert newer["hasMore"] is True
+
     async def test_delete_chat_removes_chat_and_related_data(self, test_session):
         """Test that deleting a chat removes all related data."""
         user = await queries.create_user(test_session, f"delete-{uuid4()}@test.com", "pass")
         chat_id = uuid4()
         await queries.save_chat(test_session, chat_id, user.id, "To Delete", "private")
 
-        # Add a message
-        await queries.save_messages(
+        # Add a message, a vote and a stream
+        messages = await queries.save_messages(
             test_session,
             [
                 {
@@ -134,6 +171,8 @@ class TestChatDatabaseOperations:
                 }
             ],
         )
+        await queries.vote_message(test_session, chat_id, messages[0].id, "up")
+        await queries.create_stream_id(test_session, uuid4(), chat_id)
         await test_session.commit()
 
         # Delete chat
@@ -142,9 +181,38 @@ class TestChatDatabaseOperations:
 
         assert deleted is not None
 
-        # Verify deleted
+        # Verify deleted, along with its rows (ON DELETE CASCADE)
         chat = await queries.get_chat_by_id(test_session, chat_id)
         assert chat is None
+        assert await queries.get_messages_by_chat_id(test_session, chat_id) == []
+        assert await queries.get_votes_by_chat_id(test_session, chat_id) == []
+        assert await queries.get_stream_ids_by_chat_id(test_session, chat_id) == []
+
+    async def test_delete_chats_by_user_id_in_batches(self, test_session):
+        """Test that a user's chats are deleted batch by batch, leaving other users' alone."""
+        user = await queries.create_user(test_session, f"batch-{uuid4()}@test.com", "pass")
+        other = await queries.create_user(test_session, f"other-{uuid4()}@test.com", "pass")
+        for i in range(5):
+            chat_id = uuid4()
+            await queries.save_chat(test_session, chat_id, user.id, f"Chat {i}", "private")
+            await queries.save_messages(
+                test_session,
+                [{"chatId": chat_id, "role": "user", "parts": [{"type": "text", "text": "Hi"}]}],
+            )
+        await queries.save_chat(test_session, uuid4(), other.id, "Kept", "private")
+        await test_session.commit()
+
+        batches = [
+            chat_ids
+            async for chat_ids in queries.delete_chats_by_user_id_in_batches(
+                test_session, user.id, batch_size=2
+            )
+        ]
+
+        assert [len(chat_ids) for chat_ids in batches] == [2, 2, 1]
+        assert await queries.get_message_count_by_user_id(test_session, user.id, 24) == 0
+        assert (await queries.get_chats_by_user_id(test_session, user.id))["chats"] == []
+        assert len((await queries.get_chats_by_user_id(test_session, other.id))["chats"]) == 1
 
     async def test_update_chat_visibility(self, test_session):
         """Test updating chat visibility."""
@@ -161,6 +229,20 @@ class TestChatDatabaseOperations:
         chat = await queries.get_chat_by_id(test_session, chat_id)
         assert chat.visibility == "public"
 
+    async def test_update_chat_title_only_for_owner(self, test_session):
+        """Test that a chat title is only updated for the chat's owner."""
+        user = await queries.create_user(test_session, f"title-{uuid4()}@test.com", "pass")
+        chat_id = uuid4()
+        await queries.save_chat(test_session, chat_id, user.id, "New chat", "private")
+        await test_session.commit()
+
+        assert not await queries.update_chat_title_by_id(test_session, chat_id, uuid4(), "Other")
+        assert await queries.update_chat_title_by_id(test_session, chat_id, user.id, "Rome Trip")
+        await test_session.commit()
+
+        chat = await queries.get_chat_by_id(test_session, chat_id)
+        assert chat.title == "Rome Trip"
+
 
 class TestMessageDatabaseOperations:
     """Integration tests for message database operations."""
@@ -192,6 +274,34 @@ class TestMessageDatabaseOperations:
         assert saved[0].role == "user"
         assert saved[1].role == "assistant"
 
+    async def test_save_messages_in_bulk(self, test_session, test_engine):
+        """Test that many messages are saved in one INSERT and returned in input order."""
+        user = await queries.create_user(test_session, f"bulk-{uuid4()}@test.com", "pass")
+        chat_id = uuid4()
+        await queries.save_chat(test_session, chat_id, user.id, "Test", "private")
+        await test_session.commit()
+
+        messages = [
+            {"chatId": chat_id, "role": "user", "parts": [{"type": "text", "text": str(i)}]}
+            for i in range(300)
+        ]
+        statements: list[str] = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(test_engine.sync_engine, "before_cursor_execute", record)
+        try:
+            saved = await queries.save_messages(test_session, messages)
+        finally:
+            event.remove(test_engine.sync_engine, "before_cursor_execute", record)
+        await test_session.commit()
+
+        assert len(statements) == 1
+        assert [m.parts[0]["text"] for m in saved] == [str(i) for i in range(300)]
+        retrieved = await queries.get_messages_by_chat_id(test_session, chat_id)
+        assert [m.id for m in retrieved] == [m.id for m in saved]
+
     async def test_get_messages_by_chat_id(self, test_session):
         """Test retrieving messages by chat ID."""
         user = await queries.create_user(test_session, f"getmsg-{uuid4()}@test.com", "pass")
@@ -286,6 +396,44 @@ class TestVoteDatabaseOperations:
         assert votes[0].isUpvoted is False
 
 
+class TestDocumentDatabaseOperations:
+    """Integration tests for document database operations."""
+
+    async def test_delete_documents_after_timestamp_cascades_to_suggestions(self, test_session):
+        """Test that deleting document versions removes their suggestions."""
+        user = await queries.create_user(test_session, f"doc-{uuid4()}@test.com", "pass")
+        document_id = uuid4()
+        [first] = await queries.save_document(
+            test_session, document_id, "Doc", "text", "v1", user.id
+        )
+        [second] = await queries.save_document(
+            test_session, document_id, "Doc", "text", "v2", user.id
+        )
+        await queries.save_suggestions(
+            test_session,
+            [
+                {
+                    "documentId": document_id,
+                    "documentCreatedAt": version.createdAt,
+                    "originalText": "a",
+                    "suggestedText": "b",
+                    "userId": user.id,
+                }
+                for version in (first, second)
+            ],
+        )
+        await test_session.commit()
+
+        deleted = await queries.delete_documents_by_id_after_timestamp(
+            test_session, document_id, first.createdAt
+        )
+        await test_session.commit()
+
+        assert [d.content for d in deleted] == ["v2"]
+        suggestions = await queries.get_suggestions_by_document_id(test_session, document_id)
+        assert [s.documentCreatedAt for s in suggestions] == [first.createdAt]
+
+
 class TestStreamDatabaseOperations:
     """Integration tests for stream database operations."""
 
@@ -309,3 +457,118 @@ class TestStreamDatabaseOperations:
         assert len(stream_ids) == 2
         assert stream_id_1 in stream_ids
         assert stream_id_2 in stream_ids
+
+
+class TestQueryIndexes:
+    """Integration tests checking that hot queries are served by indexes."""
+
+    @pytest.fixture
+    async def seeded(self, test_session):
+        """Seed a row in every table the queries read."""
+        user = await queries.create_user(test_session, f"explain-{uuid4()}@test.com", "pass")
+        chat_id, document_id = uuid4(), uuid4()
+        await queries.save_chat(test_session, chat_id, user.id, "Test", "private")
+        messages = await queries.save_messages(
+            test_session,
+            [{"chatId": chat_id, "role": "user", "parts": [{"type": "text", "text": "Hi"}]}],
+        )
+        await queries.vote_message(test_session, chat_id, messages[0].id, "up")
+        documents = await queries.save_document(
+            test_session, document_id, "Doc", "text", "Content", user.id
+        )
+        await queries.save_suggestions(
+            test_session,
+            [
+                {
+                    "documentId": document_id,
+                    "documentCreatedAt": documents[0].createdAt,
+                    "originalText": "a",
+                    "suggestedText": "b",
+                    "userId": user.id,
+                }
+            ],
+        )
+        await queries.create_stream_id(test_session, uuid4(), chat_id)
+        await test_session.commit()
+        return {
+            "user_id": user.id,
+            "chat_id": chat_id,
+            "message_id": messages[0].id,
+            "document_id": document_id,
+        }
+
+    @pytest.mark.parametrize(
+        ("query", "index"),
+        [
+            (
+                lambda s, ids: queries.get_messages_by_chat_id(s, ids["chat_id"]),
+                "Message_v2_chatId_createdAt_idx",
+            ),
+            (
+                lambda s, ids: queries.get_chats_by_user_id(s, ids["user_id"]),
+                "Chat_userId_createdAt_id_idx",
+            ),
+            (
+                lambda s, ids: queries.get_chats_by_user_id(
+                    s,
+                    ids["user_id"],
+                    ending_before=queries.encode_chat_cursor(
+                        Chat(id=uuid4(), createdAt=datetime.now(timezone.utc))
+                    ),
+                ),
+                "Chat_userId_createdAt_id_idx",
+            ),
+            (
+                lambda s, ids: queries.get_stream_ids_by_chat_id(s, ids["chat_id"]),
+                "Stream_chatId_createdAt_idx",
+            ),
+            (
+                lambda s, ids: queries.get_suggestions_by_document_id(s, ids["document_id"]),
+                "Suggestion_documentId_documentCreatedAt_idx",
+            ),
+            (
+                lambda s, ids: queries.vote_message(s, ids["chat_id"], ids["message_id"], "down"),
+                "Vote_v2_messageId_idx",
+            ),
+            (
+                lambda s, ids: queries.get_message_count_by_user_id(s, ids["user_id"], 24),
+                "Message_v2_user_chatId_createdAt_idx",
+            ),
+        ],
+        ids=[
+            "messages_by_chat",
+            "chats_by_user",
+            "chats_by_user_cursor",
+            "streams_by_chat",
+            "suggestions_by_document",
+            "vote_by_message",
+            "message_count_by_user",
+        ],
+    )
+    async def test_query_uses_index(self, test_session, test_engine, seeded, query, index):
+        """Test that a query function's single SELECT is answered from its index.
+
+        Sequential scans are disabled for the check: on tables this small the
+        planner would scan them whatever indexes exist, so a plan that still
+        contains a Seq Scan means no index can serve the query.
+        """
+        statements: list[tuple[str, object]] = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith("SELECT"):
+                statements.append((statement, parameters))
+
+        event.listen(test_engine.sync_engine, "before_cursor_execute", record)
+        try:
+            await query(test_session, seeded)
+        finally:
+            event.remove(test_engine.sync_engine, "before_cursor_execute", record)
+
+        [(statement, parameters)] = statements
+        await test_session.execute(text("SET LOCAL enable_seqscan = off"))
+        connection = await test_session.connection()
+        result = await connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+        plan = json.dumps(result.scalar())
+
+        assert '"Seq Scan"' not in plan, plan
+        assert f'"Index Name": "{index}"' in plan, plan
@@ -11,8 +11,10 @@ from uuid import uuid4
 
 import pytest
 from httpx import ASGITransport, AsyncClient
+from sqlalchemy import event
 
 from backend.src.app import app
+from backend.src.db import queries
 
 # Skip all tests if test database is not available
 pytestmark = pytest.mark.asyncio
@@ -170,6 +172,55 @@ class TestChatRoutesIntegration:
         assert len(data["chats"]) == 3
         assert data["hasMore"] is True
 
+        # Follow the cursor to the remaining chats
+        response = await integration_client.get(
+            "/api/db/chats",
+            params={"userId": user_id, "limit": 3, "ending_before": data["nextCursor"]},
+        )
+
+        page = response.json()
+        assert len(page["chats"]) == 2
+        assert page["hasMore"] is False
+        assert page["nextCursor"] is None
+        assert page["prevCursor"] is not None
+        assert {c["id"] for c in data["chats"] + page["chats"]} == set(chat_ids)
+
+    async def test_get_chats_rejects_malformed_cursor(self, integration_client):
+        """Test that a malformed pagination cursor is rejected with 400."""
+        response = await integration_client.get(
+            "/api/db/chats",
+            params={"userId": str(uuid4()), "ending_before": "not-a-cursor"},
+        )
+
+        assert response.status_code == 400
+
+    async def test_update_chat_title(self, integration_client):
+        """Test that only the chat's owner can update its title."""
+        user_response = await integration_client.post(
+            "/api/db/users",
+            params={"email": f"titleuser-{uuid4()}@example.com", "password": "password"},
+        )
+        user_id = user_response.json()["id"]
+
+        chat_id = str(uuid4())
+        await integration_client.post(
+            "/api/db/chats",
+            json={"id": chat_id, "userId": user_id, "title": "New chat", "visibility": "private"},
+        )
+
+        response = await integration_client.patch(
+            f"/api/db/chats/{chat_id}/title", json={"userId": str(uuid4()), "title": "Stolen"}
+        )
+        assert response.json() == {"success": False}
+
+        response = await integration_client.patch(
+            f"/api/db/chats/{chat_id}/title", json={"userId": user_id, "title": "Rome Trip"}
+        )
+        assert response.json() == {"success": True}
+
+        response = await integration_client.get(f"/api/db/chats/{chat_id}")
+        assert response.json()["title"] == "Rome Trip"
+
     async def test_delete_chat(self, integration_client):
         """Test deleting a chat."""
         # Create user and chat
@@ -331,3 +382,96 @@ class TestVoteRoutesIntegration:
         response = await integration_client.get(f"/api/db/votes/{chat_id}")
         votes = response.json()
         assert votes[0]["isUpvoted"] is False
+
+
+class TestRouteStatementCounts:
+    """Regression tests bounding the SQL statements each route issues.
+
+    Relationships are never loaded implicitly, so reading a row must not fan
+    out into its user's whole history.
+    """
+
+    @pytest.fixture
+    async def seeded(self, test_session):
+        """Seed a user with a chat, messages, a vote, a stream and a document."""
+        user = await queries.create_user(test_session, f"count-{uuid4()}@test.com", "pass")
+        chat_id, document_id = uuid4(), uuid4()
+        await queries.save_chat(test_session, chat_id, user.id, "Test", "private")
+        messages = await queries.save_messages(
+            test_session,
+            [
+                {"chatId": chat_id, "role": role, "parts": [{"type": "text", "text": role}]}
+                for role in ("user", "assistant", "user")
+            ],
+        )
+        await queries.vote_message(test_session, chat_id, messages[1].id, "up")
+        await queries.create_stream_id(test_session, uuid4(), chat_id)
+        documents = await queries.save_document(
+            test_session, document_id, "Doc", "text", "Content", user.id
+        )
+        await queries.save_suggestions(
+            test_session,
+            [
+                {
+                    "documentId": document_id,
+                    "documentCreatedAt": documents[0].createdAt,
+                    "originalText": "a",
+                    "suggestedText": "b",
+                    "userId": user.id,
+                }
+            ],
+        )
+        await test_session.commit()
+        return {
+            "email": user.email,
+            "user_id": user.id,
+            "chat_id": chat_id,
+            "message_id": messages[1].id,
+            "document_id": document_id,
+        }
+
+    @pytest.mark.parametrize(
+        ("method", "path", "body", "max_statements"),
+        [
+            ("GET", "/api/db/users?email={email}", None, 1),
+            ("GET", "/api/db/chats/{chat_id}", None, 1),
+            ("GET", "/api/db/chats?userId={user_id}", None, 1),
+            ("GET", "/api/db/messages/{chat_id}", None, 1),
+            ("GET", "/api/db/messages/single/{message_id}", None, 1),
+            ("GET", "/api/db/messages/count/{user_id}", None, 1),
+            ("GET", "/api/db/votes/{chat_id}", None, 1),
+            ("GET", "/api/db/documents/{document_id}", None, 1),
+            ("GET", "/api/db/documents/{document_id}/latest", None, 1),
+            ("GET", "/api/db/suggestions/{document_id}", None, 1),
+            ("GET", "/api/db/streams/{chat_id}", None, 1),
+            (
+                "PATCH",
+                "/api/db/votes",
+                {"chatId": "{chat_id}", "messageId": "{message_id}", "type": "down"},
+                2,
+            ),
+            ("DELETE", "/api/db/chats/{chat_id}", None, 1),
+            ("DELETE", "/api/db/chats/user/{user_id}", None, 1),
+        ],
+    )
+    async def test_route_issues_bounded_statements(
+        self, integration_client, test_engine, seeded, method, path, body, max_statements
+    ):
+        """Test that a route issues no more than its expected number of statements."""
+        statements: list[str] = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(test_engine.sync_engine, "before_cursor_execute", record)
+        try:
+            response = await integration_client.request(
+                method,
+                path.format(**seeded),
+                json={k: v.format(**seeded) for k, v in body.items()} if body else None,
+            )
+        finally:
+            event.remove(test_engine.sync_engine, "before_cursor_execute", record)
+
+        assert response.status_code == 200
+        assert len(statements) <= max_statements, "\n\n".join(statements)
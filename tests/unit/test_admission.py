@@ -0,0 +1,151 @@
+"""Unit tests for chat admission control (token buckets and stream cap)."""
+
+from unittest.mock import patch
+
+import pytest
+
+from backend.src.admission import (
+    InMemoryAdmissionStore,
+    _parse_rate,
+    admit_chat,
+    release_when_done,
+)
+from backend.src.observability.exceptions import RateLimitError, ValidationError
+
+
+@pytest.fixture
+def store():
+    """Use a fresh in-memory store for admission decisions."""
+    store = InMemoryAdmissionStore()
+    with patch("backend.src.admission.get_admission_store", return_value=store):
+        yield store
+
+
+class TestInMemoryAdmissionStore:
+    """Tests for the InMemoryAdmissionStore class."""
+
+    @pytest.mark.asyncio
+    async def test_token_bucket_refills_over_time(self) -> None:
+        """Test that a bucket allows a burst, then refills at its rate."""
+        now = [0.0]
+        store = InMemoryAdmissionStore(clock=lambda: now[0])
+
+        waits = [await store.consume("u", capacity=2, rate=0.5) for _ in range(3)]
+        assert waits == [0.0, 0.0, 2.0]
+
+        now[0] = 2.0
+        assert await store.consume("u", capacity=2, rate=0.5) == 0.0
+
+    @pytest.mark.asyncio
+    async def test_leases_are_capped_and_expire(self) -> None:
+        """Test that leases respect the limit and leaked ones expire."""
+        now = [0.0]
+        store = InMemoryAdmissionStore(clock=lambda: now[0])
+
+        first = await store.acquire("streams", limit=1, ttl=10)
+        assert first is not None
+        assert await store.acquire("streams", limit=1, ttl=10) is None
+
+        now[0] = 11.0
+        assert await store.acquire("streams", limit=1, ttl=10) is not None
+
+    def test_parse_rate(self) -> None:
+        """Test parsing of "<requests>/<seconds>" limits."""
+        assert _parse_rate("100/86400") == (100.0, 100 / 86400)
+        assert _parse_rate("0") == (0.0, 0.0)
+
+
+class TestAdmitChat:
+    """Tests for the admit_chat function."""
+
+    @pytest.mark.asyncio
+    async def test_per_user_limit_by_user_type(self, store) -> None:
+        """Test that each user gets the bucket of their user type."""
+        with patch.dict(
+            "backend.src.admission.USER_RATE_LIMITS",
+            {"guest": (1.0, 0.001), "registered": (3.0, 0.001)},
+        ):
+            await admit_chat("g1", "guest")
+            with pytest.raises(RateLimitError) as exc_info:
+                await admit_chat("g1", "guest")
+            for _ in range(3):
+                await admit_chat("r1", "registered")
+            await admit_chat("g2", "guest")
+
+        assert exc_info.value.retry_after >= 1
+
+    @pytest.mark.asyncio
+    async def test_user_type_aggregate_limit(self, store) -> None:
+        """Test that the per-type bucket limits all users of a type together."""
+        with patch.dict("backend.src.admission.USER_TYPE_RATE_LIMITS", {"guest": (2.0, 0.001)}):
+            await admit_chat("g1", "guest")
+            await admit_chat("g2", "guest")
+            with pytest.raises(RateLimitError):
+                await admit_chat("g3", "guest")
+
+    @pytest.mark.asyncio
+    async def test_aggregate_rejection_refunds_user_token(self, store) -> None:
+        """Test that a request rejected by the per-type bucket keeps the user's token."""
+        with (
+            patch.dict("backend.src.admission.USER_RATE_LIMITS", {"guest": (1.0, 0.001)}),
+            patch.dict("backend.src.admission.USER_TYPE_RATE_LIMITS", {"guest": (1.0, 0.001)}),
+        ):
+            await admit_chat("g1", "guest")
+            with pytest.raises(RateLimitError):
+                await admit_chat("g2", "guest")
+
+        assert await store.consume("user:guest:g2", 1.0, 0.001) == 0.0
+
+    @pytest.mark.asyncio
+    async def test_unknown_user_type_is_rejected(self, store, test_client) -> None:
+        """Test that a user type without limits is a validation error, not a new label."""
+        with pytest.raises(ValidationError):
+            await admit_chat("u1", "admin")
+
+        body = {"id": "m1", "userType": "admin", "messages": [{"role": "user", "content": "Hi"}]}
+        response = await test_client.post("/api/chat", json=body)
+
+        assert response.status_code == 400
+
+    @pytest.mark.asyncio
+    async def test_global_stream_cap(self, store) -> None:
+        """Test that the concurrency cap frees up when a stream finishes."""
+        with patch("backend.src.admission.ADMISSION_MAX_CONCURRENT_STREAMS", 1):
+            permit = await admit_chat("u1")
+            with pytest.raises(RateLimitError):
+                await admit_chat("u2")
+
+            async def frames():
+                yield b"data: x\n\n"
+
+            assert [f async for f in release_when_done(frames(), permit)] == [b"data: x\n\n"]
+            await admit_chat("u2")
+
+    @pytest.mark.asyncio
+    async def test_rejected_request_releases_its_slot(self, store) -> None:
+        """Test that a rate-limited request does not keep a stream slot."""
+        with (
+            patch("backend.src.admission.ADMISSION_MAX_CONCURRENT_STREAMS", 1),
+            patch.dict("backend.src.admission.USER_RATE_LIMITS", {"registered": (1.0, 0.001)}),
+        ):
+            permit = await admit_chat("u1")
+            await permit.release()
+            with pytest.raises(RateLimitError):
+                await admit_chat("u1")
+
+            await admit_chat("u2")
+
+    @pytest.mark.asyncio
+    async def test_chat_endpoint_returns_429(self, store, test_client) -> None:
+        """Test that /api/chat rejects over-limit users before calling the LLM."""
+        body = {"id": "m1", "userId": "u1", "messages": [{"role": "user", "content": "Hi"}]}
+
+        with (
+            patch.dict("backend.src.admission.USER_RATE_LIMITS", {"registered": (0.5, 0.001)}),
+            patch("backend.src.app.create_streaming_response") as create_response,
+        ):
+            response = await test_client.post("/api/chat", json=body)
+
+        assert response.status_code == 429
+        assert int(response.headers["Retry-After"]) >= 1
+        create_response.assert_not_called()
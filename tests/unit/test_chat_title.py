@@ -0,0 +1,218 @@
+"""Unit tests for speculative chat titles generated alongside the first chat stream."""
+
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock, patch
+from uuid import uuid4
+
+import pytest
+
+from backend.src import chat_title
+from backend.src.chat_title import generate_and_save_title, save_title, start_title
+from backend.src.llm import FakeStreamingChatModel, get_model_registry
+from backend.src.stream import stream_langgraph_response
+
+
+async def _title(value: str, delay: float = 0.0) -> str:
+    await asyncio.sleep(delay)
+    return value
+
+
+async def _failing_title() -> str:
+    raise RuntimeError("title failed")
+
+
+async def _stream(title: asyncio.Task[str], ttft_ms: float = 0) -> list[dict]:
+    model = FakeStreamingChatModel(ttft_ms=ttft_ms, itl_ms=0, output_tokens=3)
+    with (
+        get_model_registry().override("chat-model", model),
+        patch("backend.src.routing.ROUTER_ENABLED", False),
+    ):
+        frames = [
+            frame
+            async for frame in stream_langgraph_response(
+                [{"role": "user", "content": "Plan a trip to Rome"}], title=title
+            )
+        ]
+    return [json.loads(frame[len(b"data: ") :]) for frame in frames if b"{" in frame]
+
+
+def _types(events: list[dict]) -> list[str]:
+    return [event["type"] for event in events]
+
+
+class TestTitleInStream:
+    """Tests for the data-chatTitle part in the chat stream."""
+
+    @pytest.mark.asyncio
+    async def test_title_is_sent_as_soon_as_ready(self) -> None:
+        """Test that a title ready before the first token is sent before any text."""
+        events = await _stream(asyncio.create_task(_title("Rome Trip")), ttft_ms=100)
+
+        part = next(event for event in events if event["type"] == "data-chatTitle")
+        assert part == {"type": "data-chatTitle", "data": "Rome Trip", "transient": True}
+        assert _types(events).index("data-chatTitle") < _types(events).index("text-start")
+
+    @pytest.mark.asyncio
+    async def test_late_title_is_sent_before_finish(self) -> None:
+        """Test that a title finishing after the answer still reaches the stream."""
+        events = await _stream(asyncio.create_task(_title("Rome Trip", delay=0.2)))
+
+        types = _types(events)
+        assert types.index("text-end") < types.index("data-chatTitle") < types.index("finish")
+
+    @pytest.mark.asyncio
+    async def test_title_past_wait_is_not_cancelled(self) -> None:
+        """Test that the stream stops waiting for a slow title without cancelling it."""
+        title = asyncio.create_task(_title("Rome Trip", delay=0.2))
+
+        with patch("backend.src.stream.SPECULATIVE_TITLE_WAIT_SECONDS", 0.01):
+            events = await _stream(title)
+
+        assert "data-chatTitle" not in _types(events)
+        assert _types(events)[-1] == "finish"
+        assert await title == "Rome Trip"
+
+    @pytest.mark.asyncio
+    async def test_failed_title_does_not_affect_answer(self) -> None:
+        """Test that a failed title is skipped and the answer streams normally."""
+        events = await _stream(asyncio.create_task(_failing_title()))
+
+        assert "data-chatTitle" not in _types(events)
+        assert "error" not in _types(events)
+        assert _types(events)[-1] == "finish"
+
+
+class TestSaveTitle:
+    """Tests for saving the title to the Chat row."""
+
+    @pytest.fixture
+    def session(self, mock_session: AsyncMock):
+        @asynccontextmanager
+        async def get_session():
+            yield mock_session
+
+        with patch("backend.src.chat_title.get_session", get_session):
+            yield mock_session
+
+    @pytest.mark.asyncio
+    async def test_existing_chat_is_updated(self, session: AsyncMock) -> None:
+        """Test that the owner's existing chat gets the title."""
+        with patch("backend.src.chat_title.queries") as queries:
+            queries.update_chat_title_by_id = AsyncMock(return_value=True)
+            queries.save_chat = AsyncMock()
+            await save_title(uuid4(), uuid4(), "Rome Trip")
+
+        queries.save_chat.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_missing_chat_is_created(self, session: AsyncMock) -> None:
+        """Test that the Chat row is created with save_chat when it does not exist yet."""
+        chat_id, user_id = uuid4(), uuid4()
+        with patch("backend.src.chat_title.queries") as queries:
+            queries.update_chat_title_by_id = AsyncMock(return_value=False)
+            queries.get_chat_by_id = AsyncMock(return_value=None)
+            queries.save_chat = AsyncMock()
+            await save_title(chat_id, user_id, "Rome Trip", "public")
+
+        queries.save_chat.assert_awaited_once_with(session, chat_id, user_id, "Rome Trip", "public")
+
+    @pytest.mark.asyncio
+    async def test_other_users_chat_is_left_alone(self, session: AsyncMock) -> None:
+        """Test that another user's chat is neither retitled nor recreated."""
+        with patch("backend.src.chat_title.queries") as queries:
+            queries.update_chat_title_by_id = AsyncMock(return_value=False)
+            queries.get_chat_by_id = AsyncMock(return_value=MagicMock())
+            queries.save_chat = AsyncMock()
+            await save_title(uuid4(), uuid4(), "Rome Trip")
+
+        queries.save_chat.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_failed_save_still_returns_title(self) -> None:
+        """Test that a title that cannot be saved is still returned for the stream."""
+        with patch("backend.src.chat_title.generate_title", AsyncMock(return_value="Rome Trip")):
+            assert await generate_and_save_title("Plan Rome", "not-a-uuid", None) == "Rome Trip"
+
+
+class TestChatEndpointTitle:
+    """Tests for generateTitle on /api/chat."""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("generate_title", [True, False])
+    async def test_title_is_started_for_first_turn(self, test_client, generate_title) -> None:
+        """Test that the title task is only started when the request asks for it."""
+        chat_id = str(uuid4())
+        model = FakeStreamingChatModel(ttft_ms=0, itl_ms=0, output_tokens=3)
+
+        with (
+            get_model_registry().override("chat-model", model),
+            patch("backend.src.routing.ROUTER_ENABLED", False),
+            patch(
+                "backend.src.app.start_title",
+                side_effect=lambda *args: asyncio.create_task(_title("Rome Trip")),
+            ) as start,
+        ):
+            response = await test_client.post(
+                "/api/chat",
+                json={
+                    "id": "msg-1",
+                    "chatId": chat_id,
+                    "messages": [{"role": "user", "parts": [{"type": "text", "text": "Rome?"}]}],
+                    "userId": str(uuid4()),
+                    "generateTitle": generate_title,
+                },
+            )
+
+        assert response.status_code == 200
+        assert b'"type":"error"' not in response.content
+        if generate_title:
+            assert start.call_args.args[:2] == ("Rome?", chat_id)
+            assert b'"type":"data-chatTitle","data":"Rome Trip"' in response.content
+        else:
+            start.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_title_is_cancelled_when_stream_fails_to_start(self, test_client) -> None:
+        """Test that the title task is cancelled when the chat stream cannot be created."""
+        title = asyncio.create_task(_title("Rome Trip", delay=10))
+
+        with (
+            patch("backend.src.app.start_title", return_value=title),
+            patch(
+                "backend.src.app.create_streaming_response",
+                AsyncMock(side_effect=RuntimeError("stream failed")),
+            ),
+            pytest.raises(RuntimeError),
+        ):
+            await test_client.post(
+                "/api/chat",
+                json={
+                    "id": "msg-1",
+                    "chatId": str(uuid4()),
+                    "messages": [{"role": "user", "parts": [{"type": "text", "text": "Rome?"}]}],
+                    "userId": str(uuid4()),
+                    "generateTitle": True,
+                },
+            )
+
+        await asyncio.gather(title, return_exceptions=True)
+        assert title.cancelled()
+
+
+class TestStartTitle:
+    """Tests for the start_title function."""
+
+    @pytest.mark.asyncio
+    async def test_task_is_kept_until_done(self) -> None:
+        """Test that a running title task is referenced until it finishes."""
+        with patch(
+            "backend.src.chat_title.generate_and_save_title", AsyncMock(return_value="Rome Trip")
+        ) as generate:
+            task = start_title("Plan Rome", "chat-1", "user-1", "private")
+            assert task in chat_title._pending
+            assert await task == "Rome Trip"
+
+        generate.assert_awaited_once_with("Plan Rome", "chat-1", "user-1", "private")
+        assert task not in chat_title._pending
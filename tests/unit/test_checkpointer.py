@@ -0,0 +1,173 @@
+"""Unit tests for server-side conversation state (checkpointed graph input)."""
+
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, HumanMessage, RemoveMessage
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.graph.message import REMOVE_ALL_MESSAGES
+
+from backend.src.graph import chatbot_graph, create_chatbot_graph, delete_chat_threads
+from backend.src.llm import get_model_registry
+from backend.src.observability.exceptions import ValidationError
+from backend.src.stream import prepare_graph_input, rewind_thread, stream_langgraph_response
+
+
+def _user(text: str) -> dict[str, Any]:
+    return {"role": "user", "parts": [{"type": "text", "text": text}]}
+
+
+def _assistant(text: str) -> dict[str, Any]:
+    return {"role": "assistant", "parts": [{"type": "text", "text": text}]}
+
+
+class TestPrepareGraphInput:
+    """Tests for reconciling requests with the checkpointed thread."""
+
+    @pytest.fixture
+    def graph(self):
+        """A chatbot graph compiled with an in-memory checkpointer and fake model."""
+        model = GenericFakeChatModel(
+            messages=iter([AIMessage(content=f"reply {i}") for i in range(10)])
+        )
+        with (
+            get_model_registry().override("chat-model", model),
+            patch("backend.src.routing.ROUTER_ENABLED", False),
+            patch("backend.src.stream.get_checkpointed_graph") as get_graph,
+        ):
+            get_graph.return_value = create_chatbot_graph(checkpointer=InMemorySaver())
+            yield get_graph.return_value
+
+    @staticmethod
+    async def _turn(messages: list[dict[str, Any]], history: str = "full") -> None:
+        async for _ in stream_langgraph_response(messages, chat_id="chat-1", history=history):
+            pass
+
+    @staticmethod
+    async def _stored(graph) -> list[tuple[str, str]]:
+        snapshot = await graph.aget_state({"configurable": {"thread_id": "chat-1"}})
+        return [(m.type, m.content) for m in snapshot.values["messages"]]
+
+    @pytest.mark.asyncio
+    async def test_without_checkpointer_sends_full_history(self) -> None:
+        """Test that the stateless graph receives the whole converted history."""
+        with patch("backend.src.stream.get_checkpointed_graph", return_value=None):
+            graph, graph_input, config = await prepare_graph_input(
+                [_user("Hi"), _assistant("Hello"), _user("Bye")], chat_id="chat-1"
+            )
+
+        assert graph is chatbot_graph
+        assert config == {"configurable": {"thread_id": "chat-1"}}
+        assert [m.content for m in graph_input["messages"]] == ["Hi", "Hello", "Bye"]
+
+    @pytest.mark.asyncio
+    async def test_delta_mode_appends_to_thread(self, graph) -> None:
+        """Test that sending only the new message continues the stored thread."""
+        await self._turn([_user("Hi")], history="delta")
+        await self._turn([_user("And again")], history="delta")
+
+        assert await self._stored(graph) == [
+            ("human", "Hi"),
+            ("ai", "reply 0"),
+            ("human", "And again"),
+            ("ai", "reply 1"),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_full_history_sends_only_new_tail(self, graph) -> None:
+        """Test that a full history extending the thread only converts the tail."""
+        await self._turn([_user("Hi")])
+
+        _, graph_input, _ = await prepare_graph_input(
+            [_user("Hi"), _assistant("reply 0"), _user("Next")], chat_id="chat-1"
+        )
+
+        assert len(graph_input["messages"]) == 1
+        assert isinstance(graph_input["messages"][0], HumanMessage)
+        assert graph_input["messages"][0].content == "Next"
+
+    @pytest.mark.asyncio
+    async def test_divergent_history_resets_thread(self, graph) -> None:
+        """Test that an edited history replaces the stored thread."""
+        await self._turn([_user("Hi")])
+
+        _, graph_input, _ = await prepare_graph_input([_user("Hi, edited")], chat_id="chat-1")
+        assert isinstance(graph_input["messages"][0], RemoveMessage)
+        assert graph_input["messages"][0].id == REMOVE_ALL_MESSAGES
+
+        await self._turn([_user("Hi, edited")])
+        assert await self._stored(graph) == [("human", "Hi, edited"), ("ai", "reply 1")]
+
+    @pytest.mark.asyncio
+    async def test_rewind_drops_turns_deleted_by_the_client(self, graph) -> None:
+        """Test that a regenerated delta turn does not keep the deleted answer."""
+        await self._turn([_user("Hi")], history="delta")
+        await self._turn([_user("Next")], history="delta")
+
+        # The client deleted "Next" and its reply, then sent an edited message
+        await rewind_thread("chat-1", 2)
+        await self._turn([_user("Next, edited")], history="delta")
+
+        assert await self._stored(graph) == [
+            ("human", "Hi"),
+            ("ai", "reply 0"),
+            ("human", "Next, edited"),
+            ("ai", "reply 2"),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_rewind_matching_history_is_a_no_op(self, graph) -> None:
+        """Test that a thread matching the client's history is left alone."""
+        await self._turn([_user("Hi")], history="delta")
+
+        await rewind_thread("chat-1", 2)
+
+        assert await self._stored(graph) == [("human", "Hi"), ("ai", "reply 0")]
+
+    @pytest.mark.asyncio
+    async def test_rewind_incomplete_thread_asks_for_full_history(self, graph) -> None:
+        """Test that a thread missing messages cannot be continued from a delta."""
+        await self._turn([_user("Hi")], history="delta")
+
+        with pytest.raises(ValidationError) as exc_info:
+            await rewind_thread("chat-1", 4)
+
+        assert exc_info.value.status_code == 409
+        assert exc_info.value.code == "history_mismatch"
+
+    @pytest.mark.asyncio
+    async def test_delete_chat_threads(self) -> None:
+        """Test that deleting a chat's thread removes its checkpoints."""
+        saver = InMemorySaver()
+        graph = create_chatbot_graph(checkpointer=saver)
+        config = {"configurable": {"thread_id": "chat-1"}}
+        await graph.aupdate_state(config, {"messages": [HumanMessage(content="Hi")]})
+
+        with patch("backend.src.graph._checkpointer", saver):
+            await delete_chat_threads(["chat-1"])
+
+        assert (await graph.aget_state(config)).values == {}
+
+
+class TestChatStreamHistoryModes:
+    """Tests for request validation of the /api/chat history modes."""
+
+    @pytest.mark.asyncio
+    async def test_delta_without_checkpointer_is_rejected(self, test_client) -> None:
+        """Test that sending only the new message needs server-side history."""
+        with patch("backend.src.app.get_checkpointed_graph", return_value=None):
+            response = await test_client.post(
+                "/api/chat", json={"id": "m1", "chatId": "chat-1", "message": _user("Hi")}
+            )
+
+        assert response.status_code == 400
+        assert response.json()["error"] == "validation_error"
+
+    @pytest.mark.asyncio
+    async def test_empty_request_is_rejected(self, test_client) -> None:
+        """Test that a request without message or messages is a validation error."""
+        response = await test_client.post("/api/chat", json={"id": "m1"})
+
+        assert response.status_code == 400
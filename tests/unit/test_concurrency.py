@@ -0,0 +1,98 @@
+"""Unit tests for the global LLM concurrency governor."""
+
+import asyncio
+from unittest.mock import patch
+
+import pytest
+from prometheus_client import REGISTRY
+
+from backend.src.concurrency import LLMGovernor
+from backend.src.observability.exceptions import RateLimitError
+
+
+class TestLLMGovernor:
+    """Tests for the LLMGovernor class."""
+
+    @pytest.mark.asyncio
+    async def test_limits_concurrency(self) -> None:
+        """Test that no more than max_concurrency callers run at once."""
+        governor = LLMGovernor(max_concurrency=2, max_queue_depth=10)
+        peak = 0
+
+        async def work() -> None:
+            nonlocal peak
+            async with governor.slot("test"):
+                peak = max(peak, governor.running)
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(*(work() for _ in range(6)))
+
+        assert peak == 2
+        assert governor.running == 0
+        assert governor.waiting == 0
+
+    @pytest.mark.asyncio
+    async def test_full_queue_rejects_with_retry_after(self) -> None:
+        """Test that callers beyond the queue depth are rejected immediately."""
+        governor = LLMGovernor(max_concurrency=1, max_queue_depth=1)
+        release = asyncio.Event()
+
+        async def hold() -> None:
+            async with governor.slot("test"):
+                await release.wait()
+
+        holder = asyncio.create_task(hold())
+        queued = asyncio.create_task(hold())
+        while governor.running + governor.waiting < 2:
+            await asyncio.sleep(0)
+
+        with pytest.raises(RateLimitError) as exc_info:
+            async with governor.slot("test"):
+                pass
+
+        assert exc_info.value.retry_after
+        release.set()
+        await asyncio.gather(holder, queued)
+
+    @pytest.mark.asyncio
+    async def test_queue_timeout_rejects(self) -> None:
+        """Test that a caller waiting longer than the timeout is rejected."""
+        governor = LLMGovernor(max_concurrency=1, max_queue_depth=5, queue_timeout=0.01)
+        before = (
+            REGISTRY.get_sample_value(
+                "llm_queue_rejected_total", {"operation": "test", "reason": "timeout"}
+            )
+            or 0.0
+        )
+
+        async with governor.slot("test"):
+            with pytest.raises(RateLimitError):
+                async with governor.slot("test"):
+                    pass
+
+        after = REGISTRY.get_sample_value(
+            "llm_queue_rejected_total", {"operation": "test", "reason": "timeout"}
+        )
+        assert after == before + 1
+        assert governor.waiting == 0
+
+
+class TestChatSimpleEndpoint:
+    """Tests for the non-streaming /chat endpoint."""
+
+    @pytest.mark.asyncio
+    async def test_saturated_governor_returns_429(self, test_client) -> None:
+        """Test that saturation surfaces as 429 with Retry-After, not 500."""
+        governor = LLMGovernor(max_concurrency=1, max_queue_depth=0)
+
+        async with governor.slot("chat"):
+            with patch("backend.src.graph.get_llm_governor", return_value=governor):
+                response = await test_client.post(
+                    "/chat",
+                    json={"message": "Hi"},
+                    headers={"Cache-Control": "no-cache"},
+                )
+
+        assert response.status_code == 429
+        assert response.headers["Retry-After"]
+        assert response.json()["error"] == "rate_limit_exceeded"
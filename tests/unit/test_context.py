@@ -0,0 +1,264 @@
+"""Unit tests for the token-budgeted context window."""
+
+import asyncio
+import json
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+from langgraph.checkpoint.memory import InMemorySaver
+
+from backend.src.context import (
+    SummaryCache,
+    _pending,
+    build_prompt,
+    estimate_tokens,
+    fit_context,
+)
+from backend.src.graph import create_chatbot_graph
+from backend.src.llm import get_model_registry
+from backend.src.stream import stream_langgraph_response
+
+
+def _chat(turns: int, size: int = 40) -> list[BaseMessage]:
+    messages: list[BaseMessage] = [SystemMessage(content="You are helpful.")]
+    for i in range(turns):
+        messages.append(HumanMessage(content=f"q{i} " + "x" * size))
+        messages.append(AIMessage(content=f"a{i} " + "y" * size))
+    return messages
+
+
+async def _summaries_done() -> None:
+    await asyncio.gather(*_pending.values())
+
+
+@pytest.fixture(autouse=True)
+def summaries():
+    """Isolate the module-level summary cache per test."""
+    cache = SummaryCache()
+    with patch("backend.src.context._summaries", cache):
+        yield cache
+
+
+class TestFitContext:
+    """Tests for the fit_context and build_prompt functions."""
+
+    def test_estimate_tokens_is_length_based(self) -> None:
+        """Test the local token estimate (about four characters per token)."""
+        assert estimate_tokens("x" * 400) == 104
+        assert estimate_tokens(HumanMessage(content="x" * 40)) == 14
+
+    @pytest.mark.asyncio
+    async def test_history_within_budget_is_unchanged(self) -> None:
+        """Test that short chats are sent as-is without summarising."""
+        messages = _chat(2)
+        summarize = AsyncMock()
+
+        summary, start, summary_start = await fit_context(
+            messages, summarize, "chat-1", budget=10_000
+        )
+
+        assert (summary, start, summary_start) == (None, 0, 0)
+        assert build_prompt(messages, summary, start) is messages
+        summarize.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_older_turns_are_summarised(self) -> None:
+        """Test that the system prompt and recent turns are kept verbatim."""
+        messages = _chat(20)
+        summarize = AsyncMock(return_value="earlier stuff")
+
+        summary, start, summary_start = await fit_context(messages, summarize, budget=200)
+        prompt = build_prompt(messages, summary, start)
+
+        assert summary == "earlier stuff"
+        assert summary_start == start
+        assert prompt[0] is messages[0]
+        assert "earlier stuff" in prompt[1].content
+        assert prompt[2:] == messages[start:]
+        assert isinstance(messages[start], HumanMessage)
+        assert sum(estimate_tokens(m) for m in prompt) <= 200
+        previous, folded = summarize.call_args.args
+        assert previous is None
+        assert folded == messages[1:start]
+
+    @pytest.mark.asyncio
+    async def test_chat_summary_is_generated_in_background(self) -> None:
+        """Test that a chat turn truncates while its summary is generated for later turns."""
+        messages = _chat(20)
+        summarize = AsyncMock(return_value="earlier stuff")
+
+        summary, start, summary_start = await fit_context(messages, summarize, "chat-1", budget=200)
+        assert summary is None
+        assert summary_start == 0
+        assert sum(estimate_tokens(m) for m in build_prompt(messages, summary, start)) <= 200
+
+        await _summaries_done()
+        assert await fit_context(messages, summarize, "chat-1", budget=200) == (
+            "earlier stuff",
+            start,
+            start,
+        )
+        previous, folded = summarize.call_args.args
+        assert previous is None
+        assert folded == messages[1:start]
+
+    @pytest.mark.asyncio
+    async def test_cached_summary_is_reused(self) -> None:
+        """Test that the next turn reuses the summary while it still fits."""
+        messages = _chat(20)
+        summarize = AsyncMock(return_value="earlier stuff")
+        await fit_context(messages, summarize, "chat-1", budget=200)
+        await _summaries_done()
+        first = await fit_context(messages, summarize, "chat-1", budget=200)
+
+        messages.append(HumanMessage(content="one more"))
+        second = await fit_context(messages, summarize, "chat-1", budget=200)
+
+        assert second == first
+        assert summarize.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_stored_summary_seeds_an_empty_cache(self) -> None:
+        """Test that the checkpointed summary is used when this process has none."""
+        messages = _chat(20)
+        summarize = AsyncMock()
+
+        result = await fit_context(
+            messages,
+            summarize,
+            "chat-1",
+            budget=200,
+            stored_summary="from state",
+            stored_start=len(messages) - 2,
+        )
+
+        assert result == ("from state", len(messages) - 2, len(messages) - 2)
+        summarize.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_summary_rolls_forward(self) -> None:
+        """Test that outgrowing the budget folds new turns into the old summary."""
+        messages = _chat(20)
+        summarize = AsyncMock(side_effect=["first", "second"])
+        _, first_start, _ = await fit_context(messages, summarize, "chat-1", budget=200)
+        await _summaries_done()
+
+        messages.extend(_chat(5)[1:])
+        _, start, summary_start = await fit_context(messages, summarize, "chat-1", budget=200)
+        await _summaries_done()
+        summary, _, _ = await fit_context(messages, summarize, "chat-1", budget=200)
+
+        assert summary == "second"
+        assert summary_start == first_start
+        assert start > first_start
+        previous, folded = summarize.call_args.args
+        assert previous == "first"
+        assert folded == messages[first_start:start]
+
+    @pytest.mark.asyncio
+    async def test_edited_history_invalidates_summary(self) -> None:
+        """Test that a summary is not reused once the summarised span changes."""
+        messages = _chat(20)
+        summarize = AsyncMock(side_effect=["first", "second"])
+        await fit_context(messages, summarize, "chat-1", budget=200)
+        await _summaries_done()
+
+        messages[1] = HumanMessage(content="edited")
+        await fit_context(messages, summarize, "chat-1", budget=200)
+        await _summaries_done()
+        summary, _, _ = await fit_context(messages, summarize, "chat-1", budget=200)
+
+        assert summary == "second"
+        assert summarize.call_args.args[0] is None
+
+    @pytest.mark.asyncio
+    async def test_failed_summary_still_truncates(self) -> None:
+        """Test that the budget is enforced even when summarisation fails."""
+        messages = _chat(20)
+        summarize = AsyncMock(side_effect=RuntimeError("quota"))
+
+        summary, start, summary_start = await fit_context(messages, summarize, budget=200)
+
+        assert summary is None
+        assert summary_start == 0
+        assert start > 1
+        assert sum(estimate_tokens(m) for m in build_prompt(messages, summary, start)) <= 200
+
+
+class TestContextStage:
+    """Tests for the context stage of the chatbot graph."""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("engine", ["messages", "events"])
+    async def test_summary_is_not_streamed(self, engine: str) -> None:
+        """Test that later turns see the summary but the client only sees answers."""
+        chat_model = GenericFakeChatModel(
+            messages=iter([AIMessage(content="the answer"), AIMessage(content="again")])
+        )
+        summary_model = GenericFakeChatModel(messages=iter([AIMessage(content="the summary")]))
+        prompts: list[list[BaseMessage]] = []
+
+        def record_prompt(*args):
+            prompts.append(build_prompt(*args))
+            return prompts[-1]
+
+        history = [
+            {"role": "user" if i % 2 == 0 else "assistant", "content": f"m{i} " + "z" * 80}
+            for i in range(21)
+        ]
+
+        with (
+            get_model_registry().override("chat-model", chat_model),
+            get_model_registry().override("summary", summary_model),
+            patch("backend.src.context.CONTEXT_TOKEN_BUDGET", 200),
+            patch("backend.src.coalescer.STREAM_COALESCE_WINDOW_MS", 0),
+            patch("backend.src.graph.build_prompt", side_effect=record_prompt),
+        ):
+            frames = [
+                f async for f in stream_langgraph_response(history, engine=engine, chat_id="c1")
+            ]
+            await _summaries_done()
+            frames += [
+                f async for f in stream_langgraph_response(history, engine=engine, chat_id="c1")
+            ]
+
+        deltas = [json.loads(f[6:-2]) for f in frames if b'"text-delta"' in f]
+        assert "".join(d["delta"] for d in deltas) == "the answeragain"
+        assert len(prompts[0]) < len(history)
+        assert "the summary" in prompts[1][0].content
+
+    @pytest.mark.asyncio
+    async def test_lost_summary_is_regenerated_from_checkpoint(self, summaries) -> None:
+        """Test that turns dropped while a summary was pending stay covered after a restart."""
+        chat_model = GenericFakeChatModel(messages=iter([AIMessage(content="ok")] * 3))
+        summarize = AsyncMock(side_effect=["first", "second", "third"])
+        graph = create_chatbot_graph(checkpointer=InMemorySaver())
+        config = {"configurable": {"thread_id": "c1"}}
+
+        with (
+            get_model_registry().override("chat-model", chat_model),
+            patch("backend.src.context.CONTEXT_TOKEN_BUDGET", 200),
+            patch("backend.src.graph.summarize_messages", summarize),
+        ):
+            await graph.ainvoke({"messages": _chat(20)}, config)
+            await _summaries_done()
+            await graph.ainvoke({"messages": _chat(6)[1:]}, config)
+            await _summaries_done()
+            # A restart (or another replica) loses the summary of the second turn
+            summaries.clear()
+            await graph.ainvoke({"messages": [HumanMessage(content="and now?")]}, config)
+            await _summaries_done()
+
+        state = (await graph.aget_state(config)).values
+        assert summarize.await_count == 3
+        (_, first_span), (previous, second_span), (previous_again, third_span) = [
+            call.args for call in summarize.call_args_list
+        ]
+        assert previous == previous_again == "first"
+        assert [m.content for m in third_span[: len(second_span)]] == [
+            m.content for m in second_span
+        ]
+        assert state["summary"] == "first"
+        assert state["summary_start"] == len(first_span) + 1
@@ -4,6 +4,8 @@ from unittest.mock import AsyncMock, patch
 
 import pytest
 
+from backend.src.llm import get_model_registry
+
 
 class TestCheckDbHealth:
     """Tests for the check_db_health function."""
@@ -107,9 +109,12 @@ class TestHealthEndpoints:
     @pytest.mark.asyncio
     async def test_readiness_endpoint_healthy(self, test_client) -> None:
         """Test the /health/ready endpoint when database is healthy."""
-        with patch(
-            "backend.src.app.check_db_health",
-            return_value={"healthy": True, "latency_ms": 5.0},
+        with (
+            patch(
+                "backend.src.app.check_db_health",
+                return_value={"healthy": True, "latency_ms": 5.0},
+            ),
+            patch.object(get_model_registry(), "warmup_status", "ready"),
         ):
             response = await test_client.get("/health/ready")
 
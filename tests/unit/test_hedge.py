@@ -0,0 +1,124 @@
+"""Unit tests for hedged and failover chat model requests."""
+
+import json
+import time
+from unittest.mock import patch
+
+import pytest
+
+from backend.src.llm import FakeStreamingChatModel, HedgedChatModel, get_model_registry
+from backend.src.llm.hedge import EndpointStats
+from backend.src.observability.exceptions import LLMError
+from backend.src.stream import stream_langgraph_response
+
+
+def _endpoint(ttft_ms: float, seed: int, error_rate: float = 0.0) -> FakeStreamingChatModel:
+    """A stub endpoint; the seed makes each endpoint's text distinguishable."""
+    return FakeStreamingChatModel(
+        ttft_ms=ttft_ms, itl_ms=0, output_tokens=5, seed=seed, error_rate=error_rate
+    )
+
+
+def _hedged(*endpoints: FakeStreamingChatModel, delay_ms: float = 50) -> HedgedChatModel:
+    return HedgedChatModel(
+        endpoints=list(endpoints),
+        endpoint_names=[f"region-{i}" for i in range(len(endpoints))],
+        default_delay_ms=delay_ms,
+        min_delay_ms=1,
+    )
+
+
+class TestHedgedChatModel:
+    """Tests for the HedgedChatModel class."""
+
+    @pytest.mark.asyncio
+    async def test_fast_primary_is_not_hedged(self) -> None:
+        """Test that a primary answering within the threshold is used alone."""
+        primary, secondary = _endpoint(5, seed=1), _endpoint(5, seed=2)
+        llm = _hedged(primary, secondary)
+
+        result = await llm.ainvoke("Hi")
+
+        assert result.content == (await primary.ainvoke("Hi")).content
+        assert llm.stats["region-0"].ewma is not None
+        assert llm.stats["region-1"].ewma is None
+
+    @pytest.mark.asyncio
+    async def test_slow_primary_is_hedged_and_cancelled(self) -> None:
+        """Test that the first endpoint to produce a token wins the race."""
+        slow, fast = _endpoint(1000, seed=1), _endpoint(10, seed=2)
+        llm = _hedged(slow, fast, delay_ms=50)
+
+        start = time.perf_counter()
+        result = await llm.ainvoke("Hi")
+
+        assert time.perf_counter() - start < 0.5
+        assert result.content == (await fast.ainvoke("Hi")).content
+        # The loser's wait raised its EWMA above the winner's: it is demoted
+        assert llm.ranked() == [1, 0]
+
+    @pytest.mark.asyncio
+    async def test_failure_fails_over_without_waiting(self) -> None:
+        """Test that an error before the first token goes straight to the next endpoint."""
+        broken, healthy = _endpoint(0, seed=1, error_rate=1.0), _endpoint(0, seed=2)
+        llm = _hedged(broken, healthy, delay_ms=5000)
+
+        start = time.perf_counter()
+        result = await llm.ainvoke("Hi")
+
+        assert time.perf_counter() - start < 1.0
+        assert result.content == (await healthy.ainvoke("Hi")).content
+
+    @pytest.mark.asyncio
+    async def test_all_endpoints_failing_raises(self) -> None:
+        """Test that the last error is raised when every endpoint fails."""
+        llm = _hedged(_endpoint(0, 1, error_rate=1.0), _endpoint(0, 2, error_rate=1.0))
+
+        with pytest.raises(LLMError):
+            await llm.ainvoke("Hi")
+
+    def test_hedge_delay_adapts_to_p95(self) -> None:
+        """Test that the threshold follows the primary's p95 TTFT, within bounds."""
+        llm = _hedged(_endpoint(0, 1), _endpoint(0, 2), delay_ms=2000)
+        llm.min_samples = 20
+        assert llm.hedge_delay(0) == 2.0
+
+        for i in range(100):
+            llm.stats["region-0"].observe((i + 1) / 1000)
+        assert llm.hedge_delay(0) == pytest.approx(0.095)
+
+        llm.max_delay_ms = 50
+        assert llm.hedge_delay(0) == 0.05
+
+    def test_censored_samples_only_raise_ewma(self) -> None:
+        """Test that a cancelled request never lowers an endpoint's EWMA."""
+        stats = EndpointStats(window=10, alpha=0.5)
+        stats.observe(1.0)
+        stats.censor(0.2)
+        assert stats.ewma == 1.0
+        stats.censor(3.0)
+        assert stats.ewma == 2.0
+        assert list(stats.samples) == [1.0]
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("engine", ["events", "messages"])
+    async def test_hedged_tokens_stream_once(self, engine: str) -> None:
+        """Test that only the hedged model's tokens reach the SSE stream."""
+        slow, fast = _endpoint(1000, seed=1), _endpoint(10, seed=2)
+        llm = _hedged(slow, fast, delay_ms=20)
+        expected = (await fast.ainvoke("Hi")).content
+
+        with (
+            get_model_registry().override("chat-model", llm),
+            patch("backend.src.routing.ROUTER_ENABLED", False),
+            patch("backend.src.coalescer.STREAM_COALESCE_WINDOW_MS", 0),
+        ):
+            frames = [
+                frame
+                async for frame in stream_langgraph_response(
+                    [{"role": "user", "content": "Hi"}], engine=engine
+                )
+            ]
+
+        events = [json.loads(frame[len(b"data: ") :]) for frame in frames if b"{" in frame]
+        assert "".join(e["delta"] for e in events if e["type"] == "text-delta") == expected
@@ -0,0 +1,127 @@
+"""Unit tests for chat model providers and the deterministic fake model."""
+
+import json
+import random
+import time
+from unittest.mock import patch
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from backend.src.llm import FakeStreamingChatModel, create_chat_model, get_model_registry
+from backend.src.observability.exceptions import LLMError
+from backend.src.stream import stream_langgraph_response
+
+
+class TestFakeStreamingChatModel:
+    """Tests for the FakeStreamingChatModel class."""
+
+    @pytest.mark.asyncio
+    async def test_output_is_deterministic_per_prompt(self) -> None:
+        """Test that the same prompt always streams the same tokens."""
+        llm = FakeStreamingChatModel(ttft_ms=0, itl_ms=0, output_tokens=12)
+
+        first = [chunk.content async for chunk in llm.astream("Hi") if chunk.content]
+        second = [chunk.content async for chunk in llm.astream("Hi") if chunk.content]
+
+        assert first == second
+        assert len(first) == 12
+
+    @pytest.mark.asyncio
+    async def test_usage_metadata_on_final_chunk(self) -> None:
+        """Test that usage is reported once, and survives aggregation."""
+        llm = FakeStreamingChatModel(ttft_ms=0, itl_ms=0, output_tokens=5, max_output_tokens=3)
+
+        chunks = [chunk async for chunk in llm.astream("x" * 40) if chunk.content]
+        result = await llm.ainvoke("x" * 40)
+
+        assert [c.usage_metadata is not None for c in chunks] == [False, False, True]
+        assert chunks[-1].usage_metadata["output_tokens"] == 3
+        assert isinstance(result, AIMessage)
+        assert result.usage_metadata == {
+            "input_tokens": 10,
+            "output_tokens": 3,
+            "total_tokens": 13,
+        }
+
+    @pytest.mark.asyncio
+    async def test_ttft_and_inter_token_latency(self) -> None:
+        """Test that the first token waits TTFT and later tokens wait the ITL."""
+        llm = FakeStreamingChatModel(ttft_ms=50, itl_ms=10, output_tokens=6)
+        arrivals: list[float] = []
+
+        start = time.perf_counter()
+        async for _ in llm.astream("Hi"):
+            arrivals.append(time.perf_counter() - start)
+
+        assert arrivals[0] >= 0.05
+        assert arrivals[-1] - arrivals[0] >= 5 * 0.01
+
+    def test_itl_distributions_are_seeded(self) -> None:
+        """Test that random inter-token latencies repeat for the same seed."""
+        for distribution in ("uniform", "exponential"):
+            llm = FakeStreamingChatModel(itl_ms=20, itl_distribution=distribution)
+            rng_a, rng_b = random.Random(1), random.Random(1)
+            a = [llm._delay(rng_a, i) for i in range(1, 50)]
+            b = [llm._delay(rng_b, i) for i in range(1, 50)]
+            assert a == b
+            assert len(set(a)) > 1
+            assert all(delay >= 0 for delay in a)
+
+    @pytest.mark.asyncio
+    async def test_error_rate(self) -> None:
+        """Test that injected failures raise LLMError for a stable set of prompts."""
+        always = FakeStreamingChatModel(ttft_ms=0, itl_ms=0, error_rate=1.0)
+        with pytest.raises(LLMError):
+            await always.ainvoke("Hi")
+
+        sometimes = FakeStreamingChatModel(ttft_ms=0, itl_ms=0, output_tokens=1, error_rate=0.5)
+        outcomes = []
+        for i in range(200):
+            try:
+                await sometimes.ainvoke(f"prompt {i}")
+                outcomes.append(True)
+            except LLMError:
+                outcomes.append(False)
+        assert 60 < outcomes.count(False) < 140
+
+
+class TestCreateChatModel:
+    """Tests for the create_chat_model function."""
+
+    def test_fake_provider_uses_env_config(self) -> None:
+        """Test that the fake provider takes latency settings from config."""
+        with (
+            patch("backend.src.llm.providers.FAKE_LLM_TTFT_MS", 5.0),
+            patch("backend.src.llm.providers.FAKE_LLM_OUTPUT_TOKENS", 7),
+        ):
+            llm = create_chat_model(temperature=0.3, max_output_tokens=256, provider="fake")
+
+        assert isinstance(llm, FakeStreamingChatModel)
+        assert (llm.temperature, llm.max_output_tokens) == (0.3, 256)
+        assert (llm.ttft_ms, llm.output_tokens) == (5.0, 7)
+
+    def test_unknown_provider(self) -> None:
+        """Test that a misconfigured provider fails fast."""
+        with pytest.raises(ValueError, match="CHAT_MODEL_PROVIDER"):
+            create_chat_model(temperature=0.7, provider="nope")
+
+    @pytest.mark.asyncio
+    async def test_fake_model_streams_through_chat_graph(self) -> None:
+        """Test that the fake model drives the real chatbot graph end to end."""
+        llm = FakeStreamingChatModel(ttft_ms=0, itl_ms=0, output_tokens=4)
+        expected = (await llm.ainvoke([HumanMessage(content="Hi")])).content
+
+        with (
+            get_model_registry().override("chat-model", llm),
+            patch("backend.src.routing.ROUTER_ENABLED", False),
+            patch("backend.src.coalescer.STREAM_COALESCE_WINDOW_MS", 0),
+        ):
+            frames = [
+                frame
+                async for frame in stream_langgraph_response([{"role": "user", "content": "Hi"}])
+            ]
+
+        events = [json.loads(frame[len(b"data: ") :]) for frame in frames if b"{" in frame]
+        deltas = [event["delta"] for event in events if event["type"] == "text-delta"]
+        assert "".join(deltas) == expected
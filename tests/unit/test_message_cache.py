@@ -0,0 +1,110 @@
+"""Unit tests for the incremental message conversion cache."""
+
+from typing import Any
+from unittest.mock import MagicMock
+
+from prometheus_client import REGISTRY
+
+from backend.src.message_cache import MessageConversionCache
+from backend.src.stream import _convert_message, convert_to_langgraph_messages
+
+
+def _history(count: int) -> list[dict[str, Any]]:
+    return [
+        {
+            "role": "user" if i % 2 == 0 else "assistant",
+            "parts": [{"type": "text", "text": f"message {i}"}],
+        }
+        for i in range(count)
+    ]
+
+
+def _counter(result: str) -> float:
+    return REGISTRY.get_sample_value("message_conversion_cache_total", {"result": result}) or 0.0
+
+
+class TestMessageConversionCache:
+    """Tests for the MessageConversionCache class."""
+
+    def test_only_new_tail_is_converted(self) -> None:
+        """Test that the cached prefix is reused on the next turn."""
+        cache = MessageConversionCache()
+        converter = MagicMock(side_effect=_convert_message)
+
+        first = cache.convert("chat-1", _history(4), converter)
+        converter.reset_mock()
+        second = cache.convert("chat-1", _history(6), converter)
+
+        assert converter.call_count == 2
+        assert second[:4] == first
+        assert [m.content for m in second] == [f"message {i}" for i in range(6)]
+
+    def test_edited_message_invalidates_suffix(self) -> None:
+        """Test that an edit only reuses the prefix before the edited message."""
+        cache = MessageConversionCache()
+        converter = MagicMock(side_effect=_convert_message)
+        cache.convert("chat-1", _history(4), converter)
+
+        edited = _history(4)
+        edited[2]["parts"][0]["text"] = "edited"
+        converter.reset_mock()
+        result = cache.convert("chat-1", edited, converter)
+
+        assert converter.call_count == 2
+        assert result[2].content == "edited"
+
+    def test_skipped_roles_keep_alignment(self) -> None:
+        """Test that unsupported roles are skipped without breaking prefix reuse."""
+        cache = MessageConversionCache()
+        history = [{"role": "system", "content": "ignored"}, *_history(2)]
+        cache.convert("chat-1", history, _convert_message)
+
+        result = cache.convert("chat-1", [*history, *_history(3)[2:]], _convert_message)
+
+        assert [m.content for m in result] == ["message 0", "message 1", "message 2"]
+
+    def test_lru_eviction_by_chat_count(self) -> None:
+        """Test that the least recently used chat is evicted first."""
+        cache = MessageConversionCache(max_chats=2)
+        cache.convert("a", _history(1), _convert_message)
+        cache.convert("b", _history(1), _convert_message)
+        cache.convert("a", _history(2), _convert_message)
+        cache.convert("c", _history(1), _convert_message)
+
+        converter = MagicMock(side_effect=_convert_message)
+        cache.convert("b", _history(1), converter)
+        assert converter.call_count == 1
+        assert len(cache) == 2
+
+    def test_byte_budget_bounds_memory(self) -> None:
+        """Test that the byte budget evicts chats and skips oversized ones."""
+        cache = MessageConversionCache(max_bytes=30)
+        cache.convert("a", _history(2), _convert_message)
+        cache.convert("b", _history(2), _convert_message)
+        cache.convert("huge", _history(10), _convert_message)
+
+        assert cache.size <= 30
+        assert len(cache) == 1
+
+    def test_hit_and_miss_metrics(self) -> None:
+        """Test that conversions are counted as hits or misses."""
+        cache = MessageConversionCache()
+        hits, misses = _counter("hit"), _counter("miss")
+
+        cache.convert("chat-1", _history(2), _convert_message)
+        cache.convert("chat-1", _history(3), _convert_message)
+
+        assert _counter("miss") == misses + 1
+        assert _counter("hit") == hits + 1
+
+    def test_convert_to_langgraph_messages_uses_cache_with_chat_id(self) -> None:
+        """Test that passing a chat id returns the same messages as a full conversion."""
+        history = _history(5)
+
+        cached = convert_to_langgraph_messages(history, chat_id="chat-42")
+        again = convert_to_langgraph_messages(history, chat_id="chat-42")
+
+        assert again == cached
+        assert [m.content for m in again] == [
+            m.content for m in convert_to_langgraph_messages(history)
+        ]
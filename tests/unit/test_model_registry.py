@@ -0,0 +1,191 @@
+"""Unit tests for the model registry: lazy construction, warm-up and model selection."""
+
+import asyncio
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from langchain_core.messages import HumanMessage
+from prometheus_client import REGISTRY
+
+from backend.src.graph import GRAPH_CACHE_SIZE, _compiled_graph, chatbot_graph, get_chat_graph
+from backend.src.llm import (
+    FakeStreamingChatModel,
+    HedgedChatModel,
+    ModelRegistry,
+    get_model_registry,
+)
+from backend.src.llm.providers import warm_up_model
+from backend.src.llm.registry import DEFAULT_CHAT_MODEL, ModelSpec, resolve_chat_model
+from backend.src.observability.exceptions import ValidationError
+
+
+def _registry() -> ModelRegistry:
+    return ModelRegistry(
+        {"chat": ModelSpec(temperature=0.7), "summary": ModelSpec(0.2, tags=("nostream",))}
+    )
+
+
+class TestModelRegistry:
+    """Tests for the ModelRegistry class."""
+
+    def test_models_are_built_once_on_first_use(self) -> None:
+        """Test that nothing is constructed until a role is requested."""
+        with patch(
+            "backend.src.llm.registry.create_chat_model",
+            side_effect=lambda **kwargs: FakeStreamingChatModel(temperature=kwargs["temperature"]),
+        ) as create:
+            registry = _registry()
+            create.assert_not_called()
+
+            assert registry.get("chat") is registry.get("chat")
+            assert registry.model("chat").temperature == 0.7
+            assert create.call_count == 1
+
+    def test_role_tags_are_applied(self) -> None:
+        """Test that the summary model is bound with its nostream tag."""
+        registry = _registry()
+        model = FakeStreamingChatModel()
+
+        with registry.override("summary", model):
+            assert registry.model("summary") is model
+            assert registry.get("summary").config["tags"] == ["nostream"]
+
+        assert "summary" not in registry._overrides
+
+    @pytest.mark.asyncio
+    async def test_warm_up_marks_ready_and_records_phases(self) -> None:
+        """Test that warm-up builds every model and exports phase timings."""
+        registry = _registry()
+        assert not registry.ready
+
+        with (
+            patch(
+                "backend.src.llm.registry.create_chat_model", return_value=FakeStreamingChatModel()
+            ),
+            patch("backend.src.llm.registry.warm_up_model", new_callable=AsyncMock) as warm,
+        ):
+            await registry.warm_up()
+
+        assert registry.ready
+        assert registry.health() == {"healthy": True, "status": "ready"}
+        assert warm.await_count == 2
+        assert REGISTRY.get_sample_value("app_startup_phase_seconds", {"phase": "warmup"}) >= 0
+
+    @pytest.mark.asyncio
+    async def test_failed_warm_up_does_not_block_readiness(self) -> None:
+        """Test that a warm-up error is reported, and the first request retries lazily."""
+        registry = _registry()
+
+        async def hang(model) -> None:
+            await asyncio.sleep(10)
+
+        with (
+            patch(
+                "backend.src.llm.registry.create_chat_model", return_value=FakeStreamingChatModel()
+            ),
+            patch("backend.src.llm.registry.warm_up_model", side_effect=hang),
+        ):
+            await registry.warm_up(timeout=0.01)
+
+        assert registry.health() == {"healthy": True, "status": "failed", "error": "TimeoutError"}
+
+
+class TestWarmUpModel:
+    """Tests for the warm_up_model function."""
+
+    @pytest.mark.asyncio
+    async def test_vertex_model_opens_channel_with_count_tokens(self) -> None:
+        """Test that a Vertex model is warmed with a count-tokens call on its async client."""
+        model = MagicMock(full_model_name="projects/p/locations/l/models/m")
+        model.async_prediction_client.count_tokens = AsyncMock()
+
+        await warm_up_model(model)
+
+        request = model.async_prediction_client.count_tokens.await_args.args[0]
+        assert request["model"] == "projects/p/locations/l/models/m"
+
+    @pytest.mark.asyncio
+    async def test_hedged_model_warms_every_endpoint(self) -> None:
+        """Test that each endpoint of a hedged model is warmed."""
+        endpoints = [MagicMock(full_model_name=f"m{i}") for i in range(2)]
+        for endpoint in endpoints:
+            endpoint.async_prediction_client.count_tokens = AsyncMock()
+        model = HedgedChatModel.model_construct(endpoints=endpoints, endpoint_names=["a", "b"])
+
+        await warm_up_model(model)
+
+        assert all(e.async_prediction_client.count_tokens.await_count == 1 for e in endpoints)
+
+
+class TestReadiness:
+    """Tests for /health/ready gating on warm-up."""
+
+    @pytest.mark.asyncio
+    async def test_not_ready_until_warm_up_finishes(self, test_client) -> None:
+        """Test that readiness is 503 while models are still warming up."""
+        registry = ModelRegistry()
+
+        with (
+            patch("backend.src.app.check_db_health", return_value={"healthy": True}),
+            patch("backend.src.app.get_model_registry", return_value=registry),
+        ):
+            pending = await test_client.get("/health/ready")
+            registry.skip_warm_up()
+            ready = await test_client.get("/health/ready")
+
+        assert pending.status_code == 503
+        assert pending.json()["checks"]["models"]["status"] == "pending"
+        assert ready.status_code == 200
+
+
+class TestSelectedChatModel:
+    """Tests for routing requests to the selected chat model's graph."""
+
+    def test_resolve_chat_model(self) -> None:
+        """Test that missing ids use the default and unknown ids are rejected."""
+        assert resolve_chat_model(None) == DEFAULT_CHAT_MODEL
+        assert resolve_chat_model("chat-model-reasoning") == "chat-model-reasoning"
+        with pytest.raises(ValidationError):
+            resolve_chat_model("gpt-5")
+
+    def test_graphs_are_compiled_once_per_model(self) -> None:
+        """Test that each model's graph is compiled once and reused."""
+        assert get_chat_graph() is chatbot_graph
+        reasoning = get_chat_graph("chat-model-reasoning")
+
+        assert reasoning is get_chat_graph("chat-model-reasoning")
+        assert reasoning is not chatbot_graph
+        assert _compiled_graph.cache_info().maxsize == GRAPH_CACHE_SIZE
+
+    @pytest.mark.asyncio
+    async def test_request_routes_to_selected_model(self, test_client) -> None:
+        """Test that /api/chat streams from the model named by selectedChatModel."""
+        default = FakeStreamingChatModel(ttft_ms=0, itl_ms=0, output_tokens=3, seed=1)
+        reasoning = FakeStreamingChatModel(ttft_ms=0, itl_ms=0, output_tokens=3, seed=2)
+        expected = (await reasoning.ainvoke([HumanMessage(content="Hi")])).content
+        registry = get_model_registry()
+        body = {
+            "id": "m1",
+            "userId": "routing-user",
+            "selectedChatModel": "chat-model-reasoning",
+            "messages": [{"role": "user", "content": "Hi"}],
+        }
+
+        with (
+            registry.override("chat-model", default),
+            registry.override("chat-model-reasoning", reasoning),
+            patch("backend.src.coalescer.STREAM_COALESCE_WINDOW_MS", 0),
+        ):
+            response = await test_client.post("/api/chat", json=body)
+            rejected = await test_client.post(
+                "/api/chat", json={**body, "selectedChatModel": "unknown"}
+            )
+
+        deltas = [
+            json.loads(line[len("data: ") :])
+            for line in response.text.split("\n\n")
+            if line.startswith("data: {")
+        ]
+        assert "".join(d["delta"] for d in deltas if d["type"] == "text-delta") == expected
+        assert rejected.status_code == 400
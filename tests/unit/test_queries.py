@@ -1,6 +1,6 @@
 """Unit tests for database query functions."""
 
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from unittest.mock import AsyncMock, MagicMock, patch
 from uuid import uuid4
 
@@ -9,7 +9,10 @@ import pytest
 from backend.src.db.models import Chat, Message, User, Vote
 from backend.src.db.queries import (
     create_user,
+    decode_chat_cursor,
     delete_chat_by_id,
+    delete_chats_by_user_id_in_batches,
+    encode_chat_cursor,
     get_chat_by_id,
     get_chats_by_user_id,
     get_message_by_id,
@@ -21,6 +24,7 @@ from backend.src.db.queries import (
     save_messages,
     vote_message,
 )
+from backend.src.observability.exceptions import ValidationError
 
 
 class TestUserQueries:
@@ -170,6 +174,59 @@ class TestChatQueries:
 
         assert len(result["chats"]) == 10
         assert result["hasMore"] is True
+        assert result["nextCursor"] == encode_chat_cursor(mock_chats[9])
+        assert result["prevCursor"] is None
+
+    @pytest.mark.asyncio
+    async def test_get_chats_by_user_id_cursor_is_one_statement(
+        self, mock_session: AsyncMock
+    ) -> None:
+        """Test that paging from a cursor takes a single round trip."""
+        chat = Chat(id=uuid4(), createdAt=datetime.now(timezone.utc), userId=uuid4())
+        mock_result = MagicMock()
+        mock_result.scalars.return_value.all.return_value = [chat]
+        mock_session.execute.return_value = mock_result
+
+        result = await get_chats_by_user_id(
+            mock_session, chat.userId, ending_before=encode_chat_cursor(chat)
+        )
+
+        mock_session.execute.assert_awaited_once()
+        assert result["nextCursor"] is None
+        assert result["prevCursor"] == encode_chat_cursor(chat)
+
+    @pytest.mark.asyncio
+    async def test_get_chats_by_user_id_starting_after_keeps_newest_first(
+        self, mock_session: AsyncMock
+    ) -> None:
+        """Test that a newer page, fetched oldest first, is returned newest first."""
+        now = datetime.now(timezone.utc)
+        oldest_first = [
+            Chat(id=uuid4(), createdAt=now + timedelta(seconds=i), userId=uuid4()) for i in range(3)
+        ]
+        mock_result = MagicMock()
+        mock_result.scalars.return_value.all.return_value = oldest_first
+        mock_session.execute.return_value = mock_result
+
+        result = await get_chats_by_user_id(
+            mock_session, uuid4(), limit=2, starting_after=encode_chat_cursor(oldest_first[0])
+        )
+
+        assert result["chats"] == [oldest_first[1], oldest_first[0]]
+        assert result["prevCursor"] == encode_chat_cursor(oldest_first[1])
+        assert result["nextCursor"] == encode_chat_cursor(oldest_first[0])
+
+    @pytest.mark.parametrize("cursor", ["not-a-cursor", str(uuid4()), "WzFd"])
+    def test_decode_chat_cursor_rejects_malformed(self, cursor: str) -> None:
+        """Test that malformed cursors are rejected as validation errors."""
+        with pytest.raises(ValidationError):
+            decode_chat_cursor(cursor)
+
+    def test_chat_cursor_round_trip(self) -> None:
+        """Test that a cursor decodes to the chat's (createdAt, id) key."""
+        chat = Chat(id=uuid4(), createdAt=datetime.now(timezone.utc))
+
+        assert decode_chat_cursor(encode_chat_cursor(chat)) == (chat.createdAt, chat.id)
 
     @pytest.mark.asyncio
     async def test_delete_chat_by_id(self, mock_session: AsyncMock) -> None:
@@ -188,10 +245,40 @@ class TestChatQueries:
 
         result = await delete_chat_by_id(mock_session, chat_id)
 
-        # Should execute 4 times: delete votes, messages, streams, and chat
-        assert mock_session.execute.call_count == 4
+        # One DELETE: votes, messages and streams cascade in the database
+        assert mock_session.execute.call_count == 1
         assert result is not None
 
+    @pytest.mark.asyncio
+    async def test_delete_chats_by_user_id_in_batches(self, mock_session: AsyncMock) -> None:
+        """Test that batches are committed one at a time, yielding the deleted ids."""
+        chat_ids = [uuid4() for _ in range(5)]
+        mock_session.scalars.side_effect = [chat_ids[:2], chat_ids[2:4], chat_ids[4:]]
+
+        batches = [
+            deleted
+            async for deleted in delete_chats_by_user_id_in_batches(
+                mock_session, uuid4(), batch_size=2
+            )
+        ]
+
+        assert batches == [chat_ids[:2], chat_ids[2:4], chat_ids[4:]]
+        assert mock_session.commit.await_count == 3
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("batch_size", [0, -1])
+    async def test_delete_chats_in_batches_rejects_empty_batches(
+        self, mock_session: AsyncMock, batch_size: int
+    ) -> None:
+        """Test that a batch size below 1 is rejected instead of looping forever."""
+        with pytest.raises(ValueError):
+            async for _ in delete_chats_by_user_id_in_batches(
+                mock_session, uuid4(), batch_size=batch_size
+            ):
+                pass
+
+        mock_session.scalars.assert_not_called()
+
 
 class TestMessageQueries:
     """Tests for message-related query functions."""
@@ -213,13 +300,29 @@ class TestMessageQueries:
             },
         ]
 
+        mock_result = MagicMock()
+        mock_result.all.return_value = [Message(**message) for message in messages]
+        mock_session.scalars.return_value = mock_result
+
         result = await save_messages(mock_session, messages)
 
         assert len(result) == 2
         assert result[0].role == "user"
         assert result[1].role == "assistant"
-        mock_session.add_all.assert_called_once()
-        mock_session.flush.assert_called_once()
+        # One bulk INSERT ... RETURNING with a parameter set per row
+        mock_session.scalars.assert_awaited_once()
+        statement, rows = mock_session.scalars.call_args.args
+        assert statement.is_insert
+        assert [row["role"] for row in rows] == ["user", "assistant"]
+        assert all(row["id"] and row["attachments"] == [] for row in rows)
+        assert rows[1]["createdAt"] - rows[0]["createdAt"] == timedelta(microseconds=1)
+        mock_session.add_all.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_save_messages_empty(self, mock_session: AsyncMock) -> None:
+        """Test that saving no messages issues no statement."""
+        assert await save_messages(mock_session, []) == []
+        mock_session.scalars.assert_not_called()
 
     @pytest.mark.asyncio
     async def test_get_messages_by_chat_id(self, mock_session: AsyncMock) -> None:
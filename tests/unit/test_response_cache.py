@@ -0,0 +1,202 @@
+"""Unit tests for the response cache (tiers, keys, endpoints)."""
+
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from langchain_core.language_models.chat_models import BaseChatModel
+from prometheus_client import REGISTRY
+
+from backend.src.graph import generate_reply
+from backend.src.llm import get_model_registry
+from backend.src.llm.fake import FakeStreamingChatModel
+from backend.src.response_cache import (
+    MemoryResponseCache,
+    RedisResponseCache,
+    ResponseCache,
+    cache_key,
+)
+
+
+def _requests(endpoint: str, result: str) -> float:
+    labels = {"endpoint": endpoint, "result": result}
+    return REGISTRY.get_sample_value("response_cache_requests_total", labels) or 0.0
+
+
+class _FakeRedis:
+    """Dict-backed stand-in for the redis.asyncio client."""
+
+    def __init__(self) -> None:
+        self.data: dict[str, bytes] = {}
+
+    async def get(self, key: str) -> bytes | None:
+        return self.data.get(key)
+
+    async def set(self, key: str, value: str, ex: int) -> None:
+        self.data[key] = value.encode()
+
+
+class TestMemoryResponseCache:
+    """Tests for the in-process LRU tier."""
+
+    @pytest.mark.asyncio
+    async def test_entries_expire(self) -> None:
+        """Test that entries are dropped after their TTL."""
+        now = [0.0]
+        cache = MemoryResponseCache(clock=lambda: now[0])
+        await cache.set("k", "v", ttl=10)
+
+        assert await cache.get("k") == "v"
+        now[0] = 11.0
+        assert await cache.get("k") is None
+        assert cache.size == 0
+
+    @pytest.mark.asyncio
+    async def test_byte_budget_evicts_least_recently_used(self) -> None:
+        """Test that the byte budget evicts the least recently used entry."""
+        cache = MemoryResponseCache(max_bytes=20)
+        await cache.set("a", "x" * 8, ttl=60)
+        await cache.set("b", "x" * 8, ttl=60)
+        await cache.get("a")
+        await cache.set("c", "x" * 8, ttl=60)
+
+        assert await cache.get("a") is not None
+        assert await cache.get("b") is None
+        assert cache.size <= 20
+
+
+class TestResponseCache:
+    """Tests for the tiered ResponseCache."""
+
+    def test_key_normalises_prompt(self) -> None:
+        """Test that whitespace and case differences share a key."""
+        key = cache_key("title", "  Plan a  trip\nto Rome ", "m", 0.3)
+
+        assert key == cache_key("title", "plan a trip to rome", "m", 0.3)
+        assert key != cache_key("title", "plan a trip to rome", "m", 0.7)
+        assert key != cache_key("chat", "plan a trip to rome", "m", 0.3)
+
+    @pytest.mark.asyncio
+    async def test_miss_then_hit(self) -> None:
+        """Test that a second identical request is served from memory."""
+        cache = ResponseCache([MemoryResponseCache()])
+        compute = AsyncMock(return_value="Trip to Rome")
+        hits, misses = _requests("title", "hit_memory"), _requests("title", "miss")
+
+        for _ in range(2):
+            result = await cache.get_or_compute(
+                "title", "Plan a trip", model="m", temperature=0.3, compute=compute
+            )
+
+        assert result == "Trip to Rome"
+        compute.assert_awaited_once()
+        assert _requests("title", "miss") == misses + 1
+        assert _requests("title", "hit_memory") == hits + 1
+
+    @pytest.mark.asyncio
+    async def test_redis_hit_backfills_memory(self) -> None:
+        """Test that a shared-tier hit is copied into the local tier."""
+        redis = _FakeRedis()
+        shared = ResponseCache([MemoryResponseCache(), RedisResponseCache(client=redis)])
+        await shared.get_or_compute(
+            "title", "Hi", model="m", temperature=0.3, compute=AsyncMock(return_value="Greeting")
+        )
+
+        memory = MemoryResponseCache()
+        replica = ResponseCache([memory, RedisResponseCache(client=redis)])
+        compute = AsyncMock()
+        result = await replica.get_or_compute(
+            "title", "Hi", model="m", temperature=0.3, compute=compute
+        )
+
+        assert result == "Greeting"
+        compute.assert_not_called()
+        assert await memory.get(cache_key("title", "Hi", "m", 0.3)) == "Greeting"
+
+    @pytest.mark.asyncio
+    async def test_failing_tier_is_a_miss(self) -> None:
+        """Test that a broken tier never fails the request."""
+        broken = RedisResponseCache(client=AsyncMock(get=AsyncMock(side_effect=OSError("down"))))
+        cache = ResponseCache([broken])
+
+        result = await cache.get_or_compute(
+            "chat", "Hi", model="m", temperature=0.0, compute=AsyncMock(return_value="Hello")
+        )
+
+        assert result == "Hello"
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        ("endpoint", "temperature", "bypass"),
+        [("chat", 1.5, False), ("title", 0.3, True), ("unknown", 0.0, False)],
+    )
+    async def test_non_cacheable_requests_bypass(
+        self, endpoint: str, temperature: float, bypass: bool
+    ) -> None:
+        """Test that hot sampling, explicit bypass and endpoints without a TTL skip the cache."""
+        cache = ResponseCache([MemoryResponseCache()])
+        compute = AsyncMock(return_value="fresh")
+
+        for _ in range(2):
+            await cache.get_or_compute(
+                endpoint, "Hi", model="m", temperature=temperature, compute=compute, bypass=bypass
+            )
+
+        assert compute.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_errors_are_not_cached(self) -> None:
+        """Test that a failed computation is retried on the next request."""
+        cache = ResponseCache([MemoryResponseCache()])
+        compute = AsyncMock(side_effect=[RuntimeError("quota"), "ok"])
+
+        with pytest.raises(RuntimeError):
+            await cache.get_or_compute("chat", "Hi", model="m", temperature=0, compute=compute)
+        result = await cache.get_or_compute("chat", "Hi", model="m", temperature=0, compute=compute)
+
+        assert result == "ok"
+
+
+class TestTitleEndpointCache:
+    """Tests for response caching on /api/title."""
+
+    @pytest.mark.asyncio
+    async def test_title_is_cached_and_no_cache_bypasses(self, test_client) -> None:
+        """Test that repeated titles hit the cache unless Cache-Control: no-cache is sent."""
+        llm = AsyncMock(spec=BaseChatModel, model_name="gemini-2.5-flash", temperature=0.3)
+        llm.ainvoke.return_value.content = "Rome Trip"
+        cache = ResponseCache([MemoryResponseCache()])
+
+        with (
+            get_model_registry().override("title", llm),
+            patch("backend.src.graph.get_response_cache", return_value=cache),
+        ):
+            for _ in range(2):
+                response = await test_client.post("/api/title", json={"message": "Plan Rome"})
+                assert response.json() == {"title": "Rome Trip"}
+            await test_client.post(
+                "/api/title", json={"message": "Plan Rome"}, headers={"Cache-Control": "no-cache"}
+            )
+
+        assert llm.ainvoke.await_count == 2
+
+
+class TestChatReplyCache:
+    """Tests for response caching in generate_reply (/chat)."""
+
+    @pytest.mark.asyncio
+    async def test_reply_is_keyed_on_routed_model(self) -> None:
+        """Test that a message routed to the fast model is cached under that model."""
+        fast = FakeStreamingChatModel(model_name="fast", ttft_ms=0, itl_ms=0, output_tokens=3)
+        default = FakeStreamingChatModel(model_name="default", ttft_ms=0, itl_ms=0)
+        memory = MemoryResponseCache()
+
+        with (
+            get_model_registry().override("chat-model", default),
+            get_model_registry().override("chat-model-fast", fast),
+            patch("backend.src.graph.get_response_cache", return_value=ResponseCache([memory])),
+            patch.dict("backend.src.response_cache.RESPONSE_CACHE_TTL_SECONDS", {"chat": 300}),
+        ):
+            reply = await generate_reply("Hi there")
+
+        assert await memory.get(cache_key("chat", "Hi there", "fast", 0.0)) == reply
+        assert await memory.get(cache_key("chat", "Hi there", "default", 0.0)) is None
@@ -0,0 +1,239 @@
+"""Unit tests for resumable streams (ring buffer, replay and reconnect endpoint)."""
+
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+from backend.src.observability.exceptions import ValidationError
+from backend.src.resumable import InMemoryStreamStore, start_resumable_stream, subscribe
+
+
+async def _drain(store: InMemoryStreamStore, stream_id: str, after_id: int) -> list[tuple]:
+    return [item async for item in store.read(stream_id, after_id)]
+
+
+class TestInMemoryStreamStore:
+    """Tests for the InMemoryStreamStore class."""
+
+    @pytest.mark.asyncio
+    async def test_event_ids_are_monotonic(self) -> None:
+        """Test that appended frames get increasing ids starting at 1."""
+        store = InMemoryStreamStore()
+        await store.create("s1")
+
+        ids = [await store.append("s1", f"frame-{i}".encode()) for i in range(3)]
+
+        assert ids == [1, 2, 3]
+
+    @pytest.mark.asyncio
+    async def test_replay_after_last_event_id(self) -> None:
+        """Test that reading replays only frames after the given id."""
+        store = InMemoryStreamStore()
+        await store.create("s1")
+        for i in range(4):
+            await store.append("s1", f"f{i}".encode())
+        await store.close("s1")
+
+        assert await _drain(store, "s1", 2) == [(3, b"f2"), (4, b"f3")]
+        assert await _drain(store, "s1", 0) == [(1, b"f0"), (2, b"f1"), (3, b"f2"), (4, b"f3")]
+
+    @pytest.mark.asyncio
+    async def test_read_follows_live_tail(self) -> None:
+        """Test that a subscriber receives frames appended after it attached."""
+        store = InMemoryStreamStore()
+        await store.create("s1")
+        await store.append("s1", b"a")
+
+        reader = asyncio.create_task(_drain(store, "s1", 0))
+        await asyncio.sleep(0)
+        await store.append("s1", b"b")
+        await store.close("s1")
+
+        assert await asyncio.wait_for(reader, 1) == [(1, b"a"), (2, b"b")]
+
+    @pytest.mark.asyncio
+    async def test_ring_buffer_drops_oldest_frames(self) -> None:
+        """Test that the per-stream frame limit evicts the oldest frames."""
+        store = InMemoryStreamStore(max_frames=2)
+        await store.create("s1")
+        for i in range(4):
+            await store.append("s1", f"f{i}".encode())
+        await store.close("s1")
+
+        assert await store.replayable("s1", 2)
+        assert not await store.replayable("s1", 1)
+        assert await _drain(store, "s1", 2) == [(3, b"f2"), (4, b"f3")]
+
+    @pytest.mark.asyncio
+    async def test_reader_behind_trimmed_frames_stops(self) -> None:
+        """Test that a reader whose next frame was trimmed ends instead of skipping it."""
+        store = InMemoryStreamStore(max_frames=2)
+        await store.create("s1")
+        await store.append("s1", b"f0")
+
+        reader = store.read("s1", 0)
+        assert await reader.__anext__() == (1, b"f0")
+        for i in range(1, 4):
+            await store.append("s1", f"f{i}".encode())
+
+        with pytest.raises(StopAsyncIteration):
+            await reader.__anext__()
+        assert await _drain(store, "s1", 0) == []
+
+    @pytest.mark.asyncio
+    async def test_expired_streams_are_evicted(self) -> None:
+        """Test that streams idle beyond the TTL are dropped."""
+        now = [0.0]
+        store = InMemoryStreamStore(ttl=10, clock=lambda: now[0])
+        await store.create("old")
+        await store.append("old", b"x")
+
+        now[0] = 11.0
+        await store.create("new")
+
+        assert not await store.replayable("old", 0)
+        assert await store.replayable("new", 0)
+
+    @pytest.mark.asyncio
+    async def test_total_budget_evicts_finished_streams_only(self) -> None:
+        """Test that the global byte budget never evicts a live stream."""
+        store = InMemoryStreamStore(max_total_bytes=4)
+        await store.create("done")
+        await store.append("done", b"xxxx")
+        await store.close("done")
+        await store.create("live")
+        await store.append("live", b"yyyy")
+
+        await store.create("another")
+
+        assert not await store.replayable("done", 0)
+        assert await store.replayable("live", 0)
+
+    @pytest.mark.asyncio
+    async def test_heartbeats_expire(self) -> None:
+        """Test that a subscriber whose heartbeat lapsed no longer counts."""
+        now = 0.0
+        store = InMemoryStreamStore(clock=lambda: now)
+        await store.create("s1")
+        await store.heartbeat("s1", "sub", 15)
+
+        assert await store.has_subscribers("s1")
+        now = 16.0
+        assert not await store.has_subscribers("s1")
+
+
+class TestResumableStreaming:
+    """Tests for the producer/subscriber helpers and reconnect endpoint."""
+
+    @staticmethod
+    async def _frames():
+        for i in range(3):
+            yield f"data: {i}\n\n".encode()
+
+    @pytest.mark.asyncio
+    async def test_subscribe_prefixes_sse_ids(self) -> None:
+        """Test that subscribers receive frames with SSE id fields."""
+        store = InMemoryStreamStore()
+        with patch("backend.src.resumable.get_stream_store", return_value=store):
+            await start_resumable_stream("s1", self._frames())
+            frames = [frame async for frame in subscribe("s1", 1)]
+
+        assert frames == [b"id: 2\ndata: 1\n\n", b"id: 3\ndata: 2\n\n"]
+
+    @pytest.mark.asyncio
+    async def test_resume_endpoint_replays_from_last_event_id(self, test_client) -> None:
+        """Test the reconnect endpoint honours the Last-Event-ID header."""
+        store = InMemoryStreamStore()
+        with (
+            patch("backend.src.resumable.get_stream_store", return_value=store),
+            patch("backend.src.app.get_stream_store", return_value=store),
+        ):
+            await start_resumable_stream("s1", self._frames())
+            response = await test_client.get("/api/chat/stream/s1", headers={"Last-Event-ID": "2"})
+
+        assert response.status_code == 200
+        assert response.text == "id: 3\ndata: 2\n\n"
+
+    @pytest.mark.asyncio
+    async def test_resume_endpoint_unknown_stream(self, test_client) -> None:
+        """Test that an unknown stream returns 204 No Content."""
+        store = InMemoryStreamStore()
+        with patch("backend.src.app.get_stream_store", return_value=store):
+            response = await test_client.get("/api/chat/stream/missing")
+
+        assert response.status_code == 204
+
+    @pytest.mark.asyncio
+    async def test_orphaned_stream_is_cancelled(self) -> None:
+        """Test that generation stops when no subscriber reattaches in time."""
+        store = InMemoryStreamStore()
+        cancelled = asyncio.Event()
+
+        async def endless():
+            try:
+                yield b"data: first\n\n"
+                await asyncio.sleep(60)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        with (
+            patch("backend.src.resumable.get_stream_store", return_value=store),
+            patch("backend.src.resumable.RESUMABLE_STREAM_ORPHAN_GRACE_SECONDS", 0.01),
+        ):
+            await start_resumable_stream("s1", endless())
+            subscriber = subscribe("s1")
+            assert await subscriber.__anext__() == b"id: 1\ndata: first\n\n"
+            await subscriber.aclose()
+
+            await asyncio.wait_for(cancelled.wait(), 1)
+
+    @pytest.mark.asyncio
+    async def test_subscriber_on_another_replica_keeps_stream_alive(self) -> None:
+        """Test that a heartbeat in the store (another replica) prevents cancellation."""
+        store = InMemoryStreamStore()
+        cancelled = asyncio.Event()
+
+        async def endless():
+            try:
+                yield b"data: first\n\n"
+                await asyncio.sleep(60)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        with (
+            patch("backend.src.resumable.get_stream_store", return_value=store),
+            patch("backend.src.resumable.RESUMABLE_STREAM_ORPHAN_GRACE_SECONDS", 0.01),
+        ):
+            await start_resumable_stream("s1", endless())
+            await store.heartbeat("s1", "remote-subscriber", 60)
+            subscriber = subscribe("s1")
+            await subscriber.__anext__()
+            await subscriber.aclose()
+
+            await asyncio.sleep(0.05)
+            assert not cancelled.is_set()
+            await store.detach("s1", "remote-subscriber")
+            await asyncio.wait_for(cancelled.wait(), 1)
+
+    @pytest.mark.asyncio
+    async def test_duplicate_stream_is_refused(self) -> None:
+        """Test that starting a stream id that is still producing is refused."""
+        store = InMemoryStreamStore()
+        release = asyncio.Event()
+
+        async def waiting():
+            yield b"data: first\n\n"
+            await release.wait()
+
+        with patch("backend.src.resumable.get_stream_store", return_value=store):
+            await start_resumable_stream("dup", waiting())
+            with pytest.raises(ValidationError) as exc:
+                await start_resumable_stream("dup", self._frames())
+            release.set()
+            frames = [frame async for frame in subscribe("dup")]
+
+        assert exc.value.status_code == 409
+        assert frames == [b"id: 1\ndata: first\n\n"]
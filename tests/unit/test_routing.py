@@ -0,0 +1,120 @@
+"""Unit tests for heuristic routing of trivial turns to the fast chat model."""
+
+from unittest.mock import patch
+
+import pytest
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from prometheus_client import REGISTRY
+
+from backend.src.graph import create_chatbot_graph
+from backend.src.llm import create_chat_model, get_model_registry
+from backend.src.llm.registry import CHAT_MODEL_IDS
+from backend.src.routing import classify_turn, route_turn
+
+
+def _conversation(text: str, earlier_turns: int = 0) -> list[BaseMessage]:
+    messages: list[BaseMessage] = []
+    for i in range(earlier_turns):
+        messages += [HumanMessage(content=f"Question {i}"), AIMessage(content=f"Answer {i}")]
+    return messages + [HumanMessage(content=text)]
+
+
+def _model(text: str) -> GenericFakeChatModel:
+    return GenericFakeChatModel(messages=iter([AIMessage(content=text)]))
+
+
+def _decisions(route: str, reason: str) -> float:
+    return (
+        REGISTRY.get_sample_value("chat_route_decisions_total", {"route": route, "reason": reason})
+        or 0.0
+    )
+
+
+class TestClassifyTurn:
+    """Tests for the classify_turn function."""
+
+    @pytest.mark.parametrize(
+        ("text", "earlier_turns", "expected"),
+        [
+            ("thanks!", 0, ("fast", "short")),
+            ("ok, sounds good", 8, ("fast", "short")),
+            ("What's the capital of France?", 0, ("fast", "short")),
+            ("and in 2024?", 4, ("default", "follow_up_question")),
+            ("Why is the sky blue", 0, ("default", "reasoning")),
+            ("Explain this", 0, ("default", "reasoning")),
+            ("```x = 1```", 0, ("default", "structured")),
+            ("a\nb", 0, ("default", "structured")),
+            ("word " * 30, 0, ("default", "long")),
+        ],
+    )
+    def test_classification(self, text: str, earlier_turns: int, expected: tuple[str, str]) -> None:
+        """Test that only short, simple turns are classified as fast."""
+        assert classify_turn(_conversation(text, earlier_turns)) == expected
+
+    def test_turn_without_user_message(self) -> None:
+        """Test that a conversation not ending with a user message is not routed."""
+        assert classify_turn([AIMessage(content="Hi")]) == ("default", "no_user_turn")
+
+
+class TestRouteTurn:
+    """Tests for the route_turn function."""
+
+    def test_decision_is_recorded(self) -> None:
+        """Test that each decision increments the route counter."""
+        before = _decisions("fast", "short")
+        assert route_turn(_conversation("thanks!"), "chat-model") == "fast"
+        assert _decisions("fast", "short") == before + 1
+
+    def test_selected_model_is_honoured(self) -> None:
+        """Test that an explicitly selected model is never routed."""
+        assert route_turn(_conversation("thanks!"), "chat-model-reasoning") == "default"
+
+    def test_disabled(self) -> None:
+        """Test that ROUTER_ENABLED=false keeps every turn on the selected model."""
+        with patch("backend.src.routing.ROUTER_ENABLED", False):
+            assert route_turn(_conversation("thanks!"), "chat-model") == "default"
+
+    def test_fast_model_is_not_selectable(self) -> None:
+        """Test that the fast model is internal to routing."""
+        assert "chat-model-fast" not in CHAT_MODEL_IDS
+
+
+class TestChatbotGraphRouting:
+    """Tests for the route stage of the chatbot graph."""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        ("text", "route", "tier", "reply"),
+        [
+            ("thanks!", "fast", "interactive", "fast reply"),
+            ("Explain quicksort", "default", "standard", "default reply"),
+        ],
+    )
+    async def test_turn_is_answered_by_routed_model(
+        self, text: str, route: str, tier: str, reply: str
+    ) -> None:
+        """Test that the chatbot node answers with the model the route stage chose."""
+        registry = get_model_registry()
+        before = REGISTRY.get_sample_value(
+            "chat_ttft_seconds_count", {"model": "chat-model", "route": route, "tier": tier}
+        )
+
+        with (
+            registry.override("chat-model", _model("default reply")),
+            registry.override("chat-model-fast", _model("fast reply")),
+        ):
+            result = await create_chatbot_graph().ainvoke({"messages": [HumanMessage(text)]})
+
+        assert result["route"] == route
+        assert result["messages"][-1].content == reply
+        assert isinstance(result["messages"][-1], AIMessage)
+        after = REGISTRY.get_sample_value(
+            "chat_ttft_seconds_count", {"model": "chat-model", "route": route, "tier": tier}
+        )
+        assert after == (before or 0.0) + 1
+
+    def test_thinking_budget_reaches_vertex_model(self) -> None:
+        """Test that the fast spec's thinking budget is passed to ChatVertexAI."""
+        model = create_chat_model(temperature=0.7, provider="vertex", thinking_budget=0)
+        assert model.thinking_budget == 0  # type: ignore[attr-defined]
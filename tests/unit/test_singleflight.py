@@ -0,0 +1,120 @@
+"""Unit tests for single-flight coalescing of LLM calls."""
+
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from langchain_core.language_models.chat_models import BaseChatModel
+
+from backend.src.graph import generate_title
+from backend.src.llm import get_model_registry
+from backend.src.response_cache import ResponseCache
+from backend.src.singleflight import SingleFlight, fingerprint
+
+
+class TestSingleFlight:
+    """Tests for the SingleFlight class."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_callers_share_one_call(self) -> None:
+        """Test that identical concurrent calls run once and share the result."""
+        flight: SingleFlight[str] = SingleFlight("test")
+        release = asyncio.Event()
+        calls = 0
+
+        async def call() -> str:
+            nonlocal calls
+            calls += 1
+            await release.wait()
+            return "result"
+
+        waiters = [asyncio.create_task(flight.do("k", call)) for _ in range(5)]
+        await asyncio.sleep(0)
+        release.set()
+
+        assert await asyncio.gather(*waiters) == ["result"] * 5
+        assert calls == 1
+        assert len(flight) == 0
+
+    @pytest.mark.asyncio
+    async def test_exceptions_are_shared_and_not_remembered(self) -> None:
+        """Test that a failure reaches every waiter and the next call retries."""
+        flight: SingleFlight[str] = SingleFlight("test")
+        fn = AsyncMock(side_effect=[RuntimeError("quota"), "ok"])
+
+        results = await asyncio.gather(
+            flight.do("k", fn), flight.do("k", fn), return_exceptions=True
+        )
+
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert await flight.do("k", fn) == "ok"
+        assert fn.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_does_not_cancel_others(self) -> None:
+        """Test that one caller going away leaves the shared call running."""
+        flight: SingleFlight[str] = SingleFlight("test")
+        release = asyncio.Event()
+
+        async def call() -> str:
+            await release.wait()
+            return "result"
+
+        first = asyncio.create_task(flight.do("k", call))
+        second = asyncio.create_task(flight.do("k", call))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        release.set()
+
+        assert await second == "result"
+        assert first.cancelled()
+
+    @pytest.mark.asyncio
+    async def test_call_cancelled_when_no_waiters_remain(self) -> None:
+        """Test that the shared call stops once every caller has gone."""
+        flight: SingleFlight[str] = SingleFlight("test")
+        cancelled = asyncio.Event()
+
+        async def call() -> str:
+            try:
+                await asyncio.sleep(60)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+            return "never"
+
+        waiter = asyncio.create_task(flight.do("k", call))
+        await asyncio.sleep(0)
+        waiter.cancel()
+
+        await asyncio.wait_for(cancelled.wait(), 1)
+
+    def test_fingerprint_distinguishes_parts(self) -> None:
+        """Test that fingerprints are stable and sensitive to every part."""
+        assert fingerprint("m", 0.3, "hi") == fingerprint("m", 0.3, "hi")
+        assert fingerprint("m", 0.3, "hi") != fingerprint("m", 0.7, "hi")
+
+    @pytest.mark.asyncio
+    async def test_concurrent_titles_share_one_llm_call(self) -> None:
+        """Test that concurrent identical title requests make one Vertex call."""
+        release = asyncio.Event()
+        llm = AsyncMock(spec=BaseChatModel, model_name="gemini-2.5-flash", temperature=0.3)
+
+        async def ainvoke(prompt: str, config: object = None):
+            await release.wait()
+            return AsyncMock(content="Rome Trip")
+
+        llm.ainvoke.side_effect = ainvoke
+
+        with (
+            get_model_registry().override("title", llm),
+            patch("backend.src.graph.get_response_cache", return_value=ResponseCache([])),
+        ):
+            titles = [asyncio.create_task(generate_title("Plan Rome")) for _ in range(3)]
+            await asyncio.sleep(0)
+            release.set()
+            results = await asyncio.gather(*titles)
+
+        assert results == ["Rome Trip"] * 3
+        assert llm.ainvoke.await_count == 1
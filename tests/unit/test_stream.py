@@ -1,11 +1,34 @@
-"""Unit tests for the stream module (SSE formatting and message conversion)."""
+"""Unit tests for the stream module (SSE formatting, message conversion, coalescing)."""
 
+import asyncio
 import json
-
-from langchain_core.messages import AIMessage, HumanMessage
-
-from backend.src.protocol import format_sse
-from backend.src.stream import convert_to_langgraph_messages
+from collections.abc import AsyncGenerator
+from typing import Any
+from unittest.mock import MagicMock, patch
+
+import pytest
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage, ToolMessage
+from prometheus_client import REGISTRY
+from starlette.responses import StreamingResponse
+
+from backend.src.coalescer import TextDeltaCoalescer
+from backend.src.protocol import (
+    create_done_marker,
+    create_error_event,
+    create_finish_event,
+    create_finish_step_event,
+    create_start_event,
+    create_start_step_event,
+    create_text_delta,
+    create_text_end,
+    create_text_start,
+    format_sse,
+)
+from backend.src.stream import (
+    cancel_on_disconnect,
+    convert_to_langgraph_messages,
+    stream_langgraph_response,
+)
 
 
 class TestFormatSSE:
@@ -70,6 +93,57 @@ class TestFormatSSE:
         assert result == "data: {}\n\n"
 
 
+class TestProtocolEncoders:
+    """Tests that the byte-level event helpers match format_sse exactly."""
+
+    SAMPLES = [
+        "Hello",
+        "",
+        'Line 1\nLine 2\t"quoted" \\ back',
+        "caf\u00e9 \u2014 \u4f60\u597d \U0001f600",
+        "\x00\x1f\x7f \u2028\u2029",
+        "</script><b>&amp;</b>",
+    ]
+
+    @pytest.mark.parametrize("value", SAMPLES)
+    def test_text_events_match_format_sse(self, value: str) -> None:
+        """Test text and lifecycle events against the generic encoder."""
+        cases = [
+            (create_start_event(value), {"type": "start", "messageId": value}),
+            (create_start_step_event(value), {"type": "start-step", "messageId": value}),
+            (create_text_start(value), {"type": "text-start", "id": value}),
+            (
+                create_text_delta("text-1", value),
+                {"type": "text-delta", "id": "text-1", "delta": value},
+            ),
+            (create_text_end(value), {"type": "text-end", "id": value}),
+            (create_error_event(value), {"type": "error", "errorText": value}),
+        ]
+        for frame, payload in cases:
+            assert isinstance(frame, bytes)
+            assert frame == format_sse(payload).encode("utf-8")
+
+    def test_finish_events_match_format_sse(self) -> None:
+        """Test finish events against the generic encoder."""
+        usage = {"promptTokens": 3, "completionTokens": 5}
+
+        assert create_finish_event("stop", usage) == format_sse(
+            {"type": "finish", "finishReason": "stop", "usage": usage}
+        ).encode("utf-8")
+        assert create_finish_step_event("error") == format_sse(
+            {
+                "type": "finish-step",
+                "finishReason": "error",
+                "usage": {"promptTokens": 0, "completionTokens": 0},
+                "isContinued": False,
+            }
+        ).encode("utf-8")
+
+    def test_done_marker(self) -> None:
+        """Test the stream termination marker."""
+        assert create_done_marker() == b"data: [DONE]\n\n"
+
+
 class TestConvertToLanggraphMessages:
     """Tests for the convert_to_langgraph_messages function."""
 
@@ -171,3 +245,312 @@ class TestConvertToLanggraphMessages:
 
         assert len(result) == 1
         assert result[0].content == "Hello"
+
+
+class TestTextDeltaCoalescer:
+    """Tests for the TextDeltaCoalescer class."""
+
+    def test_disabled_passes_through(self) -> None:
+        """Test that a zero window emits every delta immediately."""
+        coalescer = TextDeltaCoalescer(window_ms=0, max_bytes=1024)
+
+        assert coalescer.add("text-1", "Hel") == [("text-1", "Hel")]
+        assert coalescer.flush() == []
+
+    def test_merges_within_window(self) -> None:
+        """Test that deltas inside the window are merged into one chunk."""
+        now = [0.0]
+        coalescer = TextDeltaCoalescer(window_ms=25, max_bytes=1024, clock=lambda: now[0])
+
+        assert coalescer.add("text-1", "Hel") == []
+        now[0] = 0.01
+        assert coalescer.add("text-1", "lo") == []
+        assert coalescer.flush() == [("text-1", "Hello")]
+        assert not coalescer.pending
+
+    def test_flushes_when_window_elapsed(self) -> None:
+        """Test that a delta arriving after the window releases the buffer."""
+        now = [0.0]
+        coalescer = TextDeltaCoalescer(window_ms=25, max_bytes=1024, clock=lambda: now[0])
+
+        coalescer.add("text-1", "Hel")
+        now[0] = 0.03
+        assert coalescer.time_until_flush() == 0
+        assert coalescer.add("text-1", "lo") == [("text-1", "Hello")]
+
+    def test_flushes_on_byte_budget(self) -> None:
+        """Test that reaching the byte budget flushes immediately."""
+        coalescer = TextDeltaCoalescer(window_ms=1000, max_bytes=4, clock=lambda: 0.0)
+
+        assert coalescer.add("text-1", "ab") == []
+        assert coalescer.add("text-1", "cd") == [("text-1", "abcd")]
+
+    def test_flushes_on_text_id_change(self) -> None:
+        """Test that a different text id never merges with buffered text."""
+        coalescer = TextDeltaCoalescer(window_ms=1000, max_bytes=1024, clock=lambda: 0.0)
+
+        coalescer.add("text-1", "one")
+        assert coalescer.add("text-2", "two") == [("text-1", "one")]
+        assert coalescer.flush() == [("text-2", "two")]
+
+
+class TestStreamLanggraphResponse:
+    """Tests for the stream_langgraph_response generator."""
+
+    @staticmethod
+    def _mock_graph(chunks: list[str]) -> MagicMock:
+        async def astream_events(*args: Any, **kwargs: Any):
+            for chunk in chunks:
+                yield {"event": "on_chat_model_stream", "data": {"chunk": {"content": chunk}}}
+            yield {"event": "on_chat_model_end", "data": {}}
+
+        graph = MagicMock()
+        graph.astream_events = astream_events
+        return graph
+
+    @staticmethod
+    async def _collect(messages: list[dict[str, Any]], engine: str = "events") -> list[bytes]:
+        return [frame async for frame in stream_langgraph_response(messages, engine=engine)]
+
+    @staticmethod
+    def _deltas(frames: list[bytes]) -> list[str]:
+        payloads = [json.loads(f[6:-2]) for f in frames if f != b"data: [DONE]\n\n"]
+        return [p["delta"] for p in payloads if p["type"] == "text-delta"]
+
+    @pytest.mark.asyncio
+    async def test_coalesces_deltas(self) -> None:
+        """Test that fast chunks are merged into fewer text-delta frames."""
+        graph = self._mock_graph(["Hel", "lo", ", ", "world"])
+
+        with (
+            patch("backend.src.stream.get_chat_graph", return_value=graph),
+            patch("backend.src.coalescer.STREAM_COALESCE_WINDOW_MS", 1000),
+        ):
+            frames = await self._collect([{"role": "user", "content": "Hi"}])
+
+        assert self._deltas(frames) == ["Hello, world"]
+        assert frames[-1] == b"data: [DONE]\n\n"
+
+    @pytest.mark.asyncio
+    async def test_window_zero_emits_every_chunk(self) -> None:
+        """Test that disabling coalescing keeps one frame per chunk."""
+        graph = self._mock_graph(["Hel", "lo"])
+
+        with (
+            patch("backend.src.stream.get_chat_graph", return_value=graph),
+            patch("backend.src.coalescer.STREAM_COALESCE_WINDOW_MS", 0),
+        ):
+            frames = await self._collect([{"role": "user", "content": "Hi"}])
+
+        assert self._deltas(frames) == ["Hel", "lo"]
+
+    @pytest.mark.asyncio
+    async def test_flushes_buffered_text_after_window(self) -> None:
+        """Test that a pause in generation releases buffered text on time."""
+
+        async def astream_events(*args: Any, **kwargs: Any):
+            yield {"event": "on_chat_model_stream", "data": {"chunk": {"content": "Hel"}}}
+            await asyncio.sleep(0.05)
+            yield {"event": "on_chat_model_stream", "data": {"chunk": {"content": "lo"}}}
+            yield {"event": "on_chat_model_end", "data": {}}
+
+        graph = MagicMock()
+        graph.astream_events = astream_events
+
+        with (
+            patch("backend.src.stream.get_chat_graph", return_value=graph),
+            patch("backend.src.coalescer.STREAM_COALESCE_WINDOW_MS", 10),
+        ):
+            frames = await self._collect([{"role": "user", "content": "Hi"}])
+
+        assert self._deltas(frames) == ["Hel", "lo"]
+
+
+class TestMessagesEngine:
+    """Tests for the astream(stream_mode=["messages", "updates"]) engine."""
+
+    @pytest.mark.asyncio
+    async def test_streams_text_and_usage(self) -> None:
+        """Test that model chunks become deltas and node updates carry usage."""
+        usage = {"input_tokens": 7, "output_tokens": 2, "total_tokens": 9}
+
+        async def astream(*args: Any, **kwargs: Any):
+            assert kwargs["stream_mode"] == ["messages", "updates"]
+            yield ("messages", (AIMessageChunk(content="Hel"), {}))
+            yield ("messages", (AIMessageChunk(content="lo"), {}))
+            yield ("messages", (ToolMessage(content="tool output", tool_call_id="t1"), {}))
+            final = AIMessage(content="Hello", usage_metadata=usage)
+            yield ("updates", {"chatbot": {"messages": [final]}})
+
+        graph = MagicMock()
+        graph.astream = astream
+
+        with (
+            patch("backend.src.stream.get_chat_graph", return_value=graph),
+            patch("backend.src.coalescer.STREAM_COALESCE_WINDOW_MS", 0),
+        ):
+            frames = [
+                frame
+                async for frame in stream_langgraph_response(
+                    [{"role": "user", "content": "Hi"}], engine="messages"
+                )
+            ]
+
+        payloads = [json.loads(f[6:-2]) for f in frames if f != b"data: [DONE]\n\n"]
+        assert [p["delta"] for p in payloads if p["type"] == "text-delta"] == ["Hel", "lo"]
+        finish = next(p for p in payloads if p["type"] == "finish")
+        assert finish["usage"] == {"promptTokens": 7, "completionTokens": 2}
+
+    @pytest.mark.asyncio
+    async def test_engine_selected_by_config(self) -> None:
+        """Test that STREAM_ENGINE picks the engine when none is passed."""
+        graph = MagicMock()
+        graph.astream_events = TestStreamLanggraphResponse._mock_graph(["Hi"]).astream_events
+
+        with (
+            patch("backend.src.stream.get_chat_graph", return_value=graph),
+            patch("backend.src.stream.STREAM_ENGINE", "events"),
+        ):
+            frames = [
+                f async for f in stream_langgraph_response([{"role": "user", "content": "Hi"}])
+            ]
+
+        assert TestStreamLanggraphResponse._deltas(frames) == ["Hi"]
+        graph.astream.assert_not_called()
+
+
+class _FakeRequest:
+    """Minimal stand-in for a Starlette request that can simulate a disconnect."""
+
+    def __init__(self) -> None:
+        self.disconnected = asyncio.Event()
+
+    async def is_disconnected(self) -> bool:
+        return self.disconnected.is_set()
+
+    async def receive(self) -> dict[str, Any]:
+        await self.disconnected.wait()
+        return {"type": "http.disconnect"}
+
+
+async def _serve(request: _FakeRequest, body: AsyncGenerator[bytes, None]) -> list[bytes]:
+    """Serve body as uvicorn would (ASGI spec 2.3), returning the frames sent."""
+    sent: list[bytes] = []
+
+    async def send(message: dict[str, Any]) -> None:
+        if message["type"] == "http.response.body" and message.get("body"):
+            sent.append(message["body"])
+
+    scope = {"type": "http", "asgi": {"version": "3.0", "spec_version": "2.3"}}
+    await StreamingResponse(body, media_type="text/event-stream")(scope, request.receive, send)
+    return sent
+
+
+class TestCancelOnDisconnect:
+    """Tests for the cancel_on_disconnect relay."""
+
+    @pytest.mark.asyncio
+    async def test_relays_all_frames(self) -> None:
+        """Test that frames pass through untouched while the client is connected."""
+
+        async def frames():
+            for i in range(3):
+                yield f"data: {i}\n\n".encode()
+
+        relayed = [f async for f in cancel_on_disconnect(_FakeRequest(), frames())]
+
+        assert relayed == [b"data: 0\n\n", b"data: 1\n\n", b"data: 2\n\n"]
+
+    @pytest.mark.asyncio
+    async def test_disconnect_cancels_producer(self) -> None:
+        """Test that a client disconnect seen by the response cancels the generator."""
+        request = _FakeRequest()
+        cancelled = asyncio.Event()
+
+        async def frames():
+            try:
+                yield b"data: first\n\n"
+                request.disconnected.set()
+                await asyncio.sleep(60)
+                yield b"data: never\n\n"
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        sent = await asyncio.wait_for(_serve(request, cancel_on_disconnect(request, frames())), 1)
+
+        assert sent == [b"data: first\n\n"]
+        assert cancelled.is_set()
+
+    @pytest.mark.asyncio
+    async def test_cancellation_between_frames_closes_generator(self) -> None:
+        """Test that the generator is closed when cancellation lands outside it."""
+        closed = asyncio.Event()
+
+        async def frames():
+            try:
+                while True:
+                    yield b"data: more\n\n"
+            finally:
+                closed.set()
+
+        relay = cancel_on_disconnect(_FakeRequest(), frames())
+
+        async def consume() -> None:
+            async for _frame in relay:
+                await asyncio.sleep(60)
+
+        consumer = asyncio.create_task(consume())
+        await asyncio.sleep(0.01)
+        consumer.cancel()
+        await asyncio.gather(consumer, return_exceptions=True)
+        await relay.aclose()
+
+        assert closed.is_set()
+
+    @pytest.mark.asyncio
+    async def test_already_disconnected_skips_generation(self) -> None:
+        """Test that nothing is generated when the client left before streaming."""
+        request = _FakeRequest()
+        request.disconnected.set()
+        started = False
+
+        async def frames():
+            nonlocal started
+            started = True
+            yield b"data: x\n\n"
+
+        assert [f async for f in cancel_on_disconnect(request, frames())] == []
+        assert not started
+
+    @pytest.mark.asyncio
+    async def test_records_cancelled_stream_duration(self) -> None:
+        """Test that a cancelled LLM stream is recorded with status=cancelled."""
+        request = _FakeRequest()
+
+        async def astream_events(*args: Any, **kwargs: Any):
+            yield {"event": "on_chat_model_stream", "data": {"chunk": {"content": "Hi"}}}
+            await asyncio.sleep(60)
+            yield {"event": "on_chat_model_end", "data": {}}
+
+        graph = MagicMock()
+        graph.astream_events = astream_events
+        before = REGISTRY.get_sample_value("stream_duration_seconds_count", {"status": "cancelled"})
+
+        with (
+            patch("backend.src.stream.get_chat_graph", return_value=graph),
+            patch("backend.src.coalescer.STREAM_COALESCE_WINDOW_MS", 0),
+        ):
+            messages = [{"role": "user", "content": "Hi"}]
+            frames = stream_langgraph_response(messages, engine="events")
+
+            async def disconnect_after_first_delta() -> AsyncGenerator[bytes, None]:
+                async for frame in cancel_on_disconnect(request, frames):
+                    if b"text-delta" in frame:
+                        request.disconnected.set()
+                    yield frame
+
+            await asyncio.wait_for(_serve(request, disconnect_after_first_delta()), 1)
+
+        after = REGISTRY.get_sample_value("stream_duration_seconds_count", {"status": "cancelled"})
+        assert after == (before or 0) + 1
@@ -0,0 +1,188 @@
+"""Unit tests for latency tiers: per-tier clients, limits, deadlines and metrics."""
+
+from unittest.mock import patch
+
+import pytest
+from prometheus_client import REGISTRY
+
+from backend.src.llm import (
+    FakeStreamingChatModel,
+    HedgedChatModel,
+    ModelRegistry,
+    get_model_registry,
+)
+from backend.src.llm.registry import ModelSpec
+from backend.src.llm.tiers import _tier, resolve_latency_tier
+from backend.src.observability.exceptions import LLMError, ValidationError
+from backend.src.stream import stream_langgraph_response
+
+
+def _registry() -> ModelRegistry:
+    return ModelRegistry(
+        {
+            "chat": ModelSpec(temperature=0.7),
+            "title": ModelSpec(0.3, max_output_tokens=256, tier="interactive", surface="title"),
+        }
+    )
+
+
+def _sample(name: str, **labels: str) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+class TestLatencyTiers:
+    """Tests for tier definitions and validation."""
+
+    def test_env_overrides_and_model_defaults(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test that tier limits come from the environment; empty means model default."""
+        monkeypatch.setenv("LLM_TIER_TEST_THINKING_BUDGET", "512")
+        monkeypatch.setenv("LLM_TIER_TEST_TIMEOUT_SECONDS", "")
+
+        tier = _tier("test", thinking_budget="0", max_output_tokens="", timeout="20")
+
+        assert tier.thinking_budget == 512
+        assert tier.max_output_tokens is None
+        assert tier.timeout_seconds is None
+
+    def test_resolve(self) -> None:
+        """Test that unknown tiers are rejected and an empty tier means the default."""
+        assert resolve_latency_tier("deep") == "deep"
+        assert resolve_latency_tier(None) is None
+        with pytest.raises(ValidationError):
+            resolve_latency_tier("instant")
+
+
+class TestRegistryTiers:
+    """Tests for per-tier clients in the model registry."""
+
+    def test_one_client_per_role_and_tier(self) -> None:
+        """Test that clients are cached per (role, tier) with the tier's limits."""
+        with patch(
+            "backend.src.llm.registry.create_chat_model",
+            side_effect=lambda **kwargs: FakeStreamingChatModel(),
+        ) as create:
+            registry = _registry()
+            assert registry.model("chat") is registry.model("chat", "standard")
+            assert registry.model("chat", "interactive") is not registry.model("chat")
+            assert registry.get("chat", "deep") is registry.get("chat", "deep")
+
+        assert create.call_count == 3
+        interactive = create.call_args_list[1].kwargs
+        assert interactive["thinking_budget"] == 0
+        assert interactive["timeout"] == 20.0
+        assert interactive["max_output_tokens"] == 2048
+
+    def test_thinking_budget_raised_to_model_minimum(self) -> None:
+        """Test that a tier budget below the model's minimum is raised to it."""
+        registry = ModelRegistry(
+            {
+                "pro": ModelSpec(0.7, model="gemini-2.5-pro"),
+                "flash": ModelSpec(0.7, model="gemini-2.5-flash"),
+            }
+        )
+        with patch(
+            "backend.src.llm.registry.create_chat_model",
+            side_effect=lambda **kwargs: FakeStreamingChatModel(),
+        ) as create:
+            registry.model("pro", "interactive")
+            registry.model("flash", "interactive")
+            registry.model("pro", "deep")
+
+        budgets = [call.kwargs["thinking_budget"] for call in create.call_args_list]
+        assert budgets == [128, 0, 8192]
+
+    def test_role_max_output_tokens_overrides_tier(self) -> None:
+        """Test that a role's own max_output_tokens wins over its tier's."""
+        with patch(
+            "backend.src.llm.registry.create_chat_model",
+            side_effect=lambda **kwargs: FakeStreamingChatModel(),
+        ) as create:
+            _registry().model("title")
+
+        assert create.call_args.kwargs["max_output_tokens"] == 256
+
+    @pytest.mark.asyncio
+    async def test_usage_and_latency_by_surface_and_tier(self) -> None:
+        """Test that calls are recorded under the role's surface and tier."""
+        registry = _registry()
+        labels = {"surface": "title", "tier": "interactive"}
+        calls = _sample("llm_tier_duration_seconds_count", status="success", **labels)
+        output = _sample("llm_tier_tokens_total", kind="output", **labels)
+
+        model = FakeStreamingChatModel(ttft_ms=0, itl_ms=0, output_tokens=5)
+        with registry.override("title", model):
+            await registry.get("title").ainvoke("Plan a trip")
+
+        assert _sample("llm_tier_duration_seconds_count", status="success", **labels) == calls + 1
+        assert _sample("llm_tier_tokens_total", kind="output", **labels) == output + 5
+
+    @pytest.mark.asyncio
+    async def test_hedged_call_is_counted_once(self) -> None:
+        """Test that the endpoints of a hedged call are not counted as calls."""
+        registry = _registry()
+        labels = {"surface": "chat", "tier": "deep", "status": "success"}
+        before = _sample("llm_tier_duration_seconds_count", **labels)
+
+        endpoints = [
+            FakeStreamingChatModel(ttft_ms=0, itl_ms=0, output_tokens=3, seed=i) for i in range(2)
+        ]
+        hedged = HedgedChatModel(endpoints=endpoints, endpoint_names=["a", "b"])
+        with registry.override("chat", hedged):
+            await registry.get("chat", "deep").ainvoke("Hi")
+
+        assert _sample("llm_tier_duration_seconds_count", **labels) == before + 1
+
+    @pytest.mark.asyncio
+    async def test_requested_tier_reaches_chat_model(self) -> None:
+        """Test that a request's latency tier reaches the streamed chat model and its metrics."""
+        labels = {"model": "chat-model", "route": "default", "tier": "deep"}
+        before = _sample("chat_ttft_seconds_count", **labels)
+        tier_labels = {"surface": "chat", "tier": "deep", "status": "success"}
+        calls = _sample("llm_tier_duration_seconds_count", **tier_labels)
+
+        model = FakeStreamingChatModel(ttft_ms=0, itl_ms=0, output_tokens=3)
+        with get_model_registry().override("chat-model", model):
+            frames = [
+                frame
+                async for frame in stream_langgraph_response(
+                    [{"role": "user", "content": "thanks!"}], latency_tier="deep"
+                )
+            ]
+
+        assert any(b"text-delta" in frame for frame in frames)
+        assert _sample("chat_ttft_seconds_count", **labels) == before + 1
+        assert _sample("llm_tier_duration_seconds_count", **tier_labels) == calls + 1
+
+    @pytest.mark.asyncio
+    async def test_unknown_tier_is_rejected(self, test_client) -> None:
+        """Test that /api/chat rejects an unknown latency tier with 400."""
+        response = await test_client.post(
+            "/api/chat",
+            json={
+                "id": "chat-1",
+                "messages": [{"role": "user", "content": "Hi"}],
+                "latencyTier": "instant",
+            },
+        )
+
+        assert response.status_code == 400
+
+
+class TestFakeModelTimeout:
+    """Tests for the fake model's request deadline."""
+
+    @pytest.mark.asyncio
+    async def test_stream_past_deadline_fails(self) -> None:
+        """Test that a stream slower than its timeout fails with LLMError."""
+        model = FakeStreamingChatModel(ttft_ms=0, itl_ms=20, output_tokens=10, timeout=0.05)
+
+        with pytest.raises(LLMError, match="timed out"):
+            async for _ in model.astream("Hi"):
+                pass
+
+    @pytest.mark.asyncio
+    async def test_call_within_deadline_succeeds(self) -> None:
+        """Test that a call finishing before its timeout is unaffected."""
+        model = FakeStreamingChatModel(ttft_ms=0, itl_ms=0, output_tokens=3, timeout=1.0)
+
+        assert (await model.ainvoke("Hi")).content